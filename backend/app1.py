@@ -1,42 +1,344 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, Response, g, has_app_context, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import mysql.connector
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
-import json
 from datetime import datetime
+import hashlib
+import threading
+import time
+
+from auth import Authenticator, Identity, InvalidSession, LoginBusy, RateLimiter, SessionTokens
+from blob_store import BlobStore
+from cache import TTLCache, make_cache
+from db_pool import TenantPoolRegistry
+from fast_json import dumps_row, dumps_rows
+from file_serving import serve_file
+from instrumentation import (
+    InstrumentedCursor, begin_request, count_json, end_request, metrics,
+    observe_acquire, observe_mail_batch,
+)
+from invites import (
+    CANDIDATE_INVITES_QUERY, RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY, RECENT_INVITE_NOTIFICATIONS_QUERY,
+    InviteImportError, import_invites,
+)
+from job_search import JobIndexRegistry, FILTERS as JOB_SEARCH_FILTERS, parse_cursor
+from leave_booking import LeaveBookingError, book_leave
+from mail_queue import MailQueue
+from notification_stream import NotificationHub, notification_key
+from profile_completion import (
+    PROFILE_COMPLETION_QUERY, completion, completion_notifications, incomplete_profiles, incomplete_summary,
+)
+from profile_writes import PROFILE_FORM_FIELDS, ProfileWriteError, profile_values, upsert_profile
+from projection import Projection, ProjectionError, parse_fields
+from records import achievement_to_dict, certificate_to_dict, leave_request_to_dict
+from team_review import ReviewError, pending_leave, pending_terminations, review_leave, review_terminations
+from tenants import UnknownTenant, build_directory
+
+class CountingJSONProvider(DefaultJSONProvider):
+    # Flask's default provider, plus byte counters for /metrics
+    def dumps(self, obj, **kwargs):
+        body = super().dumps(obj, **kwargs)
+        count_json('encode', len(body.encode()))
+        return body
+
+    def loads(self, s, **kwargs):
+        count_json('decode', len(s) if isinstance(s, (bytes, bytearray)) else len(s.encode()))
+        return super().loads(s, **kwargs)
 
 app = Flask(__name__)
+app.json = CountingJSONProvider(app)
 CORS(app)
 
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = ''
-app.config['MAIL_PASSWORD'] = ''
+app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
+app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', '')
+app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', '')
 mail = Mail(app)
+
+def deliver_mail_batch(messages):
+    # Runs on a mail_queue worker thread: one SMTP connection per batch.
+    results = {}
+    start = time.perf_counter()
+    with app.app_context():
+        with mail.connect() as connection:
+            for message in messages:
+                try:
+                    msg = Message(message['subject'],
+                                  sender=message['sender'],
+                                  recipients=message['recipients'])
+                    msg.body = message['body']
+                    connection.send(msg)
+                    results[message['id']] = None
+                except Exception as e:
+                    results[message['id']] = e
+    observe_mail_batch(time.perf_counter() - start, results)
+    return results
+
+mail_queue = MailQueue(
+    os.environ.get('MAIL_QUEUE_PATH', 'mail_outbox.sqlite3'),
+    deliver_mail_batch,
+    workers=int(os.environ.get('MAIL_QUEUE_WORKERS', 2)),
+    batch_size=int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 25)),
+    max_attempts=int(os.environ.get('MAIL_QUEUE_MAX_ATTEMPTS', 8)),
+)
 # MySQL Configuration
+# Connections are pooled per company database; conn.close() in the routes
+# returns the connection to its tenant pool rather than closing the socket.
+db_pool = TenantPoolRegistry(
+    {
+        'host': "",
+        'user': "",
+        'password': "",
+    },
+    max_per_tenant=int(os.environ.get('DB_POOL_SIZE', 10)),
+    wait_timeout=float(os.environ.get('DB_POOL_WAIT_TIMEOUT', 10)),
+    idle_timeout=float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+)
+
+# Maps company names to server/database (see tenants.py). Lookups are cached,
+# and unknown names are rejected with a 404 before any connection attempt.
+tenant_directory = build_directory(
+    db_pool.get_connection,
+    ttl=float(os.environ.get('TENANT_DIRECTORY_TTL', 300)),
+    negative_ttl=float(os.environ.get('TENANT_DIRECTORY_NEGATIVE_TTL', 30)),
+)
+
+db_pool.cursor_wrapper = InstrumentedCursor
+db_pool.on_acquire = observe_acquire
+
 def get_db_connection(company_name):
+    tenant = tenant_directory.resolve(company_name)
     try:
-        return mysql.connector.connect(
-            host="",
-            user="",
-            password="",
-            database=company_name
-        )
+        conn = db_pool.get_connection(tenant.database, host=tenant.host, port=tenant.port)
     except mysql.connector.Error as e:
         raise Exception(f"Error connecting to the database: {str(e)}")
+    # Remember it so teardown can hand it back if the route never gets to
+    # conn.close() (closing twice is a no-op).
+    if has_app_context():
+        g.setdefault('db_connections', []).append(conn)
+    return conn
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    for conn in g.pop('db_connections', ()):
+        conn.close()
+
+@app.errorhandler(UnknownTenant)
+def handle_unknown_tenant(e):
+    return jsonify({'error': str(e)}), 404
 
 # File upload configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+blob_store = BlobStore(UPLOAD_FOLDER)
+
+class BlobRequest(Request):
+    # Stream multipart file parts straight into the blob store's temp area,
+    # hashing as they arrive, instead of Werkzeug's default spooled buffer.
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return blob_store.new_upload()
+
+app.request_class = BlobRequest
+
+def stored_file_path(filename, digest):
+    if digest:
+        return blob_store.path(digest)
+    # Uploads from before the blob store live directly in UPLOAD_FOLDER
+    return os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+# Who pushes document bytes: '' (Flask), 'x-sendfile' or 'x-accel' (see file_serving.py)
+app.config['FILE_OFFLOAD'] = os.environ.get('FILE_OFFLOAD', '')
+app.config['FILE_OFFLOAD_PREFIX'] = os.environ.get('FILE_OFFLOAD_PREFIX', '/protected-uploads')
+app.config['USE_X_SENDFILE'] = app.config['FILE_OFFLOAD'] == 'x-sendfile'
+
+def send_stored_file(filename, digest, as_attachment=False):
+    # Blob digests double as strong ETags; legacy files fall back to mtime/size.
+    return serve_file(
+        stored_file_path(filename, digest),
+        download_name=filename,
+        etag=digest,
+        as_attachment=as_attachment,
+        mode=app.config['FILE_OFFLOAD'],
+        upload_root=app.config['UPLOAD_FOLDER'],
+        accel_prefix=app.config['FILE_OFFLOAD_PREFIX'],
+    )
+
+def release_stored_file(filename, digest):
+    if digest:
+        blob_store.release(digest)
+    elif filename:
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Serialized notification feeds keyed by (company, employee_id). Entries expire
+# after NOTIFICATION_CACHE_TTL so new invites (written outside this service)
+# still show up; profile writes drop the entry straight away.
+notification_cache = TTLCache(
+    maxsize=int(os.environ.get('NOTIFICATION_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('NOTIFICATION_CACHE_TTL', 60)),
+)
+
+# get_profile results keyed by (company, employee_id). Set PROFILE_CACHE_REDIS_URL
+# to share the cache (and its invalidations) between worker processes; without
+# it each process keeps its own LRU, and only the worker that handled a write
+# drops its entry, so entries live at most PROFILE_CACHE_LOCAL_TTL seconds.
+profile_cache = make_cache(
+    'profile',
+    maxsize=int(os.environ.get('PROFILE_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('PROFILE_CACHE_TTL', 300)),
+    redis_url=os.environ.get('PROFILE_CACHE_REDIS_URL'),
+    local_ttl=float(os.environ.get('PROFILE_CACHE_LOCAL_TTL', 5)),
+)
+
+def profile_changed(company_name, employee_id):
+    profile_cache.delete((company_name, str(employee_id)))
+    notification_cache.delete((company_name, str(employee_id)))
+    notification_hub.notify(company_name, employee_id)
+
+# Every request is timed per route; requests slower than SLOW_REQUEST_MS are
+# logged with their acquire/query/mail spans. X-DB-Queries carries the number
+# of statements the request ran.
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_MS', 500)) / 1000
+
+@app.before_request
+def start_request_trace():
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.request_trace, g.request_trace_token = begin_request(route)
+
+@app.after_request
+def finish_request_trace(response):
+    trace = g.pop('request_trace', None)
+    if trace is not None:
+        response.headers['X-DB-Queries'] = str(trace.queries)
+        end_request(trace, g.pop('request_trace_token'), request.method, response.status_code,
+                    SLOW_REQUEST_SECONDS)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_prometheus_metrics():
+    pool = db_pool.stats()['totals']
+    gauges = [
+        ('db_pool_connections', 'Pooled connections by state', {'state': 'in_use'}, pool['in_use']),
+        ('db_pool_connections', 'Pooled connections by state', {'state': 'idle'}, pool['idle']),
+        ('mail_queue_depth', 'Queued outbox messages', {}, mail_queue.depth()),
+    ]
+    for name, cache in (('profiles', profile_cache), ('notifications', notification_cache)):
+        stats = cache.stats()
+        gauges.append(('cache_hits', 'Cache hits since start', {'cache': name}, stats['hits']))
+        gauges.append(('cache_misses', 'Cache misses since start', {'cache': name}, stats['misses']))
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/metrics/db-pool', methods=['GET'])
+def get_db_pool_metrics():
+    return jsonify(db_pool.stats()), 200
+
+@app.route('/api/metrics/caches', methods=['GET'])
+def get_cache_metrics():
+    return jsonify({
+        'profiles': profile_cache.stats(),
+        'notifications': notification_cache.stats(),
+    }), 200
+
+@app.route('/api/metrics/tenants', methods=['GET'])
+def get_tenant_metrics():
+    return jsonify(tenant_directory.stats()), 200
+
+@app.route('/api/metrics/mail-queue', methods=['GET'])
+def get_mail_queue_metrics():
+    return jsonify(mail_queue.stats()), 200
+
+@app.route('/api/metrics/auth', methods=['GET'])
+def get_auth_metrics():
+    return jsonify(authenticator.stats()), 200
+
+# Passwords are stored as werkzeug hashes (PASSWORD_HASH_METHOD). Checks run
+# on a bounded pool of LOGIN_VERIFY_WORKERS threads; legacy plaintext rows are
+# rehashed in the background after their first successful login.
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+def store_password_hash(company_name, employee_id, old_value, new_hash):
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor()
+    try:
+        # Only replaces the value that was verified, so a concurrent password
+        # change is never overwritten.
+        cursor.execute("""
+            UPDATE t_employee_data SET password = %s
+            WHERE employee_id = %s AND password = %s
+        """, (new_hash, employee_id, old_value))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+authenticator = Authenticator(
+    store_password_hash,
+    method=PASSWORD_HASH_METHOD,
+    workers=int(os.environ.get('LOGIN_VERIFY_WORKERS', 0)) or None,
+    max_pending=int(os.environ.get('LOGIN_VERIFY_MAX_PENDING', 64)),
+    cache_ttl=float(os.environ.get('LOGIN_VERIFY_CACHE_TTL', 300)),
+)
+login_limiter = RateLimiter(
+    rate=float(os.environ.get('LOGIN_RATE_PER_TENANT', 20)),
+    burst=int(os.environ.get('LOGIN_BURST_PER_TENANT', 40)),
+)
+
+# Login returns a signed session token; clients send it back as
+# `Authorization: Bearer <token>`, or as ?token= on GETs that cannot set
+# headers (EventSource, links that open documents). Every route with a
+# company in its URL checks it before the view runs. Set SECRET_KEY so every
+# worker (and every restart) accepts the same tokens. Until
+# REQUIRE_SESSION_TOKEN is on, requests without a token keep working from the
+# ids in the URL.
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(32).hex()
+REQUIRE_SESSION_TOKEN = os.environ.get('REQUIRE_SESSION_TOKEN', 'false').lower() == 'true'
+session_tokens = SessionTokens(
+    app.config['SECRET_KEY'],
+    max_age=int(os.environ.get('SESSION_TOKEN_MAX_AGE', 12 * 3600)),
+)
+
+# URL arguments naming the employee a route acts for
+SESSION_SUBJECT_ARGS = ('employee_id', 'manager_id')
+
+def session_identity(authorization, company_name, employee_id=None):
+    # The token's identity for this URL, or None for a request without one
+    identity = session_tokens.from_header(authorization)
+    if identity is None:
+        if REQUIRE_SESSION_TOKEN:
+            raise InvalidSession('Login required')
+        return None
+    return session_tokens.check(identity, company_name, employee_id)
+
+def request_session(method, headers, args, view_args):
+    # Shared by the Flask and async apps. None for routes outside a company
+    # and for CORS preflights, which never carry credentials.
+    company_name = (view_args or {}).get('company_name')
+    if company_name is None or method == 'OPTIONS':
+        return None
+    authorization = headers.get('Authorization')
+    if not authorization and method == 'GET' and args.get('token'):
+        authorization = f"Bearer {args['token']}"
+    subject = next((view_args[arg] for arg in SESSION_SUBJECT_ARGS if arg in view_args), None)
+    return session_identity(authorization, company_name, subject)
+
+@app.before_request
+def check_session():
+    g.identity = request_session(request.method, request.headers, request.args, request.view_args)
+
+@app.errorhandler(InvalidSession)
+def handle_invalid_session(e):
+    return jsonify({'error': str(e)}), e.status
+
 @app.route('/api/login', methods=['POST'])
 def login():
     data = request.json
@@ -48,6 +350,11 @@ def login():
         return jsonify({'error': 'Missing required fields'}), 400
 
     company_name = data['company_name']
+    retry_after = login_limiter.acquire(company_name)
+    if retry_after:
+        return jsonify({'error': 'Too many login attempts, try again shortly'}), 429, \
+            {'Retry-After': str(int(retry_after) + 1)}
+
     conn = None
     cursor = None
     try:
@@ -56,9 +363,16 @@ def login():
         
         cursor.execute("SELECT * FROM t_employee_data WHERE email = %s", (data['email'],))
         employee = cursor.fetchone()
+        # Hand the connection back before the (slow) password check
+        cursor.close()
+        conn.close()
+        cursor = conn = None
         
-        if employee and employee['password'] == data['password']:  # Use plain text password comparison
+        if employee and authenticator.verify(company_name, employee['employee_id'],
+                                             employee['password'], data['password']):
+            identity = Identity(employee['employee_id'], employee['email'], employee['comp_id'], company_name)
             return jsonify({
+                'token': session_tokens.issue(identity),
                 'employeeId': employee['employee_id'],
                 'email': employee['email'],
                 'firstName': employee['first_name'],
@@ -72,6 +386,10 @@ def login():
         
         return jsonify({'error': 'Invalid credentials'}), 401
         
+    except UnknownTenant:
+        return jsonify({'error': 'Invalid credentials'}), 401
+    except LoginBusy:
+        return jsonify({'error': 'Login service busy, try again shortly'}), 503, {'Retry-After': '1'}
     except mysql.connector.Error as e:
         # Handling database related errors
         return jsonify({'error': f'Database error: {str(e)}'}), 500
@@ -84,82 +402,154 @@ def login():
         if conn:
             conn.close()
 
+# Columns each read endpoint returns. password and the legacy JSON blobs that
+# moved to child tables are never sent; the large questionnaire/assessment
+# columns only when named in ?fields=.
+HEAVY_COLUMNS = ('psy_questions', 'case_study_questions', 'gd_data', 'mbti_data')
+PROFILE_PROJECTION = Projection(
+    [('t_employee_data', 'e'), ('profiles', 'p')],
+    exclude=('password', 'achievements', 'certificates', 'leave_requests', 'termination_request'),
+    optional=HEAVY_COLUMNS,
+    json_columns=('skills', 'education'),
+)
+JOBS_PROJECTION = Projection([('t_jobs', 'j')], optional=HEAVY_COLUMNS)
+
+PROFILE_ROW_QUERY = """
+    SELECT {columns}
+    FROM t_employee_data e
+    LEFT JOIN profiles p ON e.employee_id = p.employee_id
+    WHERE e.employee_id = %s
+"""
+COMPANY_JOBS_QUERY = "SELECT {columns} FROM t_jobs j WHERE j.comp_id = (SELECT comp_id FROM t_company)"
+
+def fetch_profile_row(cursor, company_name, employee_id, fields=None):
+    columns = PROFILE_PROJECTION.select_list(cursor, company_name, fields)
+    cursor.execute(PROFILE_ROW_QUERY.format(columns=columns), (employee_id,))
+    return cursor.fetchone()
+
 @app.route('/api/profile/<string:company_name>/<string:employee_id>', methods=['GET'])
 def get_profile(company_name, employee_id):
+    fields = parse_fields(request.args.get('fields'))
+    cache_key = (company_name, str(employee_id))
+    profile = profile_cache.get(cache_key)
+
+    if profile is None or (fields and not set(fields) <= profile.keys()):
+        token = profile_cache.token(cache_key)
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor(dictionary=True)
+
+        try:
+            # Only the default projection is cached; heavy columns asked for
+            # by name are read straight from the database.
+            wants_optional = bool(fields) and not PROFILE_PROJECTION.optional.isdisjoint(fields)
+            profile = fetch_profile_row(cursor, company_name, employee_id, fields if wants_optional else None)
+            if not profile:
+                return jsonify({'error': 'Profile not found'}), 404
+            if not wants_optional:
+                profile_cache.set(cache_key, profile, token)
+        except ProjectionError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+
+    if fields:
+        unknown = [f for f in fields if f not in profile]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        profile = {f: profile[f] for f in fields}
+    return Response(dumps_row(profile, PROFILE_PROJECTION.json_columns), mimetype='application/json'), 200
+
+@app.route('/api/profile/<string:company_name>/<string:employee_id>', methods=['PUT'])
+def update_profile(company_name, employee_id):
+    try:
+        values = profile_values(request.json, PROFILE_FORM_FIELDS, dumps=app.json.dumps)
+    except ProfileWriteError as e:
+        return jsonify({'error': str(e)}), 400
+    return write_profile(company_name, employee_id, values, 'Profile updated successfully')
+
+@app.route('/api/profile/<string:company_name>/<string:employee_id>', methods=['PATCH'])
+def patch_profile(company_name, employee_id):
+    # Writes only the fields present in the body, e.g. {"department": "R&D"}
+    try:
+        values = profile_values(request.json, partial=True, dumps=app.json.dumps)
+    except ProfileWriteError as e:
+        return jsonify({'error': str(e)}), 400
+    return write_profile(company_name, employee_id, values, 'Profile updated successfully')
+
+def write_profile(company_name, employee_id, values, message, **extra):
     conn = get_db_connection(company_name)
-    cursor = conn.cursor(dictionary=True)
-    
+    cursor = conn.cursor()
     try:
-        cursor.execute("""
-            SELECT e.*, p.* 
-            FROM t_employee_data e 
-            LEFT JOIN profiles p ON e.employee_id = p.employee_id 
-            WHERE e.employee_id = %s
-        """, (employee_id,))
-        
-        profile = cursor.fetchone()
-        if profile:
-            # Convert JSON strings to Python objects
-            if profile.get('skills'):
-                profile['skills'] = json.loads(profile['skills'])
-            if profile.get('education'):
-                profile['education'] = json.loads(profile['education'])
-            return jsonify(profile), 200
-        else:
-            return jsonify({'error': 'Profile not found'}), 404
-        
+        # Inserts the profiles row or updates it in one statement
+        upsert_profile(cursor, company_name, employee_id, values)
+        conn.commit()
+        profile_changed(company_name, employee_id)
+        return jsonify({'message': message, **extra}), 200
     except Exception as e:
+        conn.rollback()
         return jsonify({'error': str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/api/profile/<string:company_name>/<string:employee_id>', methods=['PUT'])
-def update_profile(company_name, employee_id):
-    data = request.json
-    
+@app.route('/api/company-jobs/<string:company_name>', methods=['GET'])
+def get_company_jobs(company_name):
     conn = get_db_connection(company_name)
     cursor = conn.cursor(dictionary=True)
     
     try:
-        # Check if the row exists
-        cursor.execute("SELECT * FROM profiles WHERE employee_id = %s", (employee_id,))
-        existing_profile = cursor.fetchone()
-        
-        if existing_profile:
-            # Update existing row
-            cursor.execute("""
-                UPDATE profiles 
-                SET mobile_number = %s, department = %s, project_summary = %s, work_experience = %s
-                WHERE employee_id = %s
-            """, (data.get('mobileNumber'), data.get('department'), 
-                  data.get('projectSummary'), data.get('workExperience'), employee_id))
-        else:
-            # Insert new row
-            cursor.execute("""
-                INSERT INTO profiles (employee_id, mobile_number, department, project_summary, work_experience)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (employee_id, data.get('mobileNumber'), data.get('department'), 
-                  data.get('projectSummary'), data.get('workExperience')))
-        
-        conn.commit()
-        return jsonify({'message': 'Profile updated successfully'}), 200
-        
+        columns = JOBS_PROJECTION.select_list(cursor, company_name, parse_fields(request.args.get('fields')))
+        cursor.execute(COMPANY_JOBS_QUERY.format(columns=columns))
+        jobs = cursor.fetchall()
+        return Response(dumps_rows(jobs), mimetype='application/json'), 200
+    except ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/api/company-jobs/<string:company_name>', methods=['GET'])
-def get_company_jobs(company_name):
+job_indexes = JobIndexRegistry(ttl=float(os.environ.get('JOB_INDEX_TTL', 60)))
+
+@app.route('/api/company-jobs/<string:company_name>/search', methods=['GET'])
+def search_company_jobs(company_name):
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    filters = {name: request.args.get(name) for name in JOB_SEARCH_FILTERS}
+
     conn = get_db_connection(company_name)
     cursor = conn.cursor(dictionary=True)
-    
+
+    def load_signature():
+        cursor.execute("""
+            SELECT COUNT(*) AS job_count, MAX(job_id) AS max_job_id
+            FROM t_jobs WHERE comp_id = (SELECT comp_id FROM t_company)
+        """)
+        row = cursor.fetchone()
+        return (row['job_count'], row['max_job_id'])
+
+    def load_rows():
+        columns = JOBS_PROJECTION.select_list(cursor, company_name)
+        cursor.execute(COMPANY_JOBS_QUERY.format(columns=columns))
+        return cursor.fetchall()
+
     try:
-        cursor.execute("SELECT * FROM t_jobs WHERE comp_id = (SELECT comp_id FROM t_company)")
-        jobs = cursor.fetchall()
-        return jsonify(jobs), 200
+        index = job_indexes.get(company_name, load_rows, load_signature)
+        jobs, next_cursor = index.search(
+            query=request.args.get('q', ''),
+            filters=filters,
+            cursor=parse_cursor(request.args.get('cursor')),
+            limit=limit,
+            fields=fields,
+        )
+        return jsonify({'jobs': jobs, 'next_cursor': next_cursor}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -168,17 +558,20 @@ def get_company_jobs(company_name):
 
 @app.route('/api/candidate-applications/<string:company_name>/<string:employee_id>', methods=['GET'])
 def get_candidate_applications(company_name, employee_id):
+    identity = g.identity
     conn = get_db_connection(company_name)
     cursor = conn.cursor(dictionary=True)
     
     try:
-        # First, get the employee's email
-        cursor.execute("SELECT email FROM t_employee_data WHERE employee_id = %s", (employee_id,))
-        employee = cursor.fetchone()
-        if not employee:
-            return jsonify({'error': 'Employee not found'}), 404
-        
-        employee_email = employee['email']
+        if identity:
+            employee_email = identity.email
+        else:
+            # No session token: look the employee's email up
+            cursor.execute("SELECT email FROM t_employee_data WHERE employee_id = %s", (employee_id,))
+            employee = cursor.fetchone()
+            if not employee:
+                return jsonify({'error': 'Employee not found'}), 404
+            employee_email = employee['email']
         
         # Fetch applications from t_applications
         # cursor.execute("""
@@ -190,13 +583,8 @@ def get_candidate_applications(company_name, employee_id):
         # """, (employee_id,))
         # applications = cursor.fetchall()
         
-        # Fetch promoted jobs from t_promote where the employee's email is in candidate_emails
-        cursor.execute("""
-            SELECT p.*, c.comp_name
-            FROM t_promote p
-            JOIN t_company c ON p.comp_id = c.comp_id
-            WHERE JSON_CONTAINS(p.candidate_emails, JSON_OBJECT('email', %s))
-        """, (employee_email,))
+        # Fetch promoted jobs whose candidate_emails include the employee (via t_promote_invites)
+        cursor.execute(CANDIDATE_INVITES_QUERY, (employee_email,))
         promoted_jobs = cursor.fetchall()
         
         # Combine the results
@@ -229,6 +617,65 @@ def get_candidate_applications(company_name, employee_id):
         cursor.close()
         conn.close()
 
+# Bulk invites: the request body is a CSV (text/csv, an 'email' column or one
+# email per line) or NDJSON (application/x-ndjson) stream, read as it arrives
+# and written INVITE_IMPORT_CHUNK_SIZE emails per transaction. Clients that
+# accept application/x-ndjson get a progress line after every chunk.
+INVITE_IMPORT_CHUNK_SIZE = int(os.environ.get('INVITE_IMPORT_CHUNK_SIZE', 1000))
+
+@app.route('/api/promote-invites/<string:company_name>/<int:job_id>', methods=['POST'])
+def bulk_invite(company_name, job_id):
+    fmt = request.args.get('format') or ('ndjson' if 'json' in (request.mimetype or '') else 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    try:
+        chunk_size = min(max(int(request.args.get('chunk_size', INVITE_IMPORT_CHUNK_SIZE)), 1), 10000)
+    except ValueError:
+        return jsonify({'error': 'chunk_size must be an integer'}), 400
+
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor(dictionary=True)
+    progress = import_invites(conn, cursor, job_id, request.stream, fmt, chunk_size)
+    try:
+        first = next(progress)
+    except InviteImportError as e:
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 500
+
+    if 'application/x-ndjson' not in request.headers.get('Accept', ''):
+        try:
+            result = first
+            for result in progress:
+                pass
+            return jsonify(result), 200
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            progress.close()
+            cursor.close()
+            conn.close()
+
+    def stream():
+        try:
+            yield app.json.dumps(first) + '\n'
+            for update in progress:
+                yield app.json.dumps(update) + '\n'
+        except Exception as e:
+            yield app.json.dumps({'error': str(e)}) + '\n'
+        finally:
+            # Closing the import first re-enables the invite triggers on
+            # this connection even when the client went away mid-stream.
+            progress.close()
+            cursor.close()
+            conn.close()
+
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+
 @app.route('/api/upload-resume/<string:company_name>/<string:employee_id>', methods=['POST'])
 def upload_resume(company_name, employee_id):
     if 'resume' not in request.files:
@@ -238,26 +685,29 @@ def upload_resume(company_name, employee_id):
         return jsonify({'error': 'No selected file'}), 400
     if file and allowed_file(file.filename):
         filename = secure_filename(f"{employee_id}_{file.filename}")
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        tenant_directory.resolve(company_name)  # reject unknown companies before storing
+        digest = blob_store.put(file.stream)
         
         conn = get_db_connection(company_name)
         cursor = conn.cursor()
         try:
-            # Check if the row exists
-            cursor.execute("SELECT * FROM profiles WHERE employee_id = %s", (employee_id,))
+            # The previous file has to be released after the swap, so read it
+            # under a row lock and write the new one with the shared upsert.
+            cursor.execute("SELECT resume_path, resume_blob FROM profiles WHERE employee_id = %s FOR UPDATE",
+                           (employee_id,))
             existing_profile = cursor.fetchone()
-            
-            if existing_profile:
-                # Update existing row
-                cursor.execute("UPDATE profiles SET resume_path = %s WHERE employee_id = %s", (filename, employee_id))
-            else:
-                # Insert new row
-                cursor.execute("INSERT INTO profiles (employee_id, resume_path) VALUES (%s, %s)", (employee_id, filename))
-            
+            upsert_profile(cursor, company_name, employee_id, {'resume_path': filename, 'resume_blob': digest})
             conn.commit()
+            if existing_profile and existing_profile[1] != digest:
+                release_stored_file(*existing_profile)
+            elif existing_profile:
+                # Same content re-uploaded: keep a single reference
+                blob_store.release(digest)
+            profile_changed(company_name, employee_id)
             return jsonify({'message': 'Resume uploaded successfully', 'filename': filename}), 200
         except Exception as e:
+            conn.rollback()
+            blob_store.release(digest)
             return jsonify({'error': str(e)}), 500
         finally:
             cursor.close()
@@ -269,14 +719,14 @@ def delete_resume(company_name, employee_id):
     conn = get_db_connection(company_name)
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT resume_path FROM profiles WHERE employee_id = %s", (employee_id,))
+        cursor.execute("SELECT resume_path, resume_blob FROM profiles WHERE employee_id = %s", (employee_id,))
         result = cursor.fetchone()
         if result and result[0]:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], result[0])
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            cursor.execute("UPDATE profiles SET resume_path = NULL WHERE employee_id = %s", (employee_id,))
+            cursor.execute("UPDATE profiles SET resume_path = NULL, resume_blob = NULL WHERE employee_id = %s", (employee_id,))
             conn.commit()
+            # Only unlinks the file once no other row references the same content
+            release_stored_file(*result)
+            profile_changed(company_name, employee_id)
             return jsonify({'message': 'Resume deleted successfully'}), 200
         return jsonify({'message': 'No resume found'}), 404
     except Exception as e:
@@ -288,67 +738,26 @@ def delete_resume(company_name, employee_id):
 @app.route('/api/profile/<string:company_name>/<string:employee_id>/education', methods=['PUT'])
 def update_education(company_name, employee_id):
     data = request.json
-    conn = get_db_connection(company_name)
-    cursor = conn.cursor()
-    try:
-        education_json = json.dumps(data)
-        
-        # Check if the row exists
-        cursor.execute("SELECT * FROM profiles WHERE employee_id = %s", (employee_id,))
-        existing_profile = cursor.fetchone()
-        
-        if existing_profile:
-            # Update existing row
-            cursor.execute("UPDATE profiles SET education = %s WHERE employee_id = %s", (education_json, employee_id))
-        else:
-            # Insert new row
-            cursor.execute("INSERT INTO profiles (employee_id, education) VALUES (%s, %s)", (employee_id, education_json))
-        
-        conn.commit()
-        return jsonify({'message': 'Education updated successfully', 'education': data}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    return write_profile(company_name, employee_id, {'education': app.json.dumps(data)},
+                         'Education updated successfully', education=data)
 
 @app.route('/api/profile/<string:company_name>/<string:employee_id>/skills', methods=['PUT'])
 def update_skills(company_name, employee_id):
     data = request.json
-    conn = get_db_connection(company_name)
-    cursor = conn.cursor()
-    try:
-        skills_json = json.dumps(data['skills'])
-        
-        # Check if the row exists
-        cursor.execute("SELECT * FROM profiles WHERE employee_id = %s", (employee_id,))
-        existing_profile = cursor.fetchone()
-        
-        if existing_profile:
-            # Update existing row
-            cursor.execute("UPDATE profiles SET skills = %s WHERE employee_id = %s", (skills_json, employee_id))
-        else:
-            # Insert new row
-            cursor.execute("INSERT INTO profiles (employee_id, skills) VALUES (%s, %s)", (employee_id, skills_json))
-        
-        conn.commit()
-        return jsonify({'message': 'Skills updated successfully', 'skills': data['skills']}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    if not data or 'skills' not in data:
+        return jsonify({'error': 'skills is required'}), 400
+    return write_profile(company_name, employee_id, {'skills': app.json.dumps(data['skills'])},
+                         'Skills updated successfully', skills=data['skills'])
 
 @app.route('/api/view-resume/<string:company_name>/<string:employee_id>', methods=['GET'])
 def view_resume(company_name, employee_id):
     conn = get_db_connection(company_name)
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT resume_path FROM profiles WHERE employee_id = %s", (employee_id,))
+        cursor.execute("SELECT resume_path, resume_blob FROM profiles WHERE employee_id = %s", (employee_id,))
         result = cursor.fetchone()
         if result and result['resume_path']:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], result['resume_path'])
-            return send_file(file_path, as_attachment=True)
+            return send_stored_file(result['resume_path'], result['resume_blob'], as_attachment=True)
         return jsonify({'error': 'Resume not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -356,68 +765,192 @@ def view_resume(company_name, employee_id):
         cursor.close()
         conn.close()
 
+def merge_notifications(job_notifications, profile_notifications):
+    # Combine and sort all notifications
+    all_notifications = job_notifications + profile_notifications
+    all_notifications = [n for n in all_notifications if n['type'] is not None]
+    all_notifications.sort(key=lambda x: x['timestamp'], reverse=True)
+    return all_notifications
+
+def fetch_notifications(cursor, employee_id, email=None):
+    # Fetch job application notifications; a known email saves the
+    # t_employee_data lookup
+    if email:
+        cursor.execute(RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY, (email,))
+    else:
+        cursor.execute(RECENT_INVITE_NOTIFICATIONS_QUERY, (employee_id,))
+    job_notifications = cursor.fetchall()
+
+    # Profile completion reminder, from the stored completion mask
+    cursor.execute(PROFILE_COMPLETION_QUERY, (employee_id,))
+    profile_notifications = completion_notifications(cursor.fetchall())
+
+    return merge_notifications(job_notifications, profile_notifications)
+
+def cache_notifications(cache_key, notifications):
+    # The ETag covers what identifies each notification, not the body:
+    # completion reminders are stamped with the time they were built, so a
+    # rebuild after the TTL would otherwise change it with nothing new.
+    body = app.json.dumps(notifications)
+    identity = repr([notification_key(n) for n in notifications])
+    cached = (hashlib.sha1(identity.encode()).hexdigest(), body)
+    notification_cache.set(cache_key, cached)
+    return cached
+
 @app.route('/api/notifications/<string:company_name>/<string:employee_id>', methods=['GET'])
 def get_notifications(company_name, employee_id):
+    identity = g.identity
+    cache_key = (company_name, str(employee_id))
+    cached = notification_cache.get(cache_key)
+    if cached is None:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cached = cache_notifications(cache_key, fetch_notifications(
+                cursor, employee_id, identity.email if identity else None))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+
+    etag, body = cached
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # no-cache makes browsers revalidate with If-None-Match on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+notification_hub = NotificationHub(
+    get_db_connection,
+    fetch_notifications,
+    interval=float(os.environ.get('NOTIFICATION_POLL_INTERVAL', 15)),
+)
+
+# Under a threaded WSGI server every open stream holds a worker thread for as
+# long as the tab stays open. Past NOTIFICATION_STREAMS_PER_WORKER streams the
+# route answers 503 and clients fall back to polling, so the remaining threads
+# stay free for ordinary requests. asgi.py serves streams without a thread.
+notification_stream_slots = threading.BoundedSemaphore(int(os.environ.get('NOTIFICATION_STREAMS_PER_WORKER', 2)))
+
+@app.route('/api/notifications/<string:company_name>/<string:employee_id>/stream', methods=['GET'])
+def stream_notifications(company_name, employee_id):
+    # Unknown companies get their 404 here rather than a watcher thread
+    tenant_directory.resolve(company_name)
+    if not notification_stream_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open notification streams, poll instead'})
+        response.headers['Retry-After'] = str(int(notification_hub.interval))
+        return response, 503
+    subscription = notification_hub.subscribe(company_name, employee_id)
+    response = Response(
+        stream_with_context(notification_hub.stream(subscription, app.json.dumps)),
+        mimetype='text/event-stream',
+    )
+    response.call_on_close(notification_stream_slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Sections the dashboard endpoint can return; pages pass ?fields= with the
+# ones they render. profile, completion and leave_balance come from the same
+# employee/profile row, so any mix of them costs a single query.
+DASHBOARD_FIELDS = ('profile', 'completion', 'notifications', 'leave_balance', 'invite_count')
+INVITE_COUNT_QUERY = "SELECT COUNT(*) AS invites FROM t_promote_invites WHERE email = %s"
+
+def dashboard_sections(row, fields):
+    # The sections built from the profile row alone
+    dashboard = {}
+    if 'profile' in fields:
+        profile = dict(row)
+        if profile.get('skills'):
+            profile['skills'] = app.json.loads(profile['skills'])
+        if profile.get('education'):
+            profile['education'] = app.json.loads(profile['education'])
+        dashboard['profile'] = profile
+    if 'completion' in fields:
+        dashboard['completion'] = completion(row.get('completion_mask') or 0)
+    if 'leave_balance' in fields:
+        dashboard['leave_balance'] = app.json.loads(row['leave_balance']) if row.get('leave_balance') else {}
+    return dashboard
+
+@app.route('/api/dashboard/<string:company_name>/<string:employee_id>', methods=['GET'])
+def get_dashboard(company_name, employee_id):
+    fields = parse_fields(request.args.get('fields')) or DASHBOARD_FIELDS
+    unknown = [f for f in fields if f not in DASHBOARD_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
     conn = get_db_connection(company_name)
     cursor = conn.cursor(dictionary=True)
-    
+
     try:
-        # Fetch job application notifications
-        cursor.execute("""
-            SELECT 'job_application' as type, 'New Job Application' as title,
-                   CONCAT('You have been invited to apply for the position of ', job_title) as message,
-                   created_at as timestamp
-            FROM t_promote
-            WHERE JSON_CONTAINS(candidate_emails, JSON_OBJECT('email', (SELECT email FROM t_employee_data WHERE employee_id = %s)))
-            AND created_at > DATE_SUB(NOW(), INTERVAL 30 DAY)
-        """, (employee_id,))
-        job_notifications = cursor.fetchall()
+        # Same row and cache entry as get_profile
+        cache_key = (company_name, str(employee_id))
+        row = profile_cache.get(cache_key)
+        if row is None:
+            token = profile_cache.token(cache_key)
+            row = fetch_profile_row(cursor, company_name, employee_id)
+            if not row:
+                return jsonify({'error': 'Profile not found'}), 404
+            profile_cache.set(cache_key, row, token)
 
-        # Fetch profile completion notifications
-        cursor.execute("""
-            SELECT 
-                CASE 
-                    WHEN mobile_number IS NULL THEN 'profile_completion'
-                    WHEN department IS NULL THEN 'profile_completion'
-                    WHEN project_summary IS NULL THEN 'profile_completion'
-                    WHEN work_experience IS NULL THEN 'profile_completion'
-                    WHEN skills IS NULL OR JSON_LENGTH(skills) = 0 THEN 'skills_update'
-                    WHEN education IS NULL OR JSON_LENGTH(education) = 0 THEN 'education_update'
-                    WHEN resume_path IS NULL THEN 'resume_upload'
-                    ELSE NULL
-                END as type,
-                CASE 
-                    WHEN mobile_number IS NULL THEN 'Complete Your Profile'
-                    WHEN department IS NULL THEN 'Complete Your Profile'
-                    WHEN project_summary IS NULL THEN 'Complete Your Profile'
-                    WHEN work_experience IS NULL THEN 'Complete Your Profile'
-                    WHEN skills IS NULL OR JSON_LENGTH(skills) = 0 THEN 'Update Your Skills'
-                    WHEN education IS NULL OR JSON_LENGTH(education) = 0 THEN 'Update Your Education'
-                    WHEN resume_path IS NULL THEN 'Upload Your Resume'
-                    ELSE NULL
-                END as title,
-                CASE 
-                    WHEN mobile_number IS NULL THEN 'Please add your mobile number to complete your profile.'
-                    WHEN department IS NULL THEN 'Please add your department to complete your profile.'
-                    WHEN project_summary IS NULL THEN 'Please add a project summary to complete your profile.'
-                    WHEN work_experience IS NULL THEN 'Please add your work experience to complete your profile.'
-                    WHEN skills IS NULL OR JSON_LENGTH(skills) = 0 THEN 'Add your key skills to improve your job matches.'
-                    WHEN education IS NULL OR JSON_LENGTH(education) = 0 THEN 'Add your education details to complete your profile.'
-                    WHEN resume_path IS NULL THEN 'Upload your resume to apply for jobs more easily.'
-                    ELSE NULL
-                END as message,
-                NOW() as timestamp
-            FROM profiles
-            WHERE employee_id = %s
-        """, (employee_id,))
-        profile_notifications = cursor.fetchall()
+        dashboard = dashboard_sections(row, fields)
+        if 'invite_count' in fields:
+            cursor.execute(INVITE_COUNT_QUERY, (row['email'],))
+            dashboard['invite_count'] = cursor.fetchone()['invites']
+        if 'notifications' in fields:
+            # Shares the feed cache with /api/notifications, so the header and
+            # the dashboard do not each rebuild it.
+            cached = notification_cache.get(cache_key)
+            if cached is None:
+                cached = cache_notifications(cache_key, fetch_notifications(cursor, employee_id, row['email']))
+            dashboard['notifications'] = app.json.loads(cached[1])
 
-        # Combine and sort all notifications
-        all_notifications = job_notifications + profile_notifications
-        all_notifications = [n for n in all_notifications if n['type'] is not None]
-        all_notifications.sort(key=lambda x: x['timestamp'], reverse=True)
+        return jsonify(dashboard), 200
 
-        return jsonify(all_notifications), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/profile/<string:company_name>/<string:employee_id>/completion', methods=['GET'])
+def get_profile_completion(company_name, employee_id):
+    # Served from the cached profile row when there is one, otherwise a
+    # single-column primary lookup.
+    row = profile_cache.get((company_name, str(employee_id)))
+    if row is None or 'completion_mask' not in row:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(PROFILE_COMPLETION_QUERY, (employee_id,))
+            row = cursor.fetchone()
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+        if not row:
+            return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(completion(row['completion_mask'] or 0)), 200
+
+@app.route('/api/reports/<string:company_name>/incomplete-profiles', methods=['GET'])
+def get_incomplete_profiles(company_name):
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        profiles, next_cursor = incomplete_profiles(cursor, request.args.get('cursor'), limit)
+        return jsonify({
+            'summary': incomplete_summary(cursor),
+            'profiles': profiles,
+            'next_cursor': next_cursor,
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -430,22 +963,30 @@ def get_achievements(company_name, employee_id):
     cursor = conn.cursor(dictionary=True)
     
     try:
+        cursor.execute("SELECT 1 FROM profiles WHERE employee_id = %s", (employee_id,))
+        if not cursor.fetchone():
+            return jsonify({'error': 'Profile not found'}), 404
+        
         cursor.execute("""
-            SELECT achievements, certificates
-            FROM profiles
+            SELECT id, title, description, date, quarter
+            FROM t_achievements
             WHERE employee_id = %s
+            ORDER BY id
         """, (employee_id,))
+        achievements = [achievement_to_dict(row) for row in cursor.fetchall()]
         
-        result = cursor.fetchone()
-        if result:
-            achievements = json.loads(result['achievements']) if result['achievements'] else []
-            certificates = json.loads(result['certificates']) if result['certificates'] else []
-            return jsonify({
-                'achievements': achievements,
-                'certificates': certificates
-            }), 200
-        else:
-            return jsonify({'error': 'Profile not found'}), 404
+        cursor.execute("""
+            SELECT id, filename, upload_date
+            FROM t_certificates
+            WHERE employee_id = %s
+            ORDER BY id
+        """, (employee_id,))
+        certificates = [certificate_to_dict(row) for row in cursor.fetchall()]
+        
+        return jsonify({
+            'achievements': achievements,
+            'certificates': certificates
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -460,30 +1001,19 @@ def add_achievement(company_name, employee_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT achievements FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            current_achievements = json.loads(result[0]) if result[0] else []
-        else:
-            current_achievements = []
+        cursor.execute("""
+            INSERT INTO t_achievements (employee_id, title, description, date, quarter)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (employee_id, data['title'], data['description'], data['date'], data['quarter']))
         
         new_achievement = {
-            'id': len(current_achievements) + 1,
+            'id': cursor.lastrowid,
             'title': data['title'],
             'description': data['description'],
             'date': data['date'],
             'quarter': data['quarter']
         }
         
-        current_achievements.append(new_achievement)
-        
-        cursor.execute("""
-            UPDATE profiles
-            SET achievements = %s
-            WHERE employee_id = %s
-        """, (json.dumps(current_achievements), employee_id))
-        
         conn.commit()
         return jsonify({'message': 'Achievement added successfully', 'achievement': new_achievement}), 200
     except Exception as e:
@@ -500,35 +1030,28 @@ def update_achievement(company_name, employee_id, achievement_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT achievements FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            current_achievements = json.loads(result[0]) if result[0] else []
-        else:
-            return jsonify({'error': 'Profile not found'}), 404
+        cursor.execute("""
+            UPDATE t_achievements
+            SET title = %s, description = %s, date = %s, quarter = %s
+            WHERE id = %s AND employee_id = %s
+        """, (data['title'], data['description'], data['date'], data['quarter'],
+              achievement_id, employee_id))
         
-        achievement_index = next((index for (index, d) in enumerate(current_achievements) if d["id"] == achievement_id), None)
+        if cursor.rowcount == 0:
+            # rowcount is 0 both for a missing row and for an unchanged one
+            cursor.execute("SELECT 1 FROM t_achievements WHERE id = %s AND employee_id = %s",
+                           (achievement_id, employee_id))
+            if not cursor.fetchone():
+                return jsonify({'error': 'Achievement not found'}), 404
         
-        if achievement_index is not None:
-            current_achievements[achievement_index] = {
-                'id': achievement_id,
-                'title': data['title'],
-                'description': data['description'],
-                'date': data['date'],
-                'quarter': data['quarter']
-            }
-            
-            cursor.execute("""
-                UPDATE profiles
-                SET achievements = %s
-                WHERE employee_id = %s
-            """, (json.dumps(current_achievements), employee_id))
-            
-            conn.commit()
-            return jsonify({'message': 'Achievement updated successfully', 'achievement': current_achievements[achievement_index]}), 200
-        else:
-            return jsonify({'error': 'Achievement not found'}), 404
+        conn.commit()
+        return jsonify({'message': 'Achievement updated successfully', 'achievement': {
+            'id': achievement_id,
+            'title': data['title'],
+            'description': data['description'],
+            'date': data['date'],
+            'quarter': data['quarter']
+        }}), 200
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
@@ -542,21 +1065,8 @@ def delete_achievement(company_name, employee_id, achievement_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT achievements FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            current_achievements = json.loads(result[0]) if result[0] else []
-        else:
-            return jsonify({'error': 'Profile not found'}), 404
-        
-        current_achievements = [ach for ach in current_achievements if ach['id'] != achievement_id]
-        
-        cursor.execute("""
-            UPDATE profiles
-            SET achievements = %s
-            WHERE employee_id = %s
-        """, (json.dumps(current_achievements), employee_id))
+        cursor.execute("DELETE FROM t_achievements WHERE id = %s AND employee_id = %s",
+                       (achievement_id, employee_id))
         
         conn.commit()
         return jsonify({'message': 'Achievement deleted successfully'}), 200
@@ -576,38 +1086,29 @@ def upload_certificate(company_name, employee_id):
         return jsonify({'error': 'No selected file'}), 400
     if file and allowed_file(file.filename):
         filename = secure_filename(f"{employee_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        tenant_directory.resolve(company_name)  # reject unknown companies before storing
+        digest = blob_store.put(file.stream)
         
         conn = get_db_connection(company_name)
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT certificates FROM profiles WHERE employee_id = %s", (employee_id,))
-            result = cursor.fetchone()
-            
-            if result:
-                current_certificates = json.loads(result[0]) if result[0] else []
-            else:
-                current_certificates = []
+            upload_date = datetime.now()
+            cursor.execute("""
+                INSERT INTO t_certificates (employee_id, filename, upload_date, blob_sha256)
+                VALUES (%s, %s, %s, %s)
+            """, (employee_id, filename, upload_date, digest))
             
             new_certificate = {
-                'id': len(current_certificates) + 1,
+                'id': cursor.lastrowid,
                 'filename': filename,
-                'upload_date': datetime.now().isoformat()
+                'upload_date': upload_date.isoformat()
             }
             
-            current_certificates.append(new_certificate)
-            
-            cursor.execute("""
-                UPDATE profiles
-                SET certificates = %s
-                WHERE employee_id = %s
-            """, (json.dumps(current_certificates), employee_id))
-            
             conn.commit()
             return jsonify({'message': 'Certificate uploaded successfully', 'certificate': new_certificate}), 200
         except Exception as e:
             conn.rollback()
+            blob_store.release(digest)
             return jsonify({'error': str(e)}), 500
         finally:
             cursor.close()
@@ -620,30 +1121,15 @@ def delete_certificate(company_name, employee_id, certificate_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT certificates FROM profiles WHERE employee_id = %s", (employee_id,))
+        cursor.execute("SELECT filename, blob_sha256 FROM t_certificates WHERE id = %s AND employee_id = %s",
+                       (certificate_id, employee_id))
         result = cursor.fetchone()
         
         if result:
-            current_certificates = json.loads(result[0]) if result[0] else []
-        else:
-            return jsonify({'error': 'Profile not found'}), 404
-        
-        certificate_to_delete = next((cert for cert in current_certificates if cert['id'] == certificate_id), None)
-        
-        if certificate_to_delete:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], certificate_to_delete['filename'])
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            
-            current_certificates = [cert for cert in current_certificates if cert['id'] != certificate_id]
-            
-            cursor.execute("""
-                UPDATE profiles
-                SET certificates = %s
-                WHERE employee_id = %s
-            """, (json.dumps(current_certificates), employee_id))
+            cursor.execute("DELETE FROM t_certificates WHERE id = %s", (certificate_id,))
             
             conn.commit()
+            release_stored_file(*result)
             return jsonify({'message': 'Certificate deleted successfully'}), 200
         else:
             return jsonify({'error': 'Certificate not found'}), 404
@@ -660,23 +1146,18 @@ def view_certificate(company_name, employee_id, certificate_id):
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT certificates FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cursor.fetchone()
+        cursor.execute("SELECT filename, blob_sha256 FROM t_certificates WHERE id = %s AND employee_id = %s",
+                       (certificate_id, employee_id))
+        certificate = cursor.fetchone()
         
-        if result:
-            certificates = json.loads(result['certificates']) if result['certificates'] else []
-            certificate = next((cert for cert in certificates if cert['id'] == certificate_id), None)
-            
-            if certificate:
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], certificate['filename'])
-                if os.path.exists(file_path):
-                    return send_file(file_path)
-                else:
-                    return jsonify({'error': 'Certificate file not found'}), 404
+        if certificate:
+            file_path = stored_file_path(certificate['filename'], certificate['blob_sha256'])
+            if os.path.exists(file_path):
+                return send_stored_file(certificate['filename'], certificate['blob_sha256'])
             else:
-                return jsonify({'error': 'Certificate not found'}), 404
+                return jsonify({'error': 'Certificate file not found'}), 404
         else:
-            return jsonify({'error': 'Profile not found'}), 404
+            return jsonify({'error': 'Certificate not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -685,69 +1166,37 @@ def view_certificate(company_name, employee_id, certificate_id):
 
 @app.route('/api/leave-requests/<company_name>/<employee_id>', methods=['GET', 'POST'])
 def leave_requests(company_name, employee_id):
-    conn = get_db_connection(company_name)
-    cur = conn.cursor()
-
-    if request.method == 'GET':
-        cur.execute("SELECT leave_requests FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cur.fetchone()
-        
-        if result:
-            leave_requests = json.loads(result[0]) if result[0] else []
-            return jsonify(leave_requests)
-        else:
-            return jsonify([])
-
-    elif request.method == 'POST':
+    if request.method == 'POST':
         data = request.json
-        start_date = datetime.strptime(data['startDate'], '%Y-%m-%d')
-        end_date = datetime.strptime(data['endDate'], '%Y-%m-%d')
-        leave_type = data['leaveType']
-        reason = data['reason']
+        try:
+            start_date = datetime.strptime(data['startDate'], '%Y-%m-%d')
+            end_date = datetime.strptime(data['endDate'], '%Y-%m-%d')
+            leave_type = data['leaveType']
+            reason = data['reason']
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "startDate, endDate (YYYY-MM-DD), leaveType and reason are required"}), 400
 
-        # Get current leave balance
-        cur.execute("SELECT leave_balance FROM t_employee_data WHERE employee_id = %s", (employee_id,))
-        leave_balance_result = cur.fetchone()
-        if not leave_balance_result:
-            return jsonify({"error": "Employee not found"}), 404
-        leave_balance = json.loads(leave_balance_result[0])
-
-        # Calculate number of days
-        num_days = (end_date - start_date).days + 1
-
-        # Check if enough leave balance is available
-        if leave_balance[leave_type]['remaining'] < num_days:
-            return jsonify({"error": "Insufficient leave balance"}), 400
-
-        # Update leave balance
-        leave_balance[leave_type]['used'] += num_days
-        leave_balance[leave_type]['remaining'] -= num_days
-
-        # Update t_employee_data
-        cur.execute("UPDATE t_employee_data SET leave_balance = %s WHERE employee_id = %s",
-                    (json.dumps(leave_balance), employee_id))
-
-        # Get current leave requests
-        cur.execute("SELECT leave_requests FROM profiles WHERE employee_id = %s", (employee_id,))
-        current_requests_result = cur.fetchone()
-        current_requests = json.loads(current_requests_result[0]) if current_requests_result and current_requests_result[0] else []
-
-        # Add new leave request
-        new_request = {
-            "startDate": data['startDate'],
-            "endDate": data['endDate'],
-            "leaveType": leave_type,
-            "reason": reason,
-            "status": "Pending",
-            "requestDate": datetime.now().isoformat()
-        }
-        current_requests.append(new_request)
+    conn = get_db_connection(company_name)
+    cur = conn.cursor(dictionary=True)
+    try:
+        if request.method == 'GET':
+            cur.execute("""
+                SELECT start_date, end_date, leave_type, reason, status, request_date
+                FROM t_leave_requests
+                WHERE employee_id = %s
+                ORDER BY id
+            """, (employee_id,))
+            return jsonify([leave_request_to_dict(row) for row in cur.fetchall()])
 
-        # Update profiles table
-        cur.execute("UPDATE profiles SET leave_requests = %s WHERE employee_id = %s",
-                    (json.dumps(current_requests), employee_id))
+        # Debit the balance and record the request atomically
+        try:
+            book_leave(conn, cur, employee_id, leave_type, start_date.date(), end_date.date(),
+                       reason, datetime.now())
+        except LeaveBookingError as e:
+            return jsonify({"error": str(e)}), e.status
 
-        conn.commit()
+        # leave_balance is part of the cached profile row
+        profile_changed(company_name, employee_id)
 
         # Send email to manager
         # cur.execute("SELECT manager_id FROM t_employee_data WHERE employee_id = %s", (employee_id,))
@@ -757,31 +1206,34 @@ def leave_requests(company_name, employee_id):
         cur.execute("SELECT manager_email FROM t_employee_data WHERE employee_id = %s", (employee_id,))
         manager_email_result = cur.fetchone()
         if manager_email_result:
-            manager_email = manager_email_result[0]
-            msg = Message("New Leave Request",
-                            sender="your-email@example.com",
-                            recipients=[manager_email])
-            msg.body = f"Employee {employee_id} has requested {leave_type} leave from {data['startDate']} to {data['endDate']}."
-            mail.send(msg)
+            manager_email = manager_email_result['manager_email']
+            mail_queue.enqueue("New Leave Request",
+                               [manager_email],
+                               f"Employee {employee_id} has requested {leave_type} leave from {data['startDate']} to {data['endDate']}.",
+                               sender="your-email@example.com")
 
+        return jsonify({"message": "Leave request submitted successfully"}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
         cur.close()
         conn.close()
 
-        return jsonify({"message": "Leave request submitted successfully"}), 201
-
 @app.route('/api/leave-balance/<company_name>/<employee_id>', methods=['GET'])
 def get_leave_balance(company_name, employee_id):
     conn = get_db_connection(company_name)
     cur = conn.cursor()
-
-    cur.execute("SELECT leave_balance FROM t_employee_data WHERE employee_id = %s", (employee_id,))
-    result = cur.fetchone()
-
-    cur.close()
-    conn.close()
+    try:
+        cur.execute("SELECT leave_balance FROM t_employee_data WHERE employee_id = %s", (employee_id,))
+        result = cur.fetchone()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
 
     if result:
-        return jsonify(json.loads(result[0]))
+        return jsonify(app.json.loads(result[0]))
     else:
         return jsonify({"error": "Employee not found"}), 404
  
@@ -792,41 +1244,29 @@ def submit_termination_request(company_name, employee_id):
     cursor = conn.cursor()
     
     try:
-        # Check if there's an existing termination request
-        cursor.execute("SELECT termination_request FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cursor.fetchone()
-        
-        if result and result[0]:
+        # employee_id is the primary key, so an existing request makes this fail
+        try:
+            cursor.execute("""
+                INSERT INTO t_termination_requests (employee_id, reason, reason_category, last_working_date,
+                                                    notice_period, handover_notes, status, request_date)
+                VALUES (%s, %s, %s, %s, %s, %s, 'Pending', %s)
+            """, (employee_id, data['reason'], data['reasonCategory'], data['lastWorkingDate'],
+                  data['noticePeriod'], data['handoverNotes'], datetime.now()))
+        except mysql.connector.IntegrityError:
             return jsonify({'error': 'A termination request already exists'}), 400
         
-        termination_request = {
-            'reason': data['reason'],
-            'reason_category': data['reasonCategory'],
-            'last_working_date': data['lastWorkingDate'],
-            'notice_period': data['noticePeriod'],
-            'handover_notes': data['handoverNotes'],
-            'status': 'Pending',
-            'request_date': datetime.now().isoformat()
-        }
-        
-        cursor.execute("""
-            UPDATE profiles
-            SET termination_request = %s
-            WHERE employee_id = %s
-        """, (json.dumps(termination_request), employee_id))
-        
         # Fetch manager's email
         cursor.execute("SELECT manager_email FROM t_employee_data WHERE employee_id = %s", (employee_id,))
         manager_email = cursor.fetchone()[0]
         
-        # Send email to manager
-        msg = Message("New Termination Request",
-                      sender=app.config['MAIL_USERNAME'],
-                      recipients=[manager_email])
-        msg.body = f"Employee {employee_id} has submitted a termination request. Please review it in the management portal."
-        mail.send(msg)
-        
         conn.commit()
+        notification_hub.notify(company_name, employee_id)
+        
+        # Queue email to manager; delivery happens off the request thread
+        mail_queue.enqueue("New Termination Request",
+                           [manager_email],
+                           f"Employee {employee_id} has submitted a termination request. Please review it in the management portal.",
+                           sender=app.config['MAIL_USERNAME'])
         return jsonify({'message': 'Termination request submitted successfully'}), 200
     except Exception as e:
         conn.rollback()
@@ -841,19 +1281,22 @@ def get_termination_request(company_name, employee_id):
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT termination_request FROM profiles WHERE employee_id = %s", (employee_id,))
-        result = cursor.fetchone()
+        cursor.execute("""
+            SELECT status, reason_category, reason, last_working_date, notice_period, request_date
+            FROM t_termination_requests
+            WHERE employee_id = %s
+        """, (employee_id,))
+        termination_data = cursor.fetchone()
         
-        if result and result['termination_request']:
-            termination_data = json.loads(result['termination_request'])
+        if termination_data:
             # Ensure all required fields are present
             return jsonify({
-                'status': termination_data.get('status', 'Pending'),
-                'reason_category': termination_data.get('reason_category', ''),
-                'reason': termination_data.get('reason', ''),
-                'last_working_date': termination_data.get('last_working_date', ''),
-                'notice_period': termination_data.get('notice_period', 'Standard (30 days)'),
-                'request_date': termination_data.get('request_date', '')
+                'status': termination_data['status'] or 'Pending',
+                'reason_category': termination_data['reason_category'] or '',
+                'reason': termination_data['reason'] or '',
+                'last_working_date': termination_data['last_working_date'] or '',
+                'notice_period': termination_data['notice_period'] or 'Standard (30 days)',
+                'request_date': termination_data['request_date'].isoformat()
             }), 200
         else:
             return jsonify({'message': 'No termination request found'}), 404
@@ -863,5 +1306,149 @@ def get_termination_request(company_name, employee_id):
         cursor.close()
         conn.close()
 
+# Manager views: the team is everyone whose manager_email is the manager's
+# email (taken from the session token when there is one).
+def manager_email(cursor, identity, manager_id):
+    if identity:
+        return identity.email
+    cursor.execute("SELECT email FROM t_employee_data WHERE employee_id = %s", (manager_id,))
+    row = cursor.fetchone()
+    return row['email'] if row else None
+
+def page_limit():
+    return min(max(int(request.args.get('limit', 50)), 1), 200)
+
+def review_batch(key):
+    data = request.json or {}
+    action = data.get('action')
+    if action not in ('approve', 'reject'):
+        raise ReviewError("action must be 'approve' or 'reject'", 400)
+    ids = data.get(key)
+    if not isinstance(ids, list) or len(ids) > 500:
+        raise ReviewError(f"{key} must be a list of at most 500 ids", 400)
+    return ids, action == 'approve'
+
+@app.route('/api/manager/<string:company_name>/<string:manager_id>/leave-requests', methods=['GET'])
+def get_team_leave_requests(company_name, manager_id):
+    identity = g.identity
+    try:
+        limit = page_limit()
+        after = int(request.args.get('cursor') or 0)
+    except ValueError:
+        return jsonify({'error': 'limit and cursor must be integers'}), 400
+
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        email = manager_email(cursor, identity, manager_id)
+        if not email:
+            return jsonify({'error': 'Employee not found'}), 404
+        rows, next_cursor, summary = pending_leave(cursor, email, after, limit)
+        requests = [dict(leave_request_to_dict(dict(row, status='Pending')), id=row['id'],
+                         employeeId=row['employee_id'], firstName=row['first_name'],
+                         lastName=row['last_name'], days=row['days'])
+                    for row in rows]
+        return jsonify({'requests': requests, 'summary': summary, 'next_cursor': next_cursor}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/manager/<string:company_name>/<string:manager_id>/leave-requests/review', methods=['POST'])
+def review_team_leave_requests(company_name, manager_id):
+    identity = g.identity
+    try:
+        ids, approve = review_batch('ids')
+    except ReviewError as e:
+        return jsonify({'error': str(e)}), e.status
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids must be integers'}), 400
+
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        email = manager_email(cursor, identity, manager_id)
+        if not email:
+            return jsonify({'error': 'Employee not found'}), 404
+        result = review_leave(conn, cursor, email, ids, approve)
+    except ReviewError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Rejections change leave_balance, which is part of the cached profile row
+    for employee_id in result['employees']:
+        profile_changed(company_name, employee_id)
+    return jsonify(result), 200
+
+@app.route('/api/manager/<string:company_name>/<string:manager_id>/termination-requests', methods=['GET'])
+def get_team_termination_requests(company_name, manager_id):
+    identity = g.identity
+    try:
+        limit = page_limit()
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        email = manager_email(cursor, identity, manager_id)
+        if not email:
+            return jsonify({'error': 'Employee not found'}), 404
+        rows, next_cursor = pending_terminations(cursor, email, request.args.get('cursor'), limit)
+        requests = [{
+            'employeeId': row['employee_id'],
+            'firstName': row['first_name'],
+            'lastName': row['last_name'],
+            'reason': row['reason'] or '',
+            'reason_category': row['reason_category'] or '',
+            'last_working_date': row['last_working_date'] or '',
+            'notice_period': row['notice_period'] or 'Standard (30 days)',
+            'handover_notes': row['handover_notes'] or '',
+            'request_date': row['request_date'].isoformat(),
+        } for row in rows]
+        return jsonify({'requests': requests, 'next_cursor': next_cursor}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/manager/<string:company_name>/<string:manager_id>/termination-requests/review',
+           methods=['POST'])
+def review_team_termination_requests(company_name, manager_id):
+    identity = g.identity
+    try:
+        employee_ids, approve = review_batch('employeeIds')
+    except ReviewError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    conn = get_db_connection(company_name)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        email = manager_email(cursor, identity, manager_id)
+        if not email:
+            return jsonify({'error': 'Employee not found'}), 404
+        result = review_terminations(conn, cursor, email, [str(i) for i in employee_ids], approve)
+    except ReviewError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    for employee_id in result['employees']:
+        notification_hub.notify(company_name, employee_id)
+    return jsonify(result), 200
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; use serve.py (gunicorn) in production
+    mail_queue.start()
+    app.run(debug=os.environ.get('FLASK_DEBUG', 'false').lower() == 'true')
\ No newline at end of file
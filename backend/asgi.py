@@ -0,0 +1,381 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+
+import aiomysql
+import aiosmtplib
+from a2wsgi import WSGIMiddleware
+from quart import Quart, Response, g, jsonify, request
+from quart_cors import cors
+from werkzeug.exceptions import HTTPException
+
+from app1 import (
+    COMPANY_JOBS_QUERY, DASHBOARD_FIELDS, INVITE_COUNT_QUERY, JOBS_PROJECTION,
+    PROFILE_PROJECTION, PROFILE_ROW_QUERY,
+    SLOW_REQUEST_SECONDS, app as flask_app, cache_notifications, dashboard_sections, db_pool, mail_queue,
+    merge_notifications, notification_cache, notification_hub, profile_cache, request_session, tenant_directory,
+)
+from auth import InvalidSession
+from fast_json import dumps_row, dumps_rows
+from instrumentation import begin_request, end_request, observe_mail_batch
+from invites import RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY, RECENT_INVITE_NOTIFICATIONS_QUERY
+from profile_completion import PROFILE_COMPLETION_QUERY, completion_notifications
+from projection import ProjectionError, parse_fields
+from tenants import UnknownTenant
+
+logger = logging.getLogger(__name__)
+
+# ASGI entry point. The hot read routes and the notification stream are
+# served by the async handlers below (aiomysql, no thread per in-flight
+# request or open stream); every other path falls through to the Flask app in
+# app1.py, run on a pool of ASGI_FLASK_THREADS threads by a2wsgi, which
+# streams request and response bodies instead of buffering them.
+# Both share the in-process caches, so Flask-side writes invalidate what the
+# async side serves. Run with an ASGI server, e.g.
+#
+#     hypercorn asgi:application --bind 0.0.0.0:5000
+#     uvicorn asgi:application --port 5000
+#
+# Outgoing mail is drained from the same outbox by an asyncio task using
+# aiosmtplib instead of the mail_queue worker threads.
+
+
+class AsyncTenantPools:
+    # aiomysql counterpart of db_pool.TenantPoolRegistry: one bounded pool
+    # per tenant server/database, created on first use. Connections run in
+    # autocommit so pooled readers never sit on an old snapshot.
+    def __init__(self, connect_kwargs, max_per_tenant=10, wait_timeout=10.0, recycle=3600):
+        self.connect_kwargs = {k: v for k, v in connect_kwargs.items() if k in ('host', 'port', 'user', 'password')}
+        self.max_per_tenant = max_per_tenant
+        self.wait_timeout = wait_timeout
+        self.recycle = recycle
+        self._pools = {}
+        self._lock = asyncio.Lock()
+
+    async def _pool_for(self, tenant):
+        key = (tenant.host, tenant.port, tenant.database)
+        pool = self._pools.get(key)
+        if pool is None:
+            async with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    connect_kwargs = dict(self.connect_kwargs)
+                    if tenant.host:
+                        connect_kwargs['host'] = tenant.host
+                    if tenant.port:
+                        connect_kwargs['port'] = tenant.port
+                    pool = await aiomysql.create_pool(
+                        db=tenant.database, minsize=0, maxsize=self.max_per_tenant,
+                        autocommit=True, pool_recycle=self.recycle, **connect_kwargs)
+                    self._pools[key] = pool
+        return pool
+
+    @asynccontextmanager
+    async def cursor(self, tenant):
+        pool = await self._pool_for(tenant)
+        conn = await asyncio.wait_for(pool.acquire(), self.wait_timeout)
+        try:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                yield cur
+        finally:
+            pool.release(conn)
+
+    async def close_all(self):
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
+            await pool.wait_closed()
+
+    def stats(self):
+        return [
+            {'host': host, 'database': database, 'size': pool.size, 'free': pool.freesize, 'maxsize': pool.maxsize}
+            for (host, _, database), pool in self._pools.items()
+        ]
+
+
+db = AsyncTenantPools(
+    db_pool.connect_kwargs,
+    max_per_tenant=int(os.environ.get('ASYNC_DB_POOL_SIZE', os.environ.get('DB_POOL_SIZE', 50))),
+    wait_timeout=float(os.environ.get('DB_POOL_WAIT_TIMEOUT', 10)),
+)
+
+quart_app = cors(Quart(__name__, static_folder=None))
+
+
+@quart_app.before_request
+async def start_request_trace():
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.request_trace, g.request_trace_token = begin_request(route)
+
+
+@quart_app.after_request
+async def finish_request_trace(response):
+    trace = g.pop('request_trace', None)
+    if trace is not None:
+        end_request(trace, g.pop('request_trace_token'), request.method, response.status_code,
+                    SLOW_REQUEST_SECONDS)
+    return response
+
+
+@quart_app.before_request
+async def resolve_tenant():
+    # Directory misses may query the master database, so they run off-loop.
+    company_name = (request.view_args or {}).get('company_name')
+    if company_name is not None:
+        tenant = tenant_directory.cached(company_name)
+        if tenant is None:
+            tenant = await asyncio.to_thread(tenant_directory.resolve, company_name)
+        g.tenant = tenant
+
+
+@quart_app.before_request
+async def check_session():
+    g.identity = request_session(request.method, request.headers, request.args, request.view_args)
+
+
+@quart_app.errorhandler(UnknownTenant)
+async def handle_unknown_tenant(e):
+    return jsonify({'error': str(e)}), 404
+
+
+@quart_app.errorhandler(InvalidSession)
+async def handle_invalid_session(e):
+    return jsonify({'error': str(e)}), e.status
+
+
+async def select_list(cur, projection, company_name, fields=None):
+    columns = projection.cached_columns(company_name)
+    if columns is None:
+        await cur.execute(*projection.columns_query())
+        columns = projection.store_columns(company_name, await cur.fetchall())
+    return projection.build_select(columns, fields)
+
+
+async def fetch_profile_row(cur, company_name, employee_id, fields=None):
+    columns = await select_list(cur, PROFILE_PROJECTION, company_name, fields)
+    await cur.execute(PROFILE_ROW_QUERY.format(columns=columns), (employee_id,))
+    return await cur.fetchone()
+
+
+async def fetch_notifications(cur, employee_id, email=None):
+    if email:
+        await cur.execute(RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY, (email,))
+    else:
+        await cur.execute(RECENT_INVITE_NOTIFICATIONS_QUERY, (employee_id,))
+    job_notifications = list(await cur.fetchall())
+    await cur.execute(PROFILE_COMPLETION_QUERY, (employee_id,))
+    profile_notifications = completion_notifications(await cur.fetchall())
+    return merge_notifications(job_notifications, profile_notifications)
+
+
+@quart_app.route('/api/profile/<string:company_name>/<string:employee_id>', methods=['GET'])
+async def get_profile(company_name, employee_id):
+    fields = parse_fields(request.args.get('fields'))
+    cache_key = (company_name, str(employee_id))
+    profile = profile_cache.get(cache_key)
+
+    if profile is None or (fields and not set(fields) <= profile.keys()):
+        wants_optional = bool(fields) and not PROFILE_PROJECTION.optional.isdisjoint(fields)
+        token = profile_cache.token(cache_key)
+        try:
+            async with db.cursor(g.tenant) as cur:
+                profile = await fetch_profile_row(cur, company_name, employee_id,
+                                                  fields if wants_optional else None)
+        except ProjectionError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+        if not wants_optional:
+            profile_cache.set(cache_key, profile, token)
+
+    if fields:
+        unknown = [f for f in fields if f not in profile]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        profile = {f: profile[f] for f in fields}
+    return Response(dumps_row(profile, PROFILE_PROJECTION.json_columns), mimetype='application/json'), 200
+
+
+@quart_app.route('/api/company-jobs/<string:company_name>', methods=['GET'])
+async def get_company_jobs(company_name):
+    try:
+        async with db.cursor(g.tenant) as cur:
+            columns = await select_list(cur, JOBS_PROJECTION, company_name,
+                                        parse_fields(request.args.get('fields')))
+            await cur.execute(COMPANY_JOBS_QUERY.format(columns=columns))
+            jobs = await cur.fetchall()
+        return Response(dumps_rows(jobs), mimetype='application/json'), 200
+    except ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@quart_app.route('/api/notifications/<string:company_name>/<string:employee_id>', methods=['GET'])
+async def get_notifications(company_name, employee_id):
+    identity = g.identity
+    cache_key = (company_name, str(employee_id))
+    cached = notification_cache.get(cache_key)
+    if cached is None:
+        try:
+            async with db.cursor(g.tenant) as cur:
+                cached = cache_notifications(cache_key, await fetch_notifications(
+                    cur, employee_id, identity.email if identity else None))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    etag, body = cached
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+@quart_app.route('/api/dashboard/<string:company_name>/<string:employee_id>', methods=['GET'])
+async def get_dashboard(company_name, employee_id):
+    fields = parse_fields(request.args.get('fields')) or DASHBOARD_FIELDS
+    unknown = [f for f in fields if f not in DASHBOARD_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    try:
+        async with db.cursor(g.tenant) as cur:
+            cache_key = (company_name, str(employee_id))
+            row = profile_cache.get(cache_key)
+            if row is None:
+                token = profile_cache.token(cache_key)
+                row = await fetch_profile_row(cur, company_name, employee_id)
+                if not row:
+                    return jsonify({'error': 'Profile not found'}), 404
+                profile_cache.set(cache_key, row, token)
+
+            dashboard = dashboard_sections(row, fields)
+            if 'invite_count' in fields:
+                await cur.execute(INVITE_COUNT_QUERY, (row['email'],))
+                dashboard['invite_count'] = (await cur.fetchone())['invites']
+            if 'notifications' in fields:
+                cached = notification_cache.get(cache_key)
+                if cached is None:
+                    cached = cache_notifications(cache_key, await fetch_notifications(cur, employee_id, row['email']))
+                dashboard['notifications'] = json.loads(cached[1])
+        return jsonify(dashboard), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@quart_app.route('/api/notifications/<string:company_name>/<string:employee_id>/stream', methods=['GET'])
+async def stream_notifications(company_name, employee_id):
+    # The tenant watcher pushes onto this loop; an open stream holds no thread.
+    subscription = notification_hub.subscribe(company_name, employee_id, asyncio.get_running_loop())
+    response = Response(notification_hub.astream(subscription, flask_app.json.dumps),
+                        mimetype='text/event-stream')
+    response.timeout = None
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@quart_app.route('/api/leave-balance/<company_name>/<employee_id>', methods=['GET'])
+async def get_leave_balance(company_name, employee_id):
+    async with db.cursor(g.tenant) as cur:
+        await cur.execute("SELECT leave_balance FROM t_employee_data WHERE employee_id = %s", (employee_id,))
+        result = await cur.fetchone()
+
+    if result:
+        return jsonify(json.loads(result['leave_balance']))
+    else:
+        return jsonify({"error": "Employee not found"}), 404
+
+
+@quart_app.route('/api/metrics/async-db-pool', methods=['GET'])
+async def get_async_db_pool_metrics():
+    return jsonify(db.stats()), 200
+
+
+async def deliver_mail_batch(messages):
+    # Async twin of app1.deliver_mail_batch: one SMTP connection per batch.
+    config = flask_app.config
+    results = {}
+    start = time.perf_counter()
+    smtp = aiosmtplib.SMTP(hostname=config['MAIL_SERVER'], port=config['MAIL_PORT'],
+                           start_tls=config['MAIL_USE_TLS'])
+    async with smtp:
+        if config['MAIL_USERNAME']:
+            await smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        for message in messages:
+            try:
+                msg = EmailMessage()
+                msg['Subject'] = message['subject']
+                msg['From'] = message['sender'] or config.get('MAIL_DEFAULT_SENDER') or config['MAIL_USERNAME']
+                msg['To'] = ', '.join(message['recipients'])
+                msg.set_content(message['body'] or '')
+                await smtp.send_message(msg)
+                results[message['id']] = None
+            except Exception as e:
+                results[message['id']] = e
+    observe_mail_batch(time.perf_counter() - start, results)
+    return results
+
+
+async def dispatch_mail():
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:asgi"
+    while True:
+        try:
+            batch = await asyncio.to_thread(mail_queue.claim, worker_id)
+        except Exception:
+            logger.exception("Could not claim mail batch")
+            batch = []
+        if not batch:
+            await asyncio.sleep(mail_queue.poll_interval)
+            continue
+        try:
+            results = await deliver_mail_batch(batch)
+        except Exception as e:
+            results = {message['id']: e for message in batch}
+        await asyncio.to_thread(mail_queue.record, batch, results)
+
+
+# The outbox is drained by dispatch_mail; enqueue() from Flask routes must
+# not start the threaded workers as well.
+mail_queue.workers = 0
+
+
+_mail_task = None
+
+
+@quart_app.before_serving
+async def startup():
+    global _mail_task
+    _mail_task = asyncio.create_task(dispatch_mail())
+
+
+@quart_app.after_serving
+async def shutdown():
+    if _mail_task is not None:
+        _mail_task.cancel()
+    await db.close_all()
+
+
+flask_asgi = WSGIMiddleware(flask_app, workers=int(os.environ.get('ASGI_FLASK_THREADS', 16)))
+
+
+def _served_async(scope):
+    adapter = quart_app.url_map.bind('localhost')
+    try:
+        adapter.match(scope['path'], method=scope['method'])
+    except HTTPException:
+        return False
+    return True
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan' or (scope['type'] == 'http' and _served_async(scope)):
+        await quart_app(scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
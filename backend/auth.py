@@ -0,0 +1,267 @@
+import argparse
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from cache import TTLCache
+from instrumentation import metrics
+
+# Prefixes werkzeug writes in front of its hashes; any other stored value is a
+# legacy plaintext password.
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(HASH_PREFIXES)
+
+
+class LoginBusy(Exception):
+    pass
+
+
+class Authenticator:
+    # Password checks run on a small thread pool (hashlib releases the GIL
+    # while hashing) so a burst of logins cannot occupy every request thread.
+    # At most max_pending checks wait for the pool; beyond that callers get
+    # LoginBusy instead of queueing.
+    #
+    # A successful check is remembered as HMAC(key, stored hash + password)
+    # for cache_ttl seconds, so repeated logins skip the slow hash. Changing
+    # the stored hash changes the digest, which invalidates the entry.
+    #
+    # Plaintext rows, and hashes made with an older method, are rehashed
+    # after a successful login. store(company, employee_id, old, new) writes
+    # the new value on the pool thread, not in the request.
+    def __init__(self, store, method='scrypt', workers=None, max_pending=64,
+                 cache_ttl=300.0, cache_size=10000, key=None):
+        self.store = store
+        self.method = method
+        self.workers = workers or os.cpu_count() or 2
+        self.max_pending = max_pending
+        self._key = key or os.urandom(32)
+        self._verified = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + max_pending)
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='password-verify')
+        return self._executor
+
+    def reset(self):
+        # After fork: the parent's worker threads do not exist in the child.
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            metrics.inc('login_attempts_total', result='busy')
+            raise LoginBusy()
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _digest(self, stored, password):
+        return hmac.new(self._key, f"{stored}\0{password}".encode(), hashlib.sha256).digest()
+
+    def needs_rehash(self, stored):
+        return not is_hashed(stored) or not stored.split('$', 1)[0].startswith(self.method)
+
+    def hash(self, password):
+        return generate_password_hash(password, method=self.method)
+
+    def _check(self, stored, password):
+        start = time.perf_counter()
+        if is_hashed(stored):
+            ok = check_password_hash(stored, password)
+        else:
+            ok = hmac.compare_digest(stored.encode(), password.encode())
+        metrics.observe('password_verify_seconds', time.perf_counter() - start,
+                        kind='hash' if is_hashed(stored) else 'plaintext')
+        return ok
+
+    def _upgrade(self, company_name, employee_id, stored, password):
+        try:
+            self.store(company_name, employee_id, stored, self.hash(password))
+            metrics.inc('password_rehash_total', result='ok')
+        except Exception:
+            metrics.inc('password_rehash_total', result='failed')
+
+    def verify(self, company_name, employee_id, stored, password):
+        if not stored or not password:
+            metrics.inc('login_attempts_total', result='failed')
+            return False
+        cache_key = (company_name, employee_id)
+        digest = self._digest(stored, password)
+        cached = self._verified.get(cache_key)
+        if cached is not None and hmac.compare_digest(cached, digest):
+            metrics.inc('login_attempts_total', result='cached')
+            return True
+
+        ok = self._submit(self._check, stored, password).result()
+        metrics.inc('login_attempts_total', result='ok' if ok else 'failed')
+        if not ok:
+            return False
+        self._verified.set(cache_key, digest)
+        if self.needs_rehash(stored):
+            try:
+                self._submit(self._upgrade, company_name, employee_id, stored, password)
+            except LoginBusy:
+                pass  # retried on the next login
+        return True
+
+    def stats(self):
+        return {
+            'method': self.method,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'verified_cache': self._verified.stats(),
+        }
+
+
+class RateLimiter:
+    # Token bucket per key (the tenant): burst attempts at once, refilled at
+    # rate per second. An idle bucket refills completely, so buckets are kept
+    # in a TTLCache and simply dropped once that would have happened.
+    def __init__(self, rate=20.0, burst=40, maxsize=10000):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = TTLCache(maxsize=maxsize, ttl=burst / rate if rate else 3600.0)
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        # Returns 0 when the attempt may go ahead, otherwise the seconds
+        # until a token is available.
+        if not self.rate:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets.set(key, (tokens, now))
+                return (1 - tokens) / self.rate
+            self._buckets.set(key, (tokens - 1, now))
+            return 0
+
+
+# Who a request is from, as signed into its session token at login.
+Identity = namedtuple('Identity', 'employee_id email comp_id tenant')
+
+
+class InvalidSession(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionTokens:
+    # Stateless session tokens: the identity, HMAC-signed with the app's
+    # secret key and timestamped. Checking one is a signature check in
+    # process, with no database or shared store involved.
+    def __init__(self, secret_key, max_age=12 * 3600):
+        self.max_age = max_age
+        self._serializer = URLSafeTimedSerializer(secret_key, salt='session-token')
+
+    def issue(self, identity):
+        return self._serializer.dumps(list(identity))
+
+    def read(self, token):
+        try:
+            return Identity(*self._serializer.loads(token, max_age=self.max_age))
+        except SignatureExpired:
+            raise InvalidSession('Session expired, please log in again')
+        except (BadSignature, TypeError, ValueError):
+            raise InvalidSession('Invalid session token')
+
+    def from_header(self, authorization):
+        # None when the request carries no bearer token at all.
+        if not authorization:
+            return None
+        scheme, _, token = authorization.partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            raise InvalidSession('Invalid session token')
+        return self.read(token.strip())
+
+    def check(self, identity, company_name, employee_id=None):
+        # Tokens are only good for the tenant and employee they were issued
+        # for, whatever the URL says. Company-wide URLs only check the tenant.
+        if identity.tenant != company_name:
+            raise InvalidSession('Session does not match this company', status=403)
+        if employee_id is not None and str(identity.employee_id) != str(employee_id):
+            raise InvalidSession('Session does not match this employee', status=403)
+        return identity
+
+
+def install_password_column(cursor):
+    # werkzeug hashes are up to ~170 characters.
+    cursor.execute("""
+        SELECT CHARACTER_MAXIMUM_LENGTH FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 't_employee_data' AND column_name = 'password'
+    """)
+    row = cursor.fetchone()
+    if row and (row[0] or 0) < 255:
+        cursor.execute("ALTER TABLE t_employee_data MODIFY password VARCHAR(255)")
+
+
+def hash_legacy_passwords(cursor, method='scrypt', batch_size=200):
+    # Rehashes every plaintext password up front instead of waiting for each
+    # employee's next login.
+    updated = 0
+    last_id = ''
+    while True:
+        cursor.execute("""
+            SELECT employee_id, password FROM t_employee_data
+            WHERE employee_id > %s ORDER BY employee_id LIMIT %s
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return updated
+        changes = [(generate_password_hash(password, method=method), employee_id, password)
+                   for employee_id, password in rows if password and not is_hashed(password)]
+        if changes:
+            cursor.executemany("""
+                UPDATE t_employee_data SET password = %s WHERE employee_id = %s AND password = %s
+            """, changes)
+            updated += len(changes)
+        last_id = rows[-1][0]
+
+
+def main():
+    from app1 import PASSWORD_HASH_METHOD, get_db_connection
+
+    parser = argparse.ArgumentParser(description='Prepare a company database for hashed passwords.')
+    parser.add_argument('company', help='company (database) name')
+    parser.add_argument('--hash-all', action='store_true',
+                        help='also hash every remaining plaintext password now')
+    args = parser.parse_args()
+
+    conn = get_db_connection(args.company)
+    cursor = conn.cursor()
+    try:
+        install_password_column(cursor)
+        if args.hash_all:
+            print(f"hashed {hash_legacy_passwords(cursor, PASSWORD_HASH_METHOD)} passwords")
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
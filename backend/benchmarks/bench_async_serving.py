@@ -0,0 +1,94 @@
+"""Load-test the sync (Flask) and async (ASGI) serving modes side by side.
+
+Start both servers against the same tenant database, then point this script
+at them. It keeps N requests in flight per target, cycling through the hot
+read routes, and reports throughput, latency percentiles and errors:
+
+    python app1.py                                      # sync, :5000
+    hypercorn asgi:application --bind 127.0.0.1:5001    # async, :5001
+
+    python benchmarks/bench_async_serving.py --company acme --employee E1001 \\
+        --target sync=http://127.0.0.1:5000 --target async=http://127.0.0.1:5001 \\
+        --concurrency 10,100,1000 --duration 20
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+import httpx
+
+PATHS = (
+    '/api/profile/{company}/{employee}',
+    '/api/dashboard/{company}/{employee}',
+    '/api/notifications/{company}/{employee}',
+    '/api/leave-balance/{company}/{employee}',
+    '/api/company-jobs/{company}?fields=job_id,job_title,location,mode',
+)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def run(base_url, paths, concurrency, duration, timeout):
+    latencies = []
+    errors = 0
+    cycle = itertools.cycle(paths)
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                path = next(cycle)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 500:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--company', required=True)
+    parser.add_argument('--employee', required=True)
+    parser.add_argument('--target', action='append', required=True, help='name=base_url, repeatable')
+    parser.add_argument('--concurrency', default='10,100,500')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    paths = [p.format(company=args.company, employee=args.employee) for p in PATHS]
+    targets = [t.split('=', 1) for t in args.target]
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    print(f"{'target':<8} {'in-flight':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in levels:
+        for name, base_url in targets:
+            latencies, errors, elapsed = asyncio.run(run(base_url, paths, concurrency, args.duration, args.timeout))
+            if not latencies:
+                print(f"{name:<8} {concurrency:>9} {'-':>9} {'-':>8} {'-':>8} {'-':>8} {errors:>7}")
+                continue
+            print(f"{name:<8} {concurrency:>9} {len(latencies) / elapsed:>9.1f} "
+                  f"{statistics.median(latencies):>8.1f} {percentile(latencies, 95):>8.1f} "
+                  f"{percentile(latencies, 99):>8.1f} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Measure how long a Flask worker is occupied per document download.
+
+Serves one generated PDF-sized file through file_serving.serve_file in each
+mode and times the WSGI call until the response body is fully consumed. That
+is the span a sync worker cannot take other requests:
+
+  stream        full download streamed by the worker (the old behaviour)
+  revalidate    browser re-open with If-None-Match -> 304
+  range         PDF viewer fetching the first 64 KiB -> 206
+  x-sendfile    header only, front proxy sends the bytes
+  x-accel       header only, nginx sends the bytes
+
+    python benchmarks/bench_file_serving.py --size-mb 5 --requests 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_serving import serve_file  # noqa: E402
+
+
+def build_app(upload_root, file_path, mode):
+    app = Flask(__name__)
+    app.config['USE_X_SENDFILE'] = mode == 'x-sendfile'
+
+    @app.route('/doc')
+    def doc():
+        return serve_file(file_path, 'resume.pdf', etag='bench-digest', as_attachment=True,
+                          mode=mode, upload_root=upload_root)
+
+    return app
+
+
+def run(app, requests, headers):
+    client = app.test_client()
+    samples = []
+    sent = 0
+    status = None
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get('/doc', headers=headers, buffered=False)
+        for chunk in response.response:
+            sent += len(chunk)
+        response.close()
+        samples.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+    return status, statistics.mean(samples), statistics.median(samples), sent / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=5)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as upload_root:
+        file_path = os.path.join(upload_root, 'resume.pdf')
+        with open(file_path, 'wb') as f:
+            f.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+
+        scenarios = [
+            ('stream', '', {}),
+            ('revalidate', '', {'If-None-Match': '"bench-digest"'}),
+            ('range', '', {'Range': 'bytes=0-65535'}),
+            ('x-sendfile', 'x-sendfile', {}),
+            ('x-accel', 'x-accel', {}),
+        ]
+        print(f"{'scenario':<12} {'status':>6} {'busy mean ms':>13} {'busy p50 ms':>12} {'bytes/req':>12}")
+        baseline = None
+        for name, mode, headers in scenarios:
+            status, mean, p50, sent = run(build_app(upload_root, file_path, mode), args.requests, headers)
+            line = f"{name:<12} {status:>6} {mean:>13.3f} {p50:>12.3f} {sent:>12.0f}"
+            if baseline is None:
+                baseline = mean
+            else:
+                line += f"   ({baseline / mean:.1f}x less occupancy than stream)"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
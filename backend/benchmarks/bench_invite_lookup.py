@@ -0,0 +1,118 @@
+"""Compare candidate invite lookups: JSON_CONTAINS scan vs t_promote_invites.
+
+Builds a scratch database with synthetic t_promote rows at several sizes and
+times both query shapes for the same candidate email.
+
+    python benchmarks/bench_invite_lookup.py --database bench_invites \
+        --sizes 1000,10000,50000 --emails-per-job 50
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import mysql.connector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from invites import CANDIDATE_INVITES_QUERY, install_invite_index, rebuild_invite_index  # noqa: E402
+
+JSON_CONTAINS_QUERY = """
+    SELECT p.*, c.comp_name
+    FROM t_promote p
+    JOIN t_company c ON p.comp_id = c.comp_id
+    WHERE JSON_CONTAINS(p.candidate_emails, JSON_OBJECT('email', %s))
+"""
+
+
+def seed(cursor, rows, emails_per_job, population):
+    cursor.execute("DROP TABLE IF EXISTS t_promote_invites")
+    cursor.execute("DROP TABLE IF EXISTS t_promote")
+    cursor.execute("DROP TABLE IF EXISTS t_company")
+    cursor.execute("CREATE TABLE t_company (comp_id INT PRIMARY KEY, comp_name VARCHAR(255))")
+    cursor.execute("INSERT INTO t_company VALUES (1, 'Bench Co')")
+    cursor.execute("""
+        CREATE TABLE t_promote (
+            job_id INT PRIMARY KEY,
+            comp_id INT,
+            job_title VARCHAR(255),
+            job_description TEXT,
+            job_location VARCHAR(255),
+            additional_info TEXT,
+            department VARCHAR(255),
+            psy_questions JSON,
+            case_study_questions JSON,
+            gd_data JSON,
+            mbti_data JSON,
+            candidate_emails JSON,
+            created_at DATETIME
+        )
+    """)
+    install_invite_index(cursor)
+    cursor.execute("SET @invite_sync_disabled = 1")
+    batch = []
+    for job_id in range(1, rows + 1):
+        emails = random.sample(range(population), emails_per_job)
+        batch.append((job_id, f"Job {job_id}", json.dumps([{'email': f"user{e}@bench.test"} for e in emails])))
+        if len(batch) == 1000:
+            _insert(cursor, batch)
+            batch = []
+    if batch:
+        _insert(cursor, batch)
+    cursor.execute("SET @invite_sync_disabled = NULL")
+    rebuild_invite_index(cursor)
+
+
+def _insert(cursor, batch):
+    cursor.executemany("""
+        INSERT INTO t_promote (job_id, comp_id, job_title, candidate_emails, created_at)
+        VALUES (%s, 1, %s, %s, NOW())
+    """, batch)
+
+
+def time_query(cursor, query, emails, repeat):
+    samples = []
+    for _ in range(repeat):
+        email = random.choice(emails)
+        start = time.perf_counter()
+        cursor.execute(query, (email,))
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=os.environ.get('MYSQL_HOST', 'localhost'))
+    parser.add_argument('--user', default=os.environ.get('MYSQL_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    parser.add_argument('--database', default='bench_invites')
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    parser.add_argument('--emails-per-job', type=int, default=50)
+    parser.add_argument('--population', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.execute(f"USE `{args.database}`")
+
+    emails = [f"user{e}@bench.test" for e in range(args.population)]
+    print(f"{'t_promote rows':>15} {'JSON_CONTAINS p50/max ms':>26} {'invite index p50/max ms':>25}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        seed(cursor, size, args.emails_per_job, args.population)
+        conn.commit()
+        scan = time_query(cursor, JSON_CONTAINS_QUERY, emails, max(3, args.repeat // 10))
+        indexed = time_query(cursor, CANDIDATE_INVITES_QUERY, emails, args.repeat)
+        print(f"{size:>15} {scan[0]:>15.2f} / {scan[1]:>8.2f} {indexed[0]:>14.2f} / {indexed[1]:>8.2f}")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
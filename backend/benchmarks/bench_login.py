@@ -0,0 +1,105 @@
+"""Measure password-check throughput for login, per core and through the verify pool.
+
+Times the ways a login can be checked, without a database:
+
+  plaintext   legacy rows (constant-time compare)
+  hash        one werkzeug check_password_hash on the calling thread
+  pool        Authenticator.verify from --threads request threads, with the
+              hash running on the bounded verify pool (cache disabled)
+  cached      Authenticator.verify for a recently verified password
+
+and reports logins/s and logins/s per core for each.
+
+    python benchmarks/bench_login.py --method scrypt --logins 200 --threads 8
+    python benchmarks/bench_login.py --method pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash  # noqa: E402
+
+from auth import Authenticator  # noqa: E402
+
+PASSWORD = 'correct horse battery staple'
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def timed(fn, count):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+    return time.perf_counter() - start, latencies
+
+
+def threaded(fn, threads, count):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = max(1, count // threads)
+
+    def worker():
+        _, samples = timed(fn, per_thread)
+        with lock:
+            latencies.extend(samples)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def report(name, elapsed, latencies, cores):
+    rate = len(latencies) / elapsed
+    print(f"{name:<10} {rate:>10.1f} {rate / cores:>10.1f} {statistics.median(latencies) * 1000:>9.2f} "
+          f"{percentile(latencies, 95) * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--method', default=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'))
+    parser.add_argument('--logins', type=int, default=100, help='hash checks per measurement')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent request threads for the pool run')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='verify pool size')
+    args = parser.parse_args()
+
+    stored = generate_password_hash(PASSWORD, method=args.method)
+    cores = args.workers
+    print(f"method={args.method} workers={args.workers} threads={args.threads} cpus={os.cpu_count()}")
+    print(f"{'path':<10} {'logins/s':>10} {'per core':>10} {'p50 ms':>9} {'p95 ms':>9}")
+
+    elapsed, latencies = timed(lambda: PASSWORD == PASSWORD, args.logins * 100)
+    report('plaintext', elapsed, latencies, 1)
+
+    elapsed, latencies = timed(lambda: check_password_hash(stored, PASSWORD), args.logins)
+    report('hash', elapsed, latencies, 1)
+
+    authenticator = Authenticator(lambda *a: None, method=args.method, workers=args.workers,
+                                  max_pending=args.threads, cache_ttl=0)
+    elapsed, latencies = threaded(lambda: authenticator.verify('bench', 'E1', stored, PASSWORD),
+                                  args.threads, args.logins)
+    report('pool', elapsed, latencies, cores)
+
+    authenticator = Authenticator(lambda *a: None, method=args.method, workers=args.workers)
+    authenticator.verify('bench', 'E1', stored, PASSWORD)
+    elapsed, latencies = threaded(lambda: authenticator.verify('bench', 'E1', stored, PASSWORD),
+                                  args.threads, args.logins * 100)
+    report('cached', elapsed, latencies, cores)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Compare profile writes: SELECT-then-UPDATE/INSERT vs the single-statement upsert.
+
+Builds a scratch profiles table whose rows carry large legacy JSON blobs (as
+production rows do), then times, for a mix of employees with and without a
+row:
+
+  legacy   SELECT * FROM profiles, then UPDATE or INSERT (two round trips)
+  upsert   profile_writes.upsert_profile with the four form fields (PUT)
+  patch    upsert_profile with a single field (PATCH)
+
+Also runs concurrent first writes for the same new employees to count the
+duplicate rows the legacy pattern creates without a unique key.
+
+    python benchmarks/bench_profile_writes.py --database bench_profiles \\
+        --rows 20000 --writes 2000 --new-ratio 0.2 --threads 8
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+import mysql.connector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_writes import PROFILE_FORM_FIELDS, profile_values, upsert_profile  # noqa: E402
+
+PROFILES_DDL = """
+    CREATE TABLE {table} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        employee_id VARCHAR(64) NOT NULL,
+        mobile_number VARCHAR(32),
+        department VARCHAR(100),
+        project_summary TEXT,
+        work_experience TEXT,
+        skills JSON,
+        education JSON,
+        achievements JSON,
+        leave_requests JSON
+        {unique}
+    )
+"""
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def seed(cursor, rows, blob_kb):
+    blob = json.dumps([{'title': 'x' * 200, 'description': 'y' * 800}] * max(1, blob_kb))
+    for table, unique in (('profiles_legacy', ''), ('profiles', ', UNIQUE KEY uq_profiles_employee (employee_id)')):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(PROFILES_DDL.format(table=table, unique=unique))
+        batch = [(f"E{n:07d}", 'Engineering', blob, blob) for n in range(rows)]
+        for start in range(0, rows, 1000):
+            cursor.executemany(f"""
+                INSERT INTO {table} (employee_id, department, achievements, leave_requests)
+                VALUES (%s, %s, %s, %s)
+            """, batch[start:start + 1000])
+
+
+def form_body():
+    return {'mobileNumber': '9999999999', 'department': random.choice(['R&D', 'Sales', 'HR']),
+            'projectSummary': 'p' * 300, 'workExperience': 'w' * 300}
+
+
+def legacy_write(cursor, employee_id, data):
+    cursor.execute("SELECT * FROM profiles_legacy WHERE employee_id = %s", (employee_id,))
+    if cursor.fetchone():
+        cursor.execute("""
+            UPDATE profiles_legacy
+            SET mobile_number = %s, department = %s, project_summary = %s, work_experience = %s
+            WHERE employee_id = %s
+        """, (data['mobileNumber'], data['department'], data['projectSummary'], data['workExperience'],
+              employee_id))
+    else:
+        cursor.execute("""
+            INSERT INTO profiles_legacy (employee_id, mobile_number, department, project_summary, work_experience)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (employee_id, data['mobileNumber'], data['department'], data['projectSummary'],
+              data['workExperience']))
+
+
+def upsert_write(cursor, employee_id, data):
+    upsert_profile(cursor, 'bench', employee_id, profile_values(data, PROFILE_FORM_FIELDS))
+
+
+def patch_write(cursor, employee_id, data):
+    upsert_profile(cursor, 'bench', employee_id, profile_values({'department': data['department']}, partial=True))
+
+
+def run(conn, write, targets):
+    cursor = conn.cursor()
+    samples = []
+    for employee_id in targets:
+        start = time.perf_counter()
+        write(cursor, employee_id, form_body())
+        conn.commit()
+        samples.append(time.perf_counter() - start)
+    cursor.close()
+    return samples
+
+
+def race(args, write, table, employees):
+    # Every thread writes every employee's first profile at the same time.
+    barrier = threading.Barrier(args.threads)
+    errors = []
+
+    def worker():
+        conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password,
+                                       database=args.database)
+        cursor = conn.cursor()
+        barrier.wait()
+        for employee_id in employees:
+            try:
+                write(cursor, employee_id, form_body())
+                conn.commit()
+            except mysql.connector.Error as e:
+                conn.rollback()
+                errors.append(e)
+        cursor.close()
+        conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password, database=args.database)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT COUNT(*) - COUNT(DISTINCT employee_id) FROM {table}
+        WHERE employee_id IN ({', '.join(['%s'] * len(employees))})
+    """, employees)
+    duplicates = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return duplicates, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=os.environ.get('MYSQL_HOST', 'localhost'))
+    parser.add_argument('--user', default=os.environ.get('MYSQL_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    parser.add_argument('--database', default='bench_profiles')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--blob-kb', type=int, default=20, help='size of each legacy JSON blob per row')
+    parser.add_argument('--writes', type=int, default=2000)
+    parser.add_argument('--new-ratio', type=float, default=0.2, help='share of writes for employees without a row')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent writers for the race check')
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.execute(f"USE `{args.database}`")
+    seed(cursor, args.rows, args.blob_kb)
+    conn.commit()
+    cursor.close()
+
+    print(f"rows={args.rows} blob={args.blob_kb}KB x2 writes={args.writes} new={args.new_ratio:.0%}")
+    print(f"{'pattern':<8} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'statements':>11}")
+    patterns = (('legacy', legacy_write, 2), ('upsert', upsert_write, 1), ('patch', patch_write, 1))
+    for round_, (name, write, statements) in enumerate(patterns, 1):
+        # upsert and patch share a table, so each round gets unused new ids
+        new = iter(range(args.rows * (round_ + 1), args.rows * (round_ + 1) + args.writes))
+        targets = [f"E{next(new) if random.random() < args.new_ratio else random.randrange(args.rows):07d}"
+                   for _ in range(args.writes)]
+        samples = run(conn, write, targets)
+        print(f"{name:<8} {len(samples) / sum(samples):>9.1f} {statistics.median(samples) * 1000:>8.2f} "
+              f"{percentile(samples, 95) * 1000:>8.2f} {statements:>11}")
+
+    fresh = [f"N{n:07d}" for n in range(200)]
+    for name, write, table in (('legacy', legacy_write, 'profiles_legacy'), ('upsert', upsert_write, 'profiles')):
+        duplicates, errors = race(args, write, table, fresh)
+        print(f"race {name}: {args.threads} writers x {len(fresh)} new employees -> "
+              f"{duplicates} duplicate rows, {errors} errors")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Compare profile/job payload size and serialization time before and after projection.
+
+Builds synthetic rows shaped like the `SELECT e.*, p.*` profile row and the
+`SELECT * FROM t_jobs` job rows (with the questionnaire/assessment columns),
+then times three ways of turning them into a response body:
+
+  legacy      every column, json.loads of skills/education, json.dumps (jsonify)
+  projected   default projection, same json path
+  fast        default projection, fast_json (orjson when installed, JSON
+              columns spliced in without decoding)
+
+    python benchmarks/bench_serialization.py --jobs 500 --rounds 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fast_json import _default, dumps_row, dumps_rows, orjson  # noqa: E402
+
+HEAVY = ('psy_questions', 'case_study_questions', 'gd_data', 'mbti_data')
+LEGACY_BLOBS = ('password', 'achievements', 'certificates', 'leave_requests', 'termination_request')
+
+
+def heavy_json(n):
+    return json.dumps([{'question': f"Question {i} " + 'x' * 200, 'options': ['a', 'b', 'c', 'd']}
+                       for i in range(n)])
+
+
+def profile_row():
+    return {
+        'employee_id': 'E1001', 'email': 'jane@example.com', 'password': 'secret',
+        'first_name': 'Jane', 'last_name': 'Doe', 'designation': 'Engineer', 'location': 'Pune',
+        'comp_id': 1, 'manager_email': 'boss@example.com',
+        'leave_balance': json.dumps({'casual': {'used': 2, 'remaining': 10}}),
+        'mobile_number': '9999999999', 'department': 'R&D', 'project_summary': 'p' * 500,
+        'work_experience': 'w' * 500,
+        'skills': json.dumps(['python', 'sql', 'react', 'aws'] * 5),
+        'education': json.dumps({'graduation': {'college': 'X', 'degree': 'B.E.', 'year': 2018}}),
+        'resume_path': 'resume.pdf', 'resume_blob': 'a' * 64,
+        'achievements': heavy_json(20), 'certificates': heavy_json(5),
+        'leave_requests': heavy_json(30), 'termination_request': None,
+        'psy_questions': heavy_json(40), 'mbti_data': heavy_json(10),
+    }
+
+
+def job_row(i):
+    return {
+        'job_id': i, 'comp_id': 1, 'job_title': f"Engineer {i}", 'job_desc': 'd' * 1500,
+        'location': 'Pune', 'mode': 'Hybrid', 'job_yrs_of_exp': 3, 'ctc': '12 LPA',
+        'skills': 'python,sql', 'qualifications': 'B.E.', 'created_at': datetime(2024, 1, 1),
+        'psy_questions': heavy_json(30), 'case_study_questions': heavy_json(10),
+        'gd_data': heavy_json(10), 'mbti_data': heavy_json(10),
+    }
+
+
+def legacy_profile(row):
+    row = dict(row)
+    row['skills'] = json.loads(row['skills'])
+    row['education'] = json.loads(row['education'])
+    return json.dumps(row, default=_default, sort_keys=True).encode()
+
+
+def project(row, drop):
+    return {k: v for k, v in row.items() if k not in drop}
+
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = fn()
+    return (time.perf_counter() - start) / rounds * 1e6, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    profile = profile_row()
+    jobs = [job_row(i) for i in range(args.jobs)]
+    slim_profile = project(profile, HEAVY + LEGACY_BLOBS)
+    slim_jobs = [project(job, HEAVY) for job in jobs]
+
+    json_columns = ('skills', 'education')
+    cases = [
+        ('profile legacy', lambda: legacy_profile(profile)),
+        ('profile projected', lambda: legacy_profile(slim_profile)),
+        ('profile fast', lambda: dumps_row(slim_profile, json_columns)),
+        ('jobs legacy', lambda: json.dumps(jobs, default=_default, sort_keys=True).encode()),
+        ('jobs projected', lambda: json.dumps(slim_jobs, default=_default, sort_keys=True).encode()),
+        ('jobs fast', lambda: dumps_rows(slim_jobs)),
+    ]
+    print(f"serializer backend: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    print(f"{'case':<18} {'us/response':>12} {'bytes':>10}")
+    for name, fn in cases:
+        rounds = args.rounds if name.startswith('profile') else max(1, args.rounds // 10)
+        micros, size = timed(fn, rounds)
+        print(f"{name:<18} {micros:>12.1f} {size:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,424 @@
+"""Seed synthetic tenants and load-test the dashboard API with a page-shaped traffic mix.
+
+seed   creates --tenants databases (bench_t0, bench_t1, ...) on the MySQL
+       server, migrated with schema.migrate, with employees, t_jobs,
+       t_promote rows with large candidate_emails arrays, and long
+       achievement and leave histories.
+run    drives a running API server (python serve.py, python app1.py or the
+       ASGI mode) with virtual users that load the dashboard, poll
+       notifications, search jobs, open their profile and applications and
+       submit leave. It reports throughput, p50/p95/p99 and DB queries per
+       request (from the X-DB-Queries header) for each endpoint.
+
+Results can be saved as a baseline and later runs compared against it; the
+run exits 1 when any endpoint's p95 or throughput regresses by more than
+--threshold percent, or its queries per request or error rate go up.
+
+    python benchmarks/harness.py seed --tenants 3 --employees 2000 --jobs 5000
+    python benchmarks/harness.py run --url http://127.0.0.1:5000 --tenants 3 \\
+        --users 50 --duration 60 --save-baseline baseline.json
+    python benchmarks/harness.py run --url http://127.0.0.1:5000 --tenants 3 \\
+        --users 50 --duration 60 --baseline baseline.json --threshold 15
+
+Requires httpx for run.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ('python', 'java', 'react', 'data', 'cloud', 'sales', 'analyst', 'manager', 'engineer',
+         'support', 'design', 'finance', 'security', 'mobile', 'platform', 'marketing')
+LOCATIONS = ('Pune', 'Bengaluru', 'Hyderabad', 'Chennai', 'Remote', 'Mumbai')
+MODES = ('Full Time', 'Hybrid', 'Remote', 'Contract')
+DEPARTMENTS = ('Engineering', 'Sales', 'Finance', 'HR', 'Operations', 'Support')
+LEAVE_TYPES = ('casual', 'sick', 'earned')
+
+BASE_TABLES = (
+    "CREATE TABLE t_company (comp_id INT PRIMARY KEY, comp_name VARCHAR(255))",
+    """
+    CREATE TABLE t_employee_data (
+        employee_id VARCHAR(64) PRIMARY KEY,
+        email VARCHAR(255),
+        password VARCHAR(255),
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        designation VARCHAR(100),
+        location VARCHAR(100),
+        comp_id INT,
+        manager_email VARCHAR(255),
+        leave_balance TEXT
+    )
+    """,
+    """
+    CREATE TABLE profiles (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        employee_id VARCHAR(64),
+        mobile_number VARCHAR(32),
+        department VARCHAR(100),
+        project_summary TEXT,
+        work_experience TEXT,
+        skills JSON,
+        education JSON,
+        resume_path VARCHAR(512),
+        achievements JSON,
+        certificates JSON,
+        leave_requests JSON,
+        termination_request JSON
+    )
+    """,
+    """
+    CREATE TABLE t_jobs (
+        job_id INT PRIMARY KEY,
+        comp_id INT,
+        job_title VARCHAR(255),
+        job_desc TEXT,
+        location VARCHAR(100),
+        mode VARCHAR(50),
+        department VARCHAR(100),
+        job_yrs_of_exp INT,
+        ctc VARCHAR(50),
+        skills VARCHAR(255),
+        qualifications VARCHAR(255),
+        psy_questions JSON,
+        case_study_questions JSON,
+        gd_data JSON,
+        mbti_data JSON,
+        created_at DATETIME
+    )
+    """,
+    """
+    CREATE TABLE t_promote (
+        job_id INT PRIMARY KEY,
+        comp_id INT,
+        job_title VARCHAR(255),
+        job_description TEXT,
+        job_location VARCHAR(255),
+        department VARCHAR(255),
+        candidate_emails JSON,
+        created_at DATETIME
+    )
+    """,
+)
+
+
+def tenant_names(count):
+    return [f"bench_t{i}" for i in range(count)]
+
+
+def employee_id(n):
+    return f"E{n:06d}"
+
+
+def email(n):
+    return f"user{n}@bench.test"
+
+
+def sentence(n):
+    return ' '.join(random.choice(WORDS) for _ in range(n))
+
+
+def heavy_json(items):
+    return json.dumps([{'question': sentence(30), 'options': [sentence(3) for _ in range(4)]}
+                       for _ in range(items)])
+
+
+def insert_batches(cursor, statement, rows, batch_size=1000):
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(statement, rows[start:start + batch_size])
+
+
+def seed_tenant(conn, database, args):
+    from invites import rebuild_invite_index
+    from schema import migrate
+
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.execute(f"USE `{database}`")
+    for ddl in BASE_TABLES:
+        cursor.execute(ddl)
+    # The same migration production tenants get: child tables, blob and
+    # completion_mask columns, invite index and the unique keys the routes
+    # rely on.
+    migrate(cursor, log=lambda message: None)
+    cursor.execute("INSERT INTO t_company VALUES (1, %s)", (f"{database} Co",))
+
+    balance = json.dumps({t: {'used': 0, 'remaining': 100000} for t in LEAVE_TYPES})
+    employees, profiles, achievements, leaves = [], [], [], []
+    today = date.today()
+    for n in range(args.employees):
+        eid = employee_id(n)
+        employees.append((eid, email(n), 'bench', f"First{n}", f"Last{n}", random.choice(WORDS),
+                          random.choice(LOCATIONS), f"manager{n % 50}@bench.test", balance))
+        complete = random.random() < 0.6
+        history = [{'title': sentence(4), 'description': sentence(40), 'date': str(today),
+                    'quarter': 'Q1'} for _ in range(args.achievements)]
+        profiles.append((eid, '9999999999' if complete else None, random.choice(DEPARTMENTS),
+                         sentence(60), sentence(80) if complete else None,
+                         json.dumps(random.sample(WORDS, 5)),
+                         json.dumps({'graduation': {'college': 'Bench U', 'degree': 'B.E.', 'year': 2018}}),
+                         json.dumps(history)))
+        for a in history:
+            achievements.append((eid, a['title'], a['description'], a['date'], a['quarter']))
+        for i in range(args.leaves):
+            start = today - timedelta(days=7 * (i + 1))
+            leaves.append((eid, start, start + timedelta(days=1), random.choice(LEAVE_TYPES),
+                           sentence(8), random.choice(('Approved', 'Rejected', 'Pending')),
+                           datetime.combine(start, datetime.min.time())))
+
+    insert_batches(cursor, """
+        INSERT INTO t_employee_data (employee_id, email, password, first_name, last_name, designation,
+                                     location, comp_id, manager_email, leave_balance)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 1, %s, %s)
+    """, employees)
+    insert_batches(cursor, """
+        INSERT INTO profiles (employee_id, mobile_number, department, project_summary, work_experience,
+                              skills, education, achievements)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, profiles)
+    insert_batches(cursor, """
+        INSERT INTO t_achievements (employee_id, title, description, date, quarter)
+        VALUES (%s, %s, %s, %s, %s)
+    """, achievements)
+    insert_batches(cursor, """
+        INSERT INTO t_leave_requests (employee_id, start_date, end_date, leave_type, reason, status, request_date)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, leaves)
+
+    psy = heavy_json(20)
+    jobs = [(j, f"{sentence(2).title()} {random.choice(WORDS).title()}", sentence(200),
+             random.choice(LOCATIONS), random.choice(MODES), random.choice(DEPARTMENTS),
+             random.randint(0, 12), f"{random.randint(4, 40)} LPA", ','.join(random.sample(WORDS, 4)),
+             'B.E.', psy, psy, psy, psy)
+            for j in range(1, args.jobs + 1)]
+    insert_batches(cursor, """
+        INSERT INTO t_jobs (job_id, comp_id, job_title, job_desc, location, mode, department, job_yrs_of_exp,
+                            ctc, skills, qualifications, psy_questions, case_study_questions, gd_data,
+                            mbti_data, created_at)
+        VALUES (%s, 1, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+    """, jobs, batch_size=200)
+
+    cursor.execute("SET @invite_sync_disabled = 1")
+    promote = []
+    for j in range(1, args.promote_rows + 1):
+        invited = random.sample(range(args.employees), min(args.emails_per_job, args.employees))
+        created = datetime.now() - timedelta(days=random.randint(0, 60))
+        promote.append((j, f"Role {j}", json.dumps([{'email': email(e)} for e in invited]), created))
+    insert_batches(cursor, """
+        INSERT INTO t_promote (job_id, comp_id, job_title, candidate_emails, created_at)
+        VALUES (%s, 1, %s, %s, %s)
+    """, promote, batch_size=200)
+    cursor.execute("SET @invite_sync_disabled = NULL")
+    rebuild_invite_index(cursor)
+    conn.commit()
+    cursor.close()
+
+
+def seed(args):
+    import mysql.connector
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password)
+    for database in tenant_names(args.tenants):
+        start = time.perf_counter()
+        seed_tenant(conn, database, args)
+        print(f"{database}: {args.employees} employees, {args.jobs} jobs, {args.promote_rows} t_promote rows "
+              f"in {time.perf_counter() - start:.1f}s")
+    conn.close()
+
+
+# Page-shaped traffic: (name, weight, method, path template, body builder)
+MIX = (
+    ('dashboard', 25, 'GET', '/api/dashboard/{c}/{e}?fields=profile,completion,notifications', None),
+    ('notifications_poll', 35, 'GET', '/api/notifications/{c}/{e}', None),
+    ('job_search', 15, 'GET', '/api/company-jobs/{c}/search?q={q}&limit=20', None),
+    ('profile', 10, 'GET', '/api/profile/{c}/{e}', None),
+    ('applications', 5, 'GET', '/api/candidate-applications/{c}/{e}', None),
+    ('leave_balance', 5, 'GET', '/api/leave-balance/{c}/{e}', None),
+    ('leave_submit', 5, 'POST', '/api/leave-requests/{c}/{e}', 'leave'),
+)
+
+
+def leave_body():
+    start = date.today() + timedelta(days=random.randint(30, 3000))
+    return {'startDate': start.isoformat(), 'endDate': start.isoformat(),
+            'leaveType': random.choice(LEAVE_TYPES), 'reason': 'benchmark'}
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def virtual_user(client, args, tenants, deadline, results, lock):
+    names = [m[0] for m in MIX]
+    weights = [m[1] for m in MIX]
+    etags = {}
+    while time.perf_counter() < deadline:
+        name, _, method, template, body = MIX[names.index(random.choices(names, weights)[0])]
+        company = random.choice(tenants)
+        eid = employee_id(random.randrange(args.employees))
+        path = template.format(c=company, e=eid, q=random.choice(WORDS)[:random.randint(3, 6)])
+        headers = {}
+        if name == 'notifications_poll' and (company, eid) in etags:
+            headers['If-None-Match'] = etags[(company, eid)]
+        start = time.perf_counter()
+        try:
+            response = client.request(method, path, headers=headers,
+                                      json=leave_body() if body == 'leave' else None)
+            elapsed = (time.perf_counter() - start) * 1000
+            error = response.status_code >= 500
+            queries = response.headers.get('X-DB-Queries')
+            if name == 'notifications_poll' and response.headers.get('ETag'):
+                etags[(company, eid)] = response.headers['ETag']
+        except Exception:
+            elapsed, error, queries = (time.perf_counter() - start) * 1000, True, None
+        with lock:
+            entry = results[name]
+            entry['latencies'].append(elapsed)
+            entry['errors'] += error
+            if queries is not None:
+                entry['queries'].append(int(queries))
+        if args.think:
+            time.sleep(random.expovariate(1 / args.think))
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for name, entry in sorted(results.items()):
+        latencies = entry['latencies']
+        if not latencies:
+            continue
+        summary[name] = {
+            'requests': len(latencies),
+            'rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'queries_per_request': round(statistics.mean(entry['queries']), 2) if entry['queries'] else None,
+            'errors': entry['errors'],
+        }
+    return summary
+
+
+def compare(summary, baseline, threshold):
+    regressions = []
+    for name, current in summary.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold / 100):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['rps'] < previous['rps'] * (1 - threshold / 100):
+            regressions.append(f"{name}: throughput {previous['rps']} -> {current['rps']} req/s")
+        if (current['queries_per_request'] or 0) > (previous['queries_per_request'] or 0):
+            regressions.append(f"{name}: queries/request {previous['queries_per_request']} -> "
+                               f"{current['queries_per_request']}")
+        # Failing fast can look like a speed-up, so any rise in the error
+        # rate fails regardless of the threshold.
+        error_rate = current['errors'] / current['requests']
+        previous_rate = previous.get('errors', 0) / previous['requests'] if previous.get('requests') else 0
+        if error_rate > previous_rate:
+            regressions.append(f"{name}: errors {previous.get('errors', 0)}/{previous.get('requests', 0)} -> "
+                               f"{current['errors']}/{current['requests']}")
+    return regressions
+
+
+def new_results():
+    return defaultdict(lambda: {'latencies': [], 'errors': 0, 'queries': []})
+
+
+def drive(client, args, tenants, seconds, results):
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=virtual_user, args=(client, args, tenants, deadline, results, lock))
+               for _ in range(args.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run(args):
+    import httpx
+
+    tenants = tenant_names(args.tenants)
+    results = new_results()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    with httpx.Client(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        # Warm-up traffic fills the pools and caches; its samples are dropped.
+        drive(client, args, tenants, args.warmup, new_results())
+        started = time.perf_counter()
+        drive(client, args, tenants, args.duration, results)
+        elapsed = time.perf_counter() - started
+
+    summary = summarize(results, elapsed)
+    print(f"users={args.users} duration={elapsed:.1f}s total={sum(s['requests'] for s in summary.values())} "
+          f"req/s={sum(s['rps'] for s in summary.values()):.1f}")
+    print(f"{'endpoint':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6} {'errors':>7}")
+    for name, s in summary.items():
+        q = '-' if s['queries_per_request'] is None else f"{s['queries_per_request']:.1f}"
+        print(f"{name:<20} {s['rps']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} "
+              f"{q:>6} {s['errors']:>7}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.threshold)
+        if regressions:
+            print(f"FAIL: regressions beyond {args.threshold}%:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"OK: within {args.threshold}% of {args.baseline}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = sub.add_parser('seed', help='create and fill the synthetic tenant databases')
+    seed_parser.add_argument('--host', default=os.environ.get('MYSQL_HOST', 'localhost'))
+    seed_parser.add_argument('--user', default=os.environ.get('MYSQL_USER', 'root'))
+    seed_parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    seed_parser.add_argument('--tenants', type=int, default=2)
+    seed_parser.add_argument('--employees', type=int, default=1000)
+    seed_parser.add_argument('--jobs', type=int, default=2000)
+    seed_parser.add_argument('--promote-rows', type=int, default=2000)
+    seed_parser.add_argument('--emails-per-job', type=int, default=200)
+    seed_parser.add_argument('--achievements', type=int, default=40, help='per employee')
+    seed_parser.add_argument('--leaves', type=int, default=100, help='per employee')
+
+    run_parser = sub.add_parser('run', help='drive the traffic mix against a running server')
+    run_parser.add_argument('--url', default='http://127.0.0.1:5000')
+    run_parser.add_argument('--tenants', type=int, default=2)
+    run_parser.add_argument('--employees', type=int, default=1000, help='as seeded')
+    run_parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    run_parser.add_argument('--duration', type=float, default=30)
+    run_parser.add_argument('--warmup', type=float, default=5)
+    run_parser.add_argument('--think', type=float, default=0, help='mean think time in seconds')
+    run_parser.add_argument('--timeout', type=float, default=30)
+    run_parser.add_argument('--baseline', help='compare against this summary JSON')
+    run_parser.add_argument('--save-baseline', help='write this run\'s summary JSON here')
+    run_parser.add_argument('--threshold', type=float, default=10, help='allowed regression in percent')
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Concurrency stress test for leave booking.
+
+Many threads book one-day leaves for the same employee at once. With the
+atomic engine, the number of accepted bookings must equal the starting
+balance exactly. The legacy read-check-write flow is kept here to show the
+over-booking it allows under the same load.
+
+    python benchmarks/stress_leave_booking.py --threads 32 --attempts 20 --balance 100
+    python benchmarks/stress_leave_booking.py --mode legacy
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+import mysql.connector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leave_booking import LeaveBookingError, book_leave  # noqa: E402
+from records import RECORD_TABLES  # noqa: E402
+
+EMPLOYEE_ID = 'STRESS-1'
+LEAVE_TYPE = 'casual'
+
+
+def setup(args):
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.execute(f"USE `{args.database}`")
+    cursor.execute("DROP TABLE IF EXISTS t_leave_requests")
+    cursor.execute("DROP TABLE IF EXISTS t_employee_data")
+    cursor.execute("""
+        CREATE TABLE t_employee_data (
+            employee_id VARCHAR(64) PRIMARY KEY,
+            leave_balance TEXT,
+            manager_email VARCHAR(255)
+        )
+    """)
+    cursor.execute(RECORD_TABLES['t_leave_requests'])
+    balance = {LEAVE_TYPE: {'used': 0, 'remaining': args.balance}}
+    cursor.execute("INSERT INTO t_employee_data VALUES (%s, %s, NULL)", (EMPLOYEE_ID, json.dumps(balance)))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def legacy_book(conn, cursor, day):
+    # The pre-engine flow: read, check in Python, write back, insert.
+    cursor.execute("SELECT leave_balance FROM t_employee_data WHERE employee_id = %s", (EMPLOYEE_ID,))
+    balance = json.loads(cursor.fetchone()['leave_balance'])
+    if balance[LEAVE_TYPE]['remaining'] < 1:
+        conn.rollback()
+        raise LeaveBookingError("Insufficient leave balance", 400)
+    balance[LEAVE_TYPE]['used'] += 1
+    balance[LEAVE_TYPE]['remaining'] -= 1
+    cursor.execute("UPDATE t_employee_data SET leave_balance = %s WHERE employee_id = %s",
+                   (json.dumps(balance), EMPLOYEE_ID))
+    cursor.execute("""
+        INSERT INTO t_leave_requests (employee_id, start_date, end_date, leave_type, reason, status, request_date)
+        VALUES (%s, %s, %s, %s, 'stress', 'Pending', %s)
+    """, (EMPLOYEE_ID, day, day, LEAVE_TYPE, datetime.now()))
+    conn.commit()
+
+
+def worker(args, results, barrier):
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password,
+                                   database=args.database)
+    cursor = conn.cursor(dictionary=True)
+    barrier.wait()
+    for _ in range(args.attempts):
+        day = date(2030, 1, 1)
+        start = time.perf_counter()
+        try:
+            if args.mode == 'legacy':
+                legacy_book(conn, cursor, day)
+            else:
+                book_leave(conn, cursor, EMPLOYEE_ID, LEAVE_TYPE, day, day, 'stress', datetime.now())
+            outcome = 'accepted'
+        except LeaveBookingError:
+            outcome = 'rejected'
+        except mysql.connector.Error:
+            conn.rollback()
+            outcome = 'error'
+        results.append((outcome, (time.perf_counter() - start) * 1000))
+    cursor.close()
+    conn.close()
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=os.environ.get('MYSQL_HOST', 'localhost'))
+    parser.add_argument('--user', default=os.environ.get('MYSQL_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    parser.add_argument('--database', default='bench_leave')
+    parser.add_argument('--mode', choices=['atomic', 'legacy'], default='atomic')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=20)
+    parser.add_argument('--balance', type=int, default=100)
+    args = parser.parse_args()
+
+    setup(args)
+    results = []
+    barrier = threading.Barrier(args.threads)
+    threads = [threading.Thread(target=worker, args=(args, results, barrier)) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password,
+                                   database=args.database)
+    cursor = conn.cursor()
+    cursor.execute("SELECT leave_balance FROM t_employee_data WHERE employee_id = %s", (EMPLOYEE_ID,))
+    balance = json.loads(cursor.fetchone()[0])[LEAVE_TYPE]
+    cursor.execute("SELECT COALESCE(SUM(days), 0) FROM t_leave_requests WHERE employee_id = %s", (EMPLOYEE_ID,))
+    booked_days = int(cursor.fetchone()[0])
+    cursor.close()
+    conn.close()
+
+    accepted = sum(1 for outcome, _ in results if outcome == 'accepted')
+    errors = sum(1 for outcome, _ in results if outcome == 'error')
+    latencies = [ms for _, ms in results]
+    print(f"mode={args.mode} threads={args.threads} attempts={len(results)} elapsed={elapsed:.2f}s")
+    print(f"accepted={accepted} rejected={len(results) - accepted - errors} errors={errors}")
+    print(f"balance used={balance['used']} remaining={balance['remaining']} days recorded={booked_days}")
+    print(f"latency ms p50={statistics.median(latencies):.2f} p95={percentile(latencies, 95):.2f} "
+          f"p99={percentile(latencies, 99):.2f} max={max(latencies):.2f}")
+
+    overbooked = booked_days > args.balance or balance['remaining'] < 0 or booked_days != balance['used']
+    if overbooked:
+        print("FAIL: leave was over-booked or balance and requests disagree")
+        sys.exit(1)
+    print("OK: no over-booking")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class HashingUpload:
+    # File object handed to Werkzeug's multipart parser (see
+    # BlobRequest._get_file_stream). Upload chunks are written straight to a
+    # temp file next to the blob store and hashed as they arrive, so the body
+    # is neither buffered in memory nor read a second time to hash it.
+    def __init__(self, tmp_dir):
+        self._file = tempfile.NamedTemporaryFile(dir=tmp_dir, prefix='upload-')
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    @property
+    def name(self):
+        return self._file.name
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class BlobStore:
+    # Content-addressed storage for uploaded documents. Each distinct file is
+    # stored once under blobs/<2>/<2>/<sha256>; a SQLite table next to the
+    # blobs keeps a reference count per digest and the file is unlinked when
+    # the last reference is released. Reference changes run under SQLite's
+    # write lock so they stay consistent across worker processes.
+    def __init__(self, root):
+        self.root = os.path.join(root, 'blobs')
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.index_path = os.path.join(self.root, 'refs.sqlite3')
+        db = self._connect()
+        try:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL
+                )
+            """)
+        finally:
+            db.close()
+
+    def _connect(self):
+        db = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def new_upload(self):
+        return HashingUpload(self.tmp_dir)
+
+    def put(self, stream):
+        # Accepts a HashingUpload (already hashed while the request was
+        # parsed) or any readable stream, which is copied in CHUNK_SIZE pieces.
+        if isinstance(stream, HashingUpload):
+            upload = stream
+        else:
+            upload = self.new_upload()
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                upload.write(chunk)
+        upload.flush()
+        digest = upload.hexdigest()
+
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT refcount FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row:
+                db.execute("UPDATE blobs SET refcount = refcount + 1 WHERE digest = ?", (digest,))
+            else:
+                target = self.path(digest)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if not os.path.exists(target):
+                    try:
+                        os.link(upload.name, target)
+                    except OSError:
+                        shutil.copyfile(upload.name, target)
+                db.execute("INSERT INTO blobs (digest, size, refcount) VALUES (?, ?, 1)",
+                           (digest, upload.size))
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+            upload.close()
+        return digest
+
+    def release(self, digest):
+        if not digest:
+            return
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("UPDATE blobs SET refcount = refcount - 1 WHERE digest = ?", (digest,))
+            row = db.execute("SELECT refcount FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row and row[0] <= 0:
+                db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self.path(digest))
+                except FileNotFoundError:
+                    pass
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def stats(self):
+        db = self._connect()
+        try:
+            blobs, refs, size = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        finally:
+            db.close()
+        return {'blobs': blobs, 'references': refs, 'stored_bytes': size}
+
+
+# Columns linking rows to blobs. Rows written before the blob store have a
+# NULL digest and keep pointing at their legacy file in UPLOAD_FOLDER.
+BLOB_COLUMNS = {
+    'profiles': 'resume_blob',
+    't_certificates': 'blob_sha256',
+}
+
+
+def install_blob_columns(cursor):
+    for table, column in BLOB_COLUMNS.items():
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """, (table, column))
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} CHAR(64) NULL")
+
+
+def main():
+    from app1 import get_db_connection
+
+    parser = argparse.ArgumentParser(description='Prepare tenant tables for the upload blob store.')
+    parser.add_argument('companies', nargs='+', help='company database names')
+    args = parser.parse_args()
+
+    for company_name in args.companies:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor()
+        try:
+            install_blob_columns(cursor)
+            print(f"{company_name}: blob columns present")
+        finally:
+            cursor.close()
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
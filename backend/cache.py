@@ -0,0 +1,205 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    # Small thread-safe LRU cache whose entries also expire after ttl seconds.
+    #
+    # Readers that fill the cache from the database take token(key) before the
+    # read and pass it to set(): if the key was deleted in between, the row
+    # they read may predate the write that deleted it, and the set is skipped.
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = 0
+        self._deleted = OrderedDict()  # key -> clock at its last delete
+        self._forgotten = 0  # newest clock among deletes dropped from _deleted
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_sets = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def token(self, key):
+        with self._lock:
+            return self._clock
+
+    def set(self, key, value, token=None):
+        with self._lock:
+            if token is not None and max(self._deleted.get(key, 0), self._forgotten) > token:
+                self.stale_sets += 1
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._clock += 1
+            self._deleted[key] = self._clock
+            self._deleted.move_to_end(key)
+            while len(self._deleted) > self.maxsize:
+                # Losing a delete record only makes later sets more cautious
+                self._forgotten = max(self._forgotten, self._deleted.popitem(last=False)[1])
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'stale_sets': self.stale_sets,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Sets the value only if the key's version (bumped by every delete) is still
+# the one the reader saw before its database read.
+_SET_IF_UNCHANGED = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[3] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return 1
+"""
+
+
+class RedisCache:
+    # Same interface as TTLCache, backed by a Redis server shared by every
+    # worker process, so an invalidation in one worker is seen by all of them.
+    # Values are pickled; Redis enforces the TTL and evicts under its own
+    # maxmemory policy (configure allkeys-lru). Hit counters are per process.
+    # token()/set(token=) guard against the same stale refill as TTLCache,
+    # across processes, with a per-key version counter.
+    version_ttl = 86400
+
+    def __init__(self, client, namespace, ttl=60.0):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stale_sets = 0
+
+    def _key(self, key):
+        if isinstance(key, tuple):
+            key = ':'.join(str(part) for part in key)
+        return f"{self.namespace}:{key}"
+
+    def get(self, key, default=None):
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception:
+            # Redis being unavailable degrades to a miss, not a failed request
+            raw = None
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return pickle.loads(raw)
+
+    def _version_key(self, key):
+        return self._key(key) + ':version'
+
+    def token(self, key):
+        try:
+            version = self.client.get(self._version_key(key))
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return None
+        return (version or b'').decode()
+
+    def set(self, key, value, token=None):
+        try:
+            if token is None:
+                self.client.set(self._key(key), pickle.dumps(value), px=int(self.ttl * 1000))
+                return
+            stored = self.client.eval(_SET_IF_UNCHANGED, 2, self._key(key), self._version_key(key),
+                                      pickle.dumps(value), int(self.ttl * 1000), token)
+            if not stored:
+                with self._lock:
+                    self.stale_sets += 1
+        except Exception:
+            with self._lock:
+                self.errors += 1
+
+    def delete(self, key):
+        # A failed invalidation leaves the entry to expire after ttl
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(self._version_key(key))
+            pipe.expire(self._version_key(key), self.version_ttl)
+            pipe.delete(self._key(key))
+            pipe.execute()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.namespace}:*"):
+            self.client.delete(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'redis',
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'stale_sets': self.stale_sets,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def make_cache(namespace, maxsize, ttl, redis_url=None, local_ttl=None):
+    # Uses Redis when a URL is configured and the redis package is installed,
+    # otherwise a per-process TTLCache. Deletes in one process never reach the
+    # others' TTLCache, so local_ttl caps how long they can serve a stale entry.
+    if redis_url:
+        try:
+            import redis
+        except ImportError:
+            redis = None
+        if redis is not None:
+            return RedisCache(redis.Redis.from_url(redis_url), namespace, ttl=ttl)
+    if local_ttl is not None:
+        ttl = min(ttl, local_ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,251 @@
+import threading
+import time
+import weakref
+from collections import deque
+
+import mysql.connector
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    # Thin proxy around a mysql.connector connection. Routes keep calling
+    # conn.close() in their finally blocks; here that hands the connection
+    # back to its tenant pool instead of tearing down the socket. A proxy
+    # that is dropped without close() (a route that raised before reaching
+    # its finally) still gives its slot back when it is garbage collected.
+    def __init__(self, pool, raw, cursor_wrapper=None):
+        self._pool = pool
+        self._raw = raw
+        self._cursor_wrapper = cursor_wrapper
+        self._finalizer = weakref.finalize(self, pool.release, raw)
+
+    def cursor(self, *args, **kwargs):
+        if self._raw is None:
+            raise AttributeError("Connection already returned to pool (cursor)")
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._cursor_wrapper is not None:
+            cursor = self._cursor_wrapper(cursor)
+        return cursor
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise AttributeError(f"Connection already returned to pool ({name})")
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._raw is not None:
+            self._raw = None
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TenantPool:
+    def __init__(self, database, connect_kwargs, max_size, wait_timeout, ping_after):
+        self.database = database
+        self.connect_kwargs = dict(connect_kwargs, database=database)
+        self.host = self.connect_kwargs.get('host')
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.ping_after = ping_after
+        self.idle = deque()  # (raw connection, returned_at)
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.cond = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def acquire(self):
+        waited = None
+        with self.cond:
+            deadline = None
+            while not self.idle and self.in_use >= self.max_size:
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + self.wait_timeout
+                    waited = now
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"Timed out waiting for a connection to '{self.database}' "
+                        f"({self.max_size} in use)")
+                self.cond.wait(remaining)
+            if waited is not None:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - waited
+            self.in_use += 1
+            self.last_used = time.monotonic()
+            raw, returned_at = self.idle.pop() if self.idle else (None, None)
+            if raw is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        try:
+            if raw is not None:
+                # Only pay for a ping round trip when the socket has sat idle
+                # long enough that the server may have dropped it.
+                if time.monotonic() - returned_at > self.ping_after:
+                    raw.ping(reconnect=True, attempts=1)
+                return raw
+            return mysql.connector.connect(**self.connect_kwargs)
+        except Exception:
+            self._discard()
+            raise
+
+    def release(self, raw):
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self.cond:
+            self.in_use -= 1
+            self.last_used = time.monotonic()
+            self.idle.append((raw, self.last_used))
+            self.cond.notify()
+
+    def _discard(self, raw=None):
+        if raw is not None:
+            try:
+                raw.close()
+            except Exception:
+                pass
+        with self.cond:
+            self.in_use -= 1
+            self.cond.notify()
+
+    def close_idle(self, older_than=None):
+        now = time.monotonic()
+        closed = []
+        with self.cond:
+            keep = deque()
+            for raw, returned_at in self.idle:
+                if older_than is None or now - returned_at > older_than:
+                    closed.append(raw)
+                else:
+                    keep.append((raw, returned_at))
+            self.idle = keep
+        for raw in closed:
+            try:
+                raw.close()
+            except Exception:
+                pass
+        return len(closed)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'database': self.database,
+                'host': self.host,
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 6),
+                'timeouts': self.timeouts,
+            }
+
+
+class TenantPoolRegistry:
+    # One lazily created, bounded pool per company database (keyed by server
+    # and database, so tenants can live on different MySQL hosts). Pools of tenants
+    # that have not been used for idle_timeout seconds are closed and dropped
+    # so hundreds of company schemas do not pin server connections.
+    def __init__(self, connect_kwargs, max_per_tenant=10, wait_timeout=10.0,
+                 idle_timeout=300.0, ping_after=30.0, sweep_interval=30.0):
+        self.connect_kwargs = dict(connect_kwargs)
+        self.max_per_tenant = max_per_tenant
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.sweep_interval = sweep_interval
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted_tenants = 0
+        # Instrumentation hooks: wraps every cursor handed out, and receives
+        # the seconds each get_connection spent waiting/connecting.
+        self.cursor_wrapper = None
+        self.on_acquire = None
+
+    def _pool_for(self, database, host=None, port=None):
+        key = (host, port, database)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    connect_kwargs = dict(self.connect_kwargs)
+                    if host:
+                        connect_kwargs['host'] = host
+                    if port:
+                        connect_kwargs['port'] = port
+                    pool = TenantPool(database, connect_kwargs, self.max_per_tenant,
+                                      self.wait_timeout, self.ping_after)
+                    self._pools[key] = pool
+        return pool
+
+    def get_connection(self, database, host=None, port=None):
+        # host/port override the registry defaults (see tenants.Tenant)
+        start = time.perf_counter()
+        self._maybe_sweep()
+        pool = self._pool_for(database, host, port)
+        raw = pool.acquire()
+        if self.on_acquire is not None:
+            self.on_acquire(time.perf_counter() - start)
+        return PooledConnection(pool, raw, self.cursor_wrapper)
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        self.evict_idle()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            stale = [key for key, pool in self._pools.items()
+                     if pool.in_use == 0 and now - pool.last_used > self.idle_timeout]
+            pools = [self._pools.pop(key) for key in stale]
+            live = list(self._pools.values())
+        for pool in pools:
+            pool.close_idle()
+        self.evicted_tenants += len(pools)
+        # Active tenants still shed connections that have sat unused too long.
+        for pool in live:
+            pool.close_idle(older_than=self.idle_timeout)
+        return len(pools)
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close_idle()
+
+    def stats(self):
+        with self._lock:
+            pools = list(self._pools.values())
+        tenants = [pool.stats() for pool in pools]
+        totals = {key: sum(t[key] for t in tenants)
+                  for key in ('in_use', 'idle', 'hits', 'misses', 'waits', 'timeouts')}
+        totals['wait_seconds'] = round(sum(t['wait_seconds'] for t in tenants), 6)
+        totals['tenants'] = len(tenants)
+        totals['evicted_tenants'] = self.evicted_tenants
+        return {'totals': totals, 'tenants': tenants}
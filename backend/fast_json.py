@@ -0,0 +1,76 @@
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from werkzeug.http import http_date
+
+from instrumentation import count_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Output matches Flask's default JSON provider (sorted keys, HTTP dates,
+# Decimal/UUID as strings) so clients see the same payload as from jsonify.
+
+
+def _default(value):
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value):
+        return orjson.dumps(value, default=_default, option=_OPTIONS)
+else:
+    def dumps(value):
+        return json.dumps(value, default=_default, sort_keys=True, ensure_ascii=False,
+                          separators=(',', ':')).encode()
+
+
+def _raw(value):
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return None
+
+
+def _dumps_row(row, json_columns):
+    # JSON columns arrive from MySQL as text that is already valid JSON; they
+    # are spliced into the output as-is instead of being decoded and encoded
+    # again. Empty/NULL values go through the normal path.
+    raw = {}
+    for column in json_columns:
+        value = row.get(column)
+        if value and _raw(value) is not None:
+            raw[column] = _raw(value)
+    if not raw:
+        return dumps(row)
+    body = dumps({k: v for k, v in row.items() if k not in raw})
+    parts = [body[:-1]]
+    for column, value in raw.items():
+        if len(parts) > 1 or len(body) > 2:
+            parts.append(b',')
+        parts.append(dumps(column) + b':' + value)
+    parts.append(b'}')
+    return b''.join(parts)
+
+
+def dumps_row(row, json_columns=()):
+    body = _dumps_row(row, json_columns)
+    count_json('encode', len(body))
+    return body
+
+
+def dumps_rows(rows, json_columns=()):
+    body = b'[' + b','.join(_dumps_row(row, json_columns) for row in rows) + b']'
+    count_json('encode', len(body))
+    return body
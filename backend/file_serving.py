@@ -0,0 +1,49 @@
+import mimetypes
+import os
+from datetime import datetime, timezone
+
+from flask import Response, request, send_file
+
+# FILE_OFFLOAD selects who pushes document bytes to the client:
+#   ''            Flask/Werkzeug streams the file (default)
+#   'x-sendfile'  Apache/lighttpd: X-Sendfile header with the absolute path
+#   'x-accel'     nginx: X-Accel-Redirect to an internal location that maps
+#                 onto UPLOAD_FOLDER (FILE_OFFLOAD_PREFIX, e.g. /protected-uploads)
+# In every mode the response carries an ETag and Last-Modified, so a matching
+# If-None-Match / If-Modified-Since gets a 304 without any file I/O.
+OFFLOAD_MODES = ('', 'x-sendfile', 'x-accel')
+
+
+def serve_file(file_path, download_name, etag=None, as_attachment=False, mode='',
+               upload_root=None, accel_prefix='/protected-uploads', max_age=0):
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"Unknown FILE_OFFLOAD mode '{mode}'")
+
+    if mode == 'x-accel':
+        stat = os.stat(file_path)
+        relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(upload_root))
+        response = Response(status=200)
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{relative.replace(os.sep, '/')}"
+        response.mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        disposition = 'attachment' if as_attachment else 'inline'
+        response.headers.set('Content-Disposition', disposition, filename=download_name)
+        response.set_etag(etag or f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        response.last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        response.cache_control.private = True
+        response.cache_control.max_age = max_age
+        # nginx answers Range requests itself once it follows the redirect.
+        return response.make_conditional(request)
+
+    # send_file handles If-None-Match/If-Modified-Since (304) and Range (206)
+    # when conditional=True; with USE_X_SENDFILE it emits the header instead
+    # of a body.
+    response = send_file(
+        file_path,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=etag if etag else True,
+        max_age=max_age,
+    )
+    response.cache_control.private = True
+    return response
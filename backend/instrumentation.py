@@ -0,0 +1,271 @@
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, shared by every histogram.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by route'),
+    'db_query_duration_seconds': ('histogram', 'Query time (execute plus fetch) by statement fingerprint'),
+    'db_query_fingerprint_info': ('gauge', 'Normalized statement for each fingerprint'),
+    'db_connection_acquire_seconds': ('histogram', 'Time to get a connection from the tenant pool'),
+    'json_bytes_total': ('counter', 'Bytes passed through JSON encode/decode'),
+    'json_operations_total': ('counter', 'JSON encode/decode calls'),
+    'mail_send_seconds': ('histogram', 'Time to deliver one outbox batch over SMTP'),
+    'mail_messages_total': ('counter', 'Outbox messages by delivery result'),
+    'slow_requests_total': ('counter', 'Requests slower than the slow-request threshold'),
+    'login_attempts_total': ('counter', 'Login password checks by result'),
+    'password_verify_seconds': ('histogram', 'Time to check one password on the verify pool'),
+    'password_rehash_total': ('counter', 'Legacy or outdated password hashes upgraded after login'),
+}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    # Process-local counters and histograms rendered in the Prometheus text
+    # format. Under gunicorn each worker keeps its own numbers.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = defaultdict(Histogram)
+        self.counters = defaultdict(float)
+        self.fingerprints = {}
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.histograms[key].observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += amount
+
+    def render(self, gauges=()):
+        # gauges: (name, help, {labels}, value) snapshots supplied by the caller
+        lines = []
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self.histograms.items()}
+            counters = dict(self.counters)
+            fingerprints = dict(self.fingerprints)
+
+        by_name = defaultdict(list)
+        for (name, labels), value in histograms.items():
+            by_name[name].append((labels, value))
+        for (name, labels), value in counters.items():
+            by_name[name].append((labels, value))
+        for fingerprint, statement in fingerprints.items():
+            by_name['db_query_fingerprint_info'].append(
+                ((('fingerprint', fingerprint), ('statement', statement)), 1))
+
+        for name in sorted(by_name):
+            kind, help_text = METRICS.get(name, ('untyped', ''))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(by_name[name]):
+                if kind == 'histogram':
+                    counts, total, count = value
+                    for bound, n in zip(BUCKETS, counts):
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {n}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+                    lines.append(f"{name}_count{_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+
+        seen = set()
+        for name, help_text, labels, value in gauges:
+            if name not in seen:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                seen.add(name)
+            lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+metrics = Registry()
+
+_literal_re = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+_in_list_re = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+# A parenthesised group (one level of nested calls such as NOW() allowed)
+# repeated back to back, as in multi-row VALUES (...), (...), ...
+_repeated_tuple_re = re.compile(r"(\((?:[^()]|\([^()]*\))*\))(?:\s*,\s*\1)+")
+_space_re = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    # Placeholder lists and repeated row tuples of any length collapse to one
+    # form so IN (...) and multi-row VALUES queries do not create a
+    # fingerprint per batch size.
+    if isinstance(statement, bytes):
+        statement = statement.decode('utf-8', 'replace')
+    normalized = _space_re.sub(' ', statement).strip()
+    normalized = _literal_re.sub('?', normalized)
+    normalized = _in_list_re.sub('(%s, ...)', normalized)
+    normalized = _repeated_tuple_re.sub(r'\1, ...', normalized)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    if digest not in metrics.fingerprints:
+        with metrics._lock:
+            metrics.fingerprints.setdefault(digest, normalized[:300])
+    return digest
+
+
+class RequestTrace:
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.spans = []  # (kind, label, seconds)
+        self.queries = 0
+
+    def add(self, kind, label, seconds):
+        self.spans.append((kind, label, seconds))
+        if kind == 'query':
+            self.queries += 1
+
+    def breakdown(self, total):
+        totals = defaultdict(float)
+        for kind, _, seconds in self.spans:
+            totals[kind] += seconds
+        parts = [f"{kind}={seconds * 1000:.1f}ms" for kind, seconds in sorted(totals.items())]
+        parts.append(f"other={(total - sum(totals.values())) * 1000:.1f}ms")
+        slowest = sorted(self.spans, key=lambda span: span[2], reverse=True)[:10]
+        spans = "; ".join(f"{kind}:{label} {seconds * 1000:.1f}ms" for kind, label, seconds in slowest)
+        return " ".join(parts) + (f" | {spans}" if spans else '')
+
+
+_current = contextvars.ContextVar('request_trace', default=None)
+
+
+def begin_request(route):
+    trace = RequestTrace(route)
+    return trace, _current.set(trace)
+
+
+def end_request(trace, token, method, status, slow_threshold):
+    _current.reset(token)
+    total = time.perf_counter() - trace.started
+    metrics.observe('http_request_duration_seconds', total, method=method, route=trace.route, status=status)
+    if slow_threshold is not None and total >= slow_threshold:
+        metrics.inc('slow_requests_total', route=trace.route)
+        logger.warning("Slow request %s %s %s %.1fms queries=%d %s", method, trace.route, status,
+                       total * 1000, trace.queries, trace.breakdown(total))
+    return total
+
+
+def record(kind, label, seconds):
+    trace = _current.get()
+    if trace is not None:
+        trace.add(kind, label, seconds)
+
+
+def current_trace():
+    return _current.get()
+
+
+def observe_acquire(seconds):
+    metrics.observe('db_connection_acquire_seconds', seconds)
+    record('acquire', 'pool', seconds)
+
+
+def count_json(direction, size):
+    metrics.inc('json_bytes_total', size, direction=direction)
+    metrics.inc('json_operations_total', direction=direction)
+
+
+def observe_mail_batch(seconds, results):
+    metrics.observe('mail_send_seconds', seconds)
+    for error in results.values():
+        metrics.inc('mail_messages_total', result='sent' if error is None else 'failed')
+    record('mail', 'smtp', seconds)
+
+
+class InstrumentedCursor:
+    # Wraps a DB-API cursor handed out by the pool. Time spent in execute and
+    # in the fetches that follow it is charged to that statement's fingerprint.
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pending = None  # [fingerprint, seconds]
+
+    def _flush(self):
+        if self._pending is not None:
+            digest, seconds = self._pending
+            self._pending = None
+            metrics.observe('db_query_duration_seconds', seconds, fingerprint=digest)
+            record('query', digest, seconds)
+
+    def _timed(self, digest, fn, *args, **kwargs):
+        self._flush()
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._pending = [digest, time.perf_counter() - start]
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(fingerprint(operation), self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._timed(fingerprint(operation), self._cursor.executemany, operation, seq_params,
+                           *args, **kwargs)
+
+    def _fetch(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[1] += time.perf_counter() - start
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def close(self):
+        self._flush()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,271 @@
+import argparse
+import csv
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Side table mapping each invited email to the t_promote job it was invited
+# to, so "which jobs is this candidate invited to" is an index lookup instead
+# of a JSON_CONTAINS scan over every t_promote row. t_promote rows are
+# identified by job_id. The email column uses a binary collation so matching
+# stays exactly as strict as JSON_CONTAINS on the candidate_emails array.
+INVITE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS t_promote_invites (
+        email VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+        job_id INT NOT NULL,
+        comp_id INT NULL,
+        created_at DATETIME NULL,
+        PRIMARY KEY (email, job_id),
+        KEY idx_promote_invites_email_created (email, created_at),
+        KEY idx_promote_invites_job (job_id)
+    )
+"""
+
+_EXPAND_EMAILS = """
+    SELECT jt.email, {row}.job_id, {row}.comp_id, {row}.created_at
+    FROM JSON_TABLE({row}.candidate_emails, '$[*]' COLUMNS (email VARCHAR(255) PATH '$.email')) jt
+    WHERE jt.email IS NOT NULL
+"""
+
+# Writes to t_promote happen outside this service, so the side table is kept
+# in sync by triggers. Bulk writers that maintain t_promote_invites themselves
+# set @invite_sync_disabled = 1 for their session to skip the per-row rebuild.
+INVITE_TRIGGERS = {
+    't_promote_invites_ai': """
+        CREATE TRIGGER t_promote_invites_ai AFTER INSERT ON t_promote FOR EACH ROW
+        BEGIN
+            IF @invite_sync_disabled IS NULL THEN
+                INSERT IGNORE INTO t_promote_invites (email, job_id, comp_id, created_at)
+                """ + _EXPAND_EMAILS.format(row='NEW') + """;
+            END IF;
+        END
+    """,
+    't_promote_invites_au': """
+        CREATE TRIGGER t_promote_invites_au AFTER UPDATE ON t_promote FOR EACH ROW
+        BEGIN
+            IF @invite_sync_disabled IS NULL AND NOT (
+                OLD.job_id <=> NEW.job_id
+                AND OLD.comp_id <=> NEW.comp_id
+                AND OLD.created_at <=> NEW.created_at
+                AND OLD.candidate_emails <=> NEW.candidate_emails
+            ) THEN
+                DELETE FROM t_promote_invites WHERE job_id = OLD.job_id;
+                INSERT IGNORE INTO t_promote_invites (email, job_id, comp_id, created_at)
+                """ + _EXPAND_EMAILS.format(row='NEW') + """;
+            END IF;
+        END
+    """,
+    't_promote_invites_ad': """
+        CREATE TRIGGER t_promote_invites_ad AFTER DELETE ON t_promote FOR EACH ROW
+        BEGIN
+            IF @invite_sync_disabled IS NULL THEN
+                DELETE FROM t_promote_invites WHERE job_id = OLD.job_id;
+            END IF;
+        END
+    """,
+}
+
+CANDIDATE_INVITES_QUERY = """
+    SELECT p.*, c.comp_name
+    FROM t_promote_invites i
+    JOIN t_promote p ON p.job_id = i.job_id
+    JOIN t_company c ON p.comp_id = c.comp_id
+    WHERE i.email = %s
+"""
+
+_RECENT_INVITE_NOTIFICATIONS = """
+    SELECT 'job_application' as type, 'New Job Application' as title,
+           CONCAT('You have been invited to apply for the position of ', p.job_title) as message,
+           p.created_at as timestamp
+    FROM t_promote_invites i
+    JOIN t_promote p ON p.job_id = i.job_id
+    WHERE i.email = {email}
+    AND i.created_at > DATE_SUB(NOW(), INTERVAL 30 DAY)
+"""
+RECENT_INVITE_NOTIFICATIONS_QUERY = _RECENT_INVITE_NOTIFICATIONS.format(
+    email='(SELECT email FROM t_employee_data WHERE employee_id = %s)')
+# Same feed when the caller already knows the email (from the session token)
+RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY = _RECENT_INVITE_NOTIFICATIONS.format(email='%s')
+
+
+def install_invite_index(cursor):
+    cursor.execute(INVITE_TABLE_DDL)
+    for name, ddl in INVITE_TRIGGERS.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(ddl)
+
+
+def rebuild_invite_index(cursor):
+    cursor.execute("DELETE FROM t_promote_invites")
+    cursor.execute("""
+        INSERT IGNORE INTO t_promote_invites (email, job_id, comp_id, created_at)
+        SELECT jt.email, p.job_id, p.comp_id, p.created_at
+        FROM t_promote p,
+             JSON_TABLE(p.candidate_emails, '$[*]' COLUMNS (email VARCHAR(255) PATH '$.email')) jt
+        WHERE jt.email IS NOT NULL
+    """)
+    return cursor.rowcount
+
+
+class InviteImportError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def read_emails(lines, fmt, counts):
+    # lines: an iterable of bytes/str lines (a request stream or a file).
+    # fmt 'csv' takes the 'email' column when there is a header row, else
+    # the first column; 'ndjson' takes "email" strings or {"email": ...}
+    # objects. Blank lines are skipped, malformed entries counted in
+    # counts['invalid'].
+    text = (line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in lines)
+    if fmt == 'csv':
+        rows = csv.reader(text)
+        column = 0
+        for number, row in enumerate(rows):
+            if not row or not any(field.strip() for field in row):
+                continue
+            if number == 0 and '@' not in row[0]:
+                header = [field.strip().lower() for field in row]
+                column = header.index('email') if 'email' in header else 0
+                continue
+            yield _checked(row[column] if column < len(row) else '', counts)
+    else:
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError:
+                value = None
+            if isinstance(value, dict):
+                value = value.get('email')
+            yield _checked(value if isinstance(value, str) else '', counts)
+
+
+def _checked(email, counts):
+    email = email.strip()
+    if '@' not in email or len(email) > 255:
+        counts['invalid'] += 1
+        return None
+    return email
+
+
+def _import_chunk(conn, cursor, job_id, comp_id, created_at, emails):
+    # One transaction: lock the job row, drop emails already invited, then
+    # one multi-row insert into the index and one append to the JSON array.
+    # The triggers are switched off for the session because both sides are
+    # written here.
+    cursor.execute("SELECT job_id FROM t_promote WHERE job_id = %s FOR UPDATE", (job_id,))
+    placeholders = ', '.join(['%s'] * len(emails))
+    cursor.execute(f"""
+        SELECT email FROM t_promote_invites WHERE job_id = %s AND email IN ({placeholders})
+    """, (job_id, *emails))
+    existing = {row['email'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+    fresh = [email for email in emails if email not in existing]
+    if fresh:
+        cursor.execute(
+            "INSERT IGNORE INTO t_promote_invites (email, job_id, comp_id, created_at) VALUES "
+            + ', '.join(['(%s, %s, %s, %s)'] * len(fresh)),
+            [value for email in fresh for value in (email, job_id, comp_id, created_at)])
+        cursor.execute("""
+            UPDATE t_promote
+            SET candidate_emails = JSON_MERGE_PRESERVE(COALESCE(candidate_emails, JSON_ARRAY()), CAST(%s AS JSON))
+            WHERE job_id = %s
+        """, (json.dumps([{'email': email} for email in fresh]), job_id))
+    conn.commit()
+    return len(fresh)
+
+
+def import_invites(conn, cursor, job_id, lines, fmt='csv', chunk_size=1000):
+    # Invites the emails in a CSV/NDJSON stream (see read_emails) to an
+    # existing t_promote job, chunk_size at a time. Yields a progress dict after every chunk; the last one has
+    # done=True. Duplicates within the upload are dropped in memory, ones
+    # already invited by the per-chunk check.
+    cursor.execute("SELECT comp_id, created_at FROM t_promote WHERE job_id = %s", (job_id,))
+    job = cursor.fetchone()
+    if not job:
+        raise InviteImportError(f"Job {job_id} not found", 404)
+    comp_id, created_at = (job['comp_id'], job['created_at']) if isinstance(job, dict) else job
+
+    counts = {'invalid': 0}
+    progress = {'job_id': job_id, 'read': 0, 'duplicates': 0, 'already_invited': 0,
+                'invited': 0, 'chunks': 0, 'done': False}
+    seen = set()
+    chunk = []
+    started = time.perf_counter()
+
+    def flush():
+        invited = _import_chunk(conn, cursor, job_id, comp_id, created_at, chunk)
+        progress['invited'] += invited
+        progress['already_invited'] += len(chunk) - invited
+        progress['chunks'] += 1
+        chunk.clear()
+
+    def snapshot():
+        elapsed = time.perf_counter() - started
+        progress['invalid'] = counts['invalid']
+        progress['elapsed'] = round(elapsed, 3)
+        progress['rows_per_second'] = round(progress['read'] / elapsed, 1) if elapsed else None
+        return dict(progress)
+
+    cursor.execute("SET @invite_sync_disabled = 1")
+    try:
+        for email in read_emails(lines, fmt, counts):
+            progress['read'] += 1
+            if email is None:
+                continue
+            if email in seen:
+                progress['duplicates'] += 1
+                continue
+            seen.add(email)
+            chunk.append(email)
+            if len(chunk) >= chunk_size:
+                flush()
+                yield snapshot()
+        if chunk:
+            flush()
+        progress['done'] = True
+        result = snapshot()
+        logger.info("Imported invites for job %s: %s", job_id, result)
+        yield result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        # Pooled connections keep session variables; never hand one back
+        # with the triggers disabled.
+        cursor.execute("SET @invite_sync_disabled = NULL")
+
+
+def main():
+    from app1 import get_db_connection
+
+    parser = argparse.ArgumentParser(description='Maintain the t_promote candidate invite index.')
+    parser.add_argument('command', choices=['install', 'rebuild'],
+                        help='install: create table and triggers, then backfill; rebuild: backfill only')
+    parser.add_argument('companies', nargs='+', help='company database names')
+    args = parser.parse_args()
+
+    for company_name in args.companies:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor()
+        try:
+            if args.command == 'install':
+                install_invite_index(cursor)
+            rows = rebuild_invite_index(cursor)
+            conn.commit()
+            print(f"{company_name}: {rows} invite rows indexed")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+TEXT_COLUMNS = ('job_title', 'job_description', 'job_desc')
+
+# query parameter -> (candidate columns, match mode)
+FILTERS = {
+    'location': (('location', 'job_location'), 'contains'),
+    'department': (('department',), 'exact'),
+    'mode': (('mode',), 'contains'),
+    'experience': (('job_yrs_of_exp',), 'exact'),
+}
+
+MAX_PREFIX_EXPANSION = 200
+
+_token_re = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return _token_re.findall(str(text).lower())
+
+
+def _sort_key(job_id):
+    # Numeric ids sort numerically; anything else falls back to string order.
+    if isinstance(job_id, int):
+        return (0, job_id, '')
+    return (1, 0, str(job_id))
+
+
+def parse_cursor(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _column_value(row, columns):
+    for column in columns:
+        if column in row:
+            return row[column]
+    return None
+
+
+class JobIndex:
+    # Immutable inverted index over one tenant's t_jobs rows. Results are
+    # ordered newest first (descending job_id) and paged by keyset on job_id.
+    def __init__(self, rows, signature=None):
+        self.signature = signature
+        self.built_at = time.monotonic()
+        self.rows = {row['job_id']: row for row in rows}
+        self.ids = sorted(self.rows, key=_sort_key)
+        self.keys = [_sort_key(job_id) for job_id in self.ids]
+        self.position = {job_id: i for i, job_id in enumerate(self.ids)}
+        self.postings = {}
+        self.facets = {name: {} for name, (_, mode) in FILTERS.items() if mode == 'exact'}
+
+        for job_id, row in self.rows.items():
+            tokens = set()
+            for column in TEXT_COLUMNS:
+                tokens.update(tokenize(row.get(column)))
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(job_id)
+            for name, postings in self.facets.items():
+                value = _column_value(row, FILTERS[name][0])
+                if value is not None:
+                    postings.setdefault(str(value).strip().lower(), set()).add(job_id)
+        self.vocabulary = sorted(self.postings)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _prefix_matches(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_right(self.vocabulary, prefix + '\uffff', lo=start)
+        matches = set()
+        for token in self.vocabulary[start:min(end, start + MAX_PREFIX_EXPANSION)]:
+            matches |= self.postings[token]
+        return matches
+
+    def _candidates(self, query, filters):
+        sets = []
+        tokens = tokenize(query)
+        # Every term must match; the last one also matches as a prefix so
+        # results keep up with search-as-you-type input.
+        for i, token in enumerate(tokens):
+            if i == len(tokens) - 1:
+                sets.append(self._prefix_matches(token))
+            else:
+                sets.append(self.postings.get(token, set()))
+        for name, value in filters.items():
+            if name in self.facets:
+                sets.append(self.facets[name].get(value.strip().lower(), set()))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+    def _matches_filters(self, row, filters):
+        for name, value in filters.items():
+            columns, mode = FILTERS[name]
+            if mode != 'contains':
+                continue
+            field = _column_value(row, columns)
+            if field is None or value.lower() not in str(field).lower():
+                return False
+        return True
+
+    def search(self, query='', filters=None, cursor=None, limit=20, fields=None):
+        filters = {k: v for k, v in (filters or {}).items() if k in FILTERS and v}
+        candidates = self._candidates(query, filters)
+
+        if candidates is None:
+            positions = None
+            end = len(self.ids)
+        else:
+            positions = sorted(self.position[job_id] for job_id in candidates)
+            end = len(positions)
+        if cursor is not None:
+            # Keyset pagination: continue strictly below the last job_id seen.
+            boundary = bisect_left(self.keys, _sort_key(cursor))
+            end = boundary if positions is None else bisect_left(positions, boundary)
+
+        page = []
+        next_cursor = None
+        i = end - 1
+        while i >= 0:
+            job_id = self.ids[i if positions is None else positions[i]]
+            row = self.rows[job_id]
+            i -= 1
+            if not self._matches_filters(row, filters):
+                continue
+            if len(page) == limit:
+                next_cursor = page[-1]['job_id']
+                break
+            page.append(row)
+
+        if fields:
+            columns = ['job_id'] + [f for f in fields if f != 'job_id']
+            page = [{c: row[c] for c in columns if c in row} for row in page]
+        return page, next_cursor
+
+
+class JobIndexRegistry:
+    # Caches one JobIndex per tenant. After ttl seconds the cheap signature
+    # query is re-run and the index is only rebuilt if t_jobs changed (or the
+    # index is older than max_age, which catches in-place row edits).
+    def __init__(self, ttl=60.0, max_age=600.0, max_tenants=256):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_tenants = max_tenants
+        self._indexes = OrderedDict()
+        self._checked = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _tenant_lock(self, company_name):
+        with self._lock:
+            return self._locks.setdefault(company_name, threading.Lock())
+
+    def get(self, company_name, load_rows, load_signature):
+        now = time.monotonic()
+        with self._lock:
+            index = self._indexes.get(company_name)
+            if index is not None:
+                self._indexes.move_to_end(company_name)
+                if now - self._checked.get(company_name, 0) < self.ttl:
+                    return index
+
+        with self._tenant_lock(company_name):
+            with self._lock:
+                index = self._indexes.get(company_name)
+                if index is not None and time.monotonic() - self._checked.get(company_name, 0) < self.ttl:
+                    return index
+            signature = load_signature()
+            if (index is None or index.signature != signature
+                    or time.monotonic() - index.built_at > self.max_age):
+                index = JobIndex(load_rows(), signature)
+                self.builds += 1
+            with self._lock:
+                self._indexes[company_name] = index
+                self._indexes.move_to_end(company_name)
+                self._checked[company_name] = time.monotonic()
+                while len(self._indexes) > self.max_tenants:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    self._checked.pop(evicted, None)
+                    self._locks.pop(evicted, None)
+            return index
+
+    def invalidate(self, company_name):
+        with self._lock:
+            self._indexes.pop(company_name, None)
+            self._checked.pop(company_name, None)
@@ -0,0 +1,77 @@
+import json
+
+# Debit and validate in one statement: the WHERE clause only matches while
+# enough balance remains, and InnoDB's row lock on the UPDATE serializes
+# concurrent bookings for the same employee, so two requests can never both
+# spend the last days. JSON_SET sees the pre-update column value for both
+# paths, so used and remaining move together.
+DEBIT_QUERY = """
+    UPDATE t_employee_data
+    SET leave_balance = JSON_SET(leave_balance,
+                                 %(used)s, JSON_EXTRACT(leave_balance, %(used)s) + %(days)s,
+                                 %(remaining)s, JSON_EXTRACT(leave_balance, %(remaining)s) - %(days)s)
+    WHERE employee_id = %(employee_id)s
+    AND JSON_EXTRACT(leave_balance, %(remaining)s) >= %(days)s
+"""
+
+INSERT_REQUEST_QUERY = """
+    INSERT INTO t_leave_requests (employee_id, start_date, end_date, leave_type, reason, status, request_date)
+    VALUES (%s, %s, %s, %s, %s, 'Pending', %s)
+"""
+
+
+class LeaveBookingError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def balance_paths(leave_type):
+    # json.dumps quotes and escapes the member name exactly as a JSON path needs.
+    member = json.dumps(leave_type)
+    return f'$.{member}.used', f'$.{member}.remaining'
+
+
+def book_leave(conn, cursor, employee_id, leave_type, start_date, end_date, reason, requested_at):
+    # Two statements (debit, insert) in one transaction. The failure-path
+    # SELECT only runs to explain a rejected debit.
+    num_days = (end_date - start_date).days + 1
+    if num_days < 1:
+        raise LeaveBookingError("End date must not be before start date", 400)
+
+    used_path, remaining_path = balance_paths(leave_type)
+    try:
+        cursor.execute(DEBIT_QUERY, {
+            'used': used_path,
+            'remaining': remaining_path,
+            'days': num_days,
+            'employee_id': employee_id,
+        })
+        if cursor.rowcount != 1:
+            conn.rollback()
+            raise _debit_failure(cursor, employee_id, remaining_path)
+
+        cursor.execute(INSERT_REQUEST_QUERY, (employee_id, start_date, end_date, leave_type,
+                                              reason, requested_at))
+        request_id = cursor.lastrowid
+        conn.commit()
+        return request_id, num_days
+    except LeaveBookingError:
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _debit_failure(cursor, employee_id, remaining_path):
+    cursor.execute("""
+        SELECT JSON_EXTRACT(leave_balance, %s) AS remaining
+        FROM t_employee_data WHERE employee_id = %s
+    """, (remaining_path, employee_id))
+    row = cursor.fetchone()
+    if not row:
+        return LeaveBookingError("Employee not found", 404)
+    remaining = row['remaining'] if isinstance(row, dict) else row[0]
+    if remaining is None:
+        return LeaveBookingError("Unknown leave type", 400)
+    return LeaveBookingError("Insufficient leave balance", 400)
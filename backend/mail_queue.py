@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        subject TEXT NOT NULL,
+        sender TEXT,
+        recipients TEXT NOT NULL,
+        body TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claimed_by TEXT,
+        claimed_until REAL,
+        last_error TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class MailQueue:
+    # Durable outbox for outgoing mail. Request handlers only insert a row
+    # into a local SQLite file; worker threads claim due rows in batches,
+    # deliver each batch over one SMTP connection and retry failures with
+    # exponential backoff. Claims are leased, so several worker processes can
+    # share one outbox file and a crashed worker's batch is picked up again.
+    def __init__(self, path, deliver, workers=2, batch_size=25, max_attempts=8,
+                 base_delay=5.0, max_delay=900.0, poll_interval=1.0, lease=120.0):
+        self.path = path
+        self.deliver = deliver
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.sent = 0
+        self.failed_attempts = 0
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._pid = None
+        db = self._connect()
+        try:
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.row_factory = sqlite3.Row
+        return db
+
+    def enqueue(self, subject, recipients, body, sender=None):
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("""
+                INSERT INTO outbox (subject, sender, recipients, body, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (subject, sender, json.dumps(list(recipients)), body, now, now))
+        finally:
+            db.close()
+        self.start()
+        self._wake.set()
+
+    def start(self):
+        # Threads do not survive fork, so a pre-forked worker process starts
+        # its own dispatcher threads the first time it needs them.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"mail-dispatch-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def _run(self):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self._stop.is_set():
+            try:
+                batch = self.claim(worker_id)
+            except Exception:
+                logger.exception("Could not claim mail batch")
+                batch = []
+            if batch:
+                self._send(batch)
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def claim(self, worker_id):
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute("""
+                SELECT * FROM outbox
+                WHERE status = 'queued' AND next_attempt_at <= ?
+                AND (claimed_until IS NULL OR claimed_until < ?)
+                ORDER BY next_attempt_at
+                LIMIT ?
+            """, (now, now, self.batch_size)).fetchall()
+            if rows:
+                db.executemany("UPDATE outbox SET claimed_by = ?, claimed_until = ? WHERE id = ?",
+                               [(worker_id, now + self.lease, row['id']) for row in rows])
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+        return [dict(row, recipients=json.loads(row['recipients'])) for row in rows]
+
+    def _send(self, batch):
+        try:
+            results = self.deliver(batch)
+        except Exception as e:
+            # Typically the SMTP connection itself could not be opened.
+            results = {message['id']: e for message in batch}
+        self.record(batch, results)
+
+    def record(self, batch, results):
+        # results maps message id -> None (sent) or the delivery error
+        now = time.time()
+        done = [message['id'] for message in batch if results.get(message['id'], 'missing') is None]
+        retry = []
+        dead = []
+        for message in batch:
+            error = results.get(message['id'], 'not attempted')
+            if error is None:
+                continue
+            attempts = message['attempts'] + 1
+            if attempts >= self.max_attempts:
+                dead.append((attempts, str(error), message['id']))
+            else:
+                delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+                retry.append((attempts, now + delay, str(error), message['id']))
+
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in done])
+            db.executemany("""
+                UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?,
+                                  claimed_by = NULL, claimed_until = NULL
+                WHERE id = ?
+            """, retry)
+            db.executemany("""
+                UPDATE outbox SET status = 'dead', attempts = ?, last_error = ?,
+                                  claimed_by = NULL, claimed_until = NULL
+                WHERE id = ?
+            """, dead)
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+        self.sent += len(done)
+        self.failed_attempts += len(retry) + len(dead)
+        for attempts, error, message_id in dead:
+            logger.error("Giving up on mail %s after %s attempts: %s", message_id, attempts, error)
+
+    def depth(self):
+        db = self._connect()
+        try:
+            return db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'queued'").fetchone()[0]
+        finally:
+            db.close()
+
+    def stats(self):
+        db = self._connect()
+        try:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            oldest = db.execute("SELECT MIN(created_at) FROM outbox WHERE status = 'queued'").fetchone()[0]
+        finally:
+            db.close()
+        return {
+            'depth': counts.get('queued', 0),
+            'dead': counts.get('dead', 0),
+            'oldest_queued_age': round(time.time() - oldest, 3) if oldest else None,
+            'sent': self.sent,
+            'failed_attempts': self.failed_attempts,
+            'workers_running': sum(thread.is_alive() for thread in self._threads),
+        }
+
+    def requeue_dead(self):
+        db = self._connect()
+        try:
+            cursor = db.execute("""
+                UPDATE outbox SET status = 'queued', attempts = 0, next_attempt_at = ?
+                WHERE status = 'dead'
+            """, (time.time(),))
+            return cursor.rowcount
+        finally:
+            db.close()
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# One query per tenant per tick covers every subscribed employee: a digest of
+# the profile completion mask that drives notifications and of leave/termination
+# request state, plus the employee's recent invite count/latest time, which is
+# an index lookup on t_promote_invites.
+DIGEST_QUERY = """
+    SELECT e.employee_id,
+           MD5(CONCAT_WS('|', p.completion_mask,
+                         (SELECT GROUP_CONCAT(l.id, ':', l.status ORDER BY l.id)
+                          FROM t_leave_requests l WHERE l.employee_id = e.employee_id),
+                         (SELECT t.status FROM t_termination_requests t
+                          WHERE t.employee_id = e.employee_id))) AS profile_digest,
+           (SELECT CONCAT(COUNT(*), '|', COALESCE(MAX(i.created_at), ''))
+            FROM t_promote_invites i
+            WHERE i.email = e.email
+            AND i.created_at > DATE_SUB(NOW(), INTERVAL 30 DAY)) AS invite_digest
+    FROM t_employee_data e
+    LEFT JOIN profiles p ON e.employee_id = p.employee_id
+    WHERE e.employee_id IN ({placeholders})
+"""
+
+
+def notification_key(notification):
+    # Profile-completion rows are stamped NOW() on every read, so only invites
+    # are distinguished by timestamp.
+    if notification['type'] == 'job_application':
+        return (notification['type'], notification['message'], str(notification['timestamp']))
+    return (notification['type'], notification['message'])
+
+
+class Subscription:
+    # Events are queued for one client. With a loop, the queue is an
+    # asyncio.Queue fed from the watcher thread through that loop, so an async
+    # server can hold the stream without a thread per client.
+    def __init__(self, company_name, employee_id, loop=None):
+        self.company_name = company_name
+        self.employee_id = str(employee_id)
+        self.loop = loop
+        self.events = asyncio.Queue(maxsize=100) if loop is not None else queue.Queue(maxsize=100)
+        self.seen = None
+
+    def push(self, event, payload):
+        if self.loop is None:
+            self._put((event, payload))
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, (event, payload))
+        except RuntimeError:
+            # The server's loop has shut down; the stream is gone with it.
+            pass
+
+    def _put(self, item):
+        try:
+            self.events.put_nowait(item)
+        except (queue.Full, asyncio.QueueFull):
+            # A client this far behind gets a fresh snapshot instead.
+            self.seen = None
+
+
+class TenantWatcher(threading.Thread):
+    def __init__(self, hub, company_name):
+        super().__init__(name=f"notifications-{company_name}", daemon=True)
+        self.hub = hub
+        self.company_name = company_name
+        self.subscribers = set()
+        self.digests = {}
+        self.dirty = set()
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+
+    def run(self):
+        failures = 0
+        while True:
+            with self.hub.lock:
+                if not self.subscribers:
+                    self.hub.watchers.pop(self.company_name, None)
+                    return
+            self.wake.clear()
+            try:
+                self.tick()
+                failures = 0
+            except Exception:
+                failures += 1
+                logger.exception("Notification watcher for %s failed", self.company_name)
+            self.wake.wait(self.hub.interval * min(2 ** failures, 12))
+
+    def tick(self):
+        with self.hub.lock:
+            subscribers = list(self.subscribers)
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+        if not subscribers:
+            return
+
+        employee_ids = sorted({s.employee_id for s in subscribers})
+        conn = self.hub.get_connection(self.company_name)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(DIGEST_QUERY.format(placeholders=', '.join(['%s'] * len(employee_ids))),
+                           employee_ids)
+            digests = {str(row['employee_id']): (row['profile_digest'], row['invite_digest'])
+                       for row in cursor.fetchall()}
+
+            changed = {employee_id for employee_id in employee_ids
+                       if employee_id in dirty or digests.get(employee_id) != self.digests.get(employee_id)}
+            changed |= {s.employee_id for s in subscribers if s.seen is None}
+            self.digests = digests
+
+            feeds = {employee_id: self.hub.load_feed(cursor, employee_id) for employee_id in changed}
+        finally:
+            cursor.close()
+            conn.close()
+
+        for subscription in subscribers:
+            feed = feeds.get(subscription.employee_id)
+            if feed is None:
+                continue
+            keys = {notification_key(n) for n in feed}
+            if keys != subscription.seen:
+                # Always the whole feed, so reminders that were resolved or
+                # replaced drop out of the client's list as well.
+                subscription.push('snapshot', feed)
+            subscription.seen = keys
+
+
+class NotificationHub:
+    # Fans tenant-level change detection out to Server-Sent Events clients.
+    # Each tenant with at least one open stream gets a single watcher thread;
+    # clients only hold a queue and never query the database themselves.
+    def __init__(self, get_connection, load_feed, interval=15.0):
+        self.get_connection = get_connection
+        self.load_feed = load_feed
+        self.interval = interval
+        self.watchers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, company_name, employee_id, loop=None):
+        subscription = Subscription(company_name, employee_id, loop)
+        with self.lock:
+            watcher = self.watchers.get(company_name)
+            start = watcher is None
+            if start:
+                watcher = TenantWatcher(self, company_name)
+                self.watchers[company_name] = watcher
+            watcher.subscribers.add(subscription)
+        if start:
+            watcher.start()
+        else:
+            watcher.wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            watcher = self.watchers.get(subscription.company_name)
+            if watcher is not None:
+                watcher.subscribers.discard(subscription)
+
+    def notify(self, company_name, employee_id):
+        # Called by write routes so open streams update without waiting for
+        # the next tick. Free when nobody from the tenant is listening.
+        watcher = self.watchers.get(company_name)
+        if watcher is not None:
+            with watcher.lock:
+                watcher.dirty.add(str(employee_id))
+            watcher.wake.set()
+
+    def reset(self):
+        # For a freshly forked worker: watcher threads do not survive fork,
+        # so forget any inherited from the parent process.
+        self.watchers = {}
+        self.lock = threading.Lock()
+
+    def stats(self):
+        with self.lock:
+            return {company: len(w.subscribers) for company, w in self.watchers.items()}
+
+    def stream(self, subscription, serialize, heartbeat=20.0):
+        try:
+            while True:
+                try:
+                    event, payload = subscription.events.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {serialize(payload)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    async def astream(self, subscription, serialize, heartbeat=20.0):
+        # stream() for a subscription made with loop=: waits on the event
+        # loop instead of blocking a thread.
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(subscription.events.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {serialize(payload)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
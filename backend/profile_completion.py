@@ -0,0 +1,167 @@
+import argparse
+from datetime import datetime
+
+# Profile completeness as one bit per step, kept in profiles.completion_mask.
+# It is a STORED generated column, so MySQL recomputes it on every insert or
+# update of the row: every write route (profile, skills, education, resume
+# upload/delete) maintains it without extra code, and readers get it in a
+# single column read instead of re-running the CASE cascade and JSON_LENGTH
+# calls on each poll.
+#
+# Steps in the order the notification feed nags about them:
+# (bit, column, notification type, title, message)
+COMPLETION_STEPS = (
+    (1, 'mobile_number', 'profile_completion', 'Complete Your Profile',
+     'Please add your mobile number to complete your profile.'),
+    (2, 'department', 'profile_completion', 'Complete Your Profile',
+     'Please add your department to complete your profile.'),
+    (4, 'project_summary', 'profile_completion', 'Complete Your Profile',
+     'Please add a project summary to complete your profile.'),
+    (8, 'work_experience', 'profile_completion', 'Complete Your Profile',
+     'Please add your work experience to complete your profile.'),
+    (16, 'skills', 'skills_update', 'Update Your Skills',
+     'Add your key skills to improve your job matches.'),
+    (32, 'education', 'education_update', 'Update Your Education',
+     'Add your education details to complete your profile.'),
+    (64, 'resume_path', 'resume_upload', 'Upload Your Resume',
+     'Upload your resume to apply for jobs more easily.'),
+)
+COMPLETE_MASK = sum(step[0] for step in COMPLETION_STEPS)
+JSON_STEP_COLUMNS = ('skills', 'education')
+
+# Steps the dashboard's completion card shows
+PROFILE_TASK_COLUMNS = ('mobile_number', 'department', 'project_summary', 'work_experience')
+
+
+def _step_expression(bit, column):
+    if column in JSON_STEP_COLUMNS:
+        return f"IF(COALESCE(JSON_LENGTH({column}), 0) > 0, {bit}, 0)"
+    return f"IF({column} IS NOT NULL, {bit}, 0)"
+
+
+COMPLETION_MASK_EXPRESSION = ' + '.join(_step_expression(bit, column) for bit, column, *_ in COMPLETION_STEPS)
+
+# Incomplete profiles are those below COMPLETE_MASK, a range on this index.
+COMPLETION_COLUMN_DDL = (
+    f"ALTER TABLE profiles ADD COLUMN completion_mask TINYINT UNSIGNED "
+    f"AS ({COMPLETION_MASK_EXPRESSION}) STORED, "
+    f"ADD KEY idx_profiles_completion (completion_mask, employee_id)"
+)
+
+PROFILE_COMPLETION_QUERY = "SELECT completion_mask FROM profiles WHERE employee_id = %s"
+
+INCOMPLETE_PROFILES_QUERY = """
+    SELECT p.employee_id, p.completion_mask, e.first_name, e.last_name, e.email, e.manager_email
+    FROM profiles p
+    JOIN t_employee_data e ON e.employee_id = p.employee_id
+    WHERE p.completion_mask < %(complete)s
+    AND (p.completion_mask > %(mask)s OR (p.completion_mask = %(mask)s AND p.employee_id > %(employee_id)s))
+    ORDER BY p.completion_mask, p.employee_id
+    LIMIT %(limit)s
+"""
+
+INCOMPLETE_SUMMARY_QUERY = """
+    SELECT completion_mask, COUNT(*) AS profiles
+    FROM profiles
+    WHERE completion_mask < %s
+    GROUP BY completion_mask
+"""
+
+
+def _mask(row):
+    if row is None:
+        return None
+    return row['completion_mask'] if isinstance(row, dict) else row[0]
+
+
+def missing_steps(mask):
+    return [column for bit, column, *_ in COMPLETION_STEPS if not mask & bit]
+
+
+def completion(mask):
+    steps = {column: bool(mask & bit) for bit, column, *_ in COMPLETION_STEPS}
+    tasks = {column: steps[column] for column in PROFILE_TASK_COLUMNS}
+    return {
+        'mask': mask,
+        'steps': steps,
+        'score': round(100 * sum(steps.values()) / len(steps)),
+        'tasks': tasks,
+        'percentage': round(100 * sum(tasks.values()) / len(tasks)),
+    }
+
+
+def completion_notifications(rows, now=None):
+    # The feed entry for each PROFILE_COMPLETION_QUERY row: the first step
+    # still missing, or nothing for a complete profile.
+    notifications = []
+    for row in rows:
+        mask = _mask(row) or 0
+        for bit, _, kind, title, message in COMPLETION_STEPS:
+            if not mask & bit:
+                notifications.append({'type': kind, 'title': title, 'message': message,
+                                      'timestamp': now or datetime.now()})
+                break
+    return notifications
+
+
+def incomplete_profiles(cursor, after=None, limit=100):
+    # Keyset pages in index order; after is the previous page's next_cursor
+    # ("<mask>:<employee_id>").
+    mask, employee_id = -1, ''
+    if after:
+        mask, _, employee_id = after.partition(':')
+        mask = int(mask)
+    cursor.execute(INCOMPLETE_PROFILES_QUERY, {'complete': COMPLETE_MASK, 'mask': mask,
+                                               'employee_id': employee_id, 'limit': limit + 1})
+    rows = cursor.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last['completion_mask']}:{last['employee_id']}"
+    profiles = [dict(row, missing=missing_steps(row['completion_mask'])) for row in rows[:limit]]
+    return profiles, next_cursor
+
+
+def incomplete_summary(cursor):
+    # Profiles per missing step, aggregated from one GROUP BY over the index
+    cursor.execute(INCOMPLETE_SUMMARY_QUERY, (COMPLETE_MASK,))
+    missing = {column: 0 for _, column, *_ in COMPLETION_STEPS}
+    total = 0
+    for row in cursor.fetchall():
+        mask, count = (row['completion_mask'], row['profiles']) if isinstance(row, dict) else row
+        total += count
+        for column in missing_steps(mask):
+            missing[column] += count
+    return {'incomplete': total, 'missing': missing}
+
+
+def install_completion_column(cursor):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'profiles' AND column_name = 'completion_mask'
+    """)
+    if not cursor.fetchone()[0]:
+        cursor.execute(COMPLETION_COLUMN_DDL)
+
+
+def main():
+    from app1 import get_db_connection
+
+    parser = argparse.ArgumentParser(description='Add the profiles.completion_mask column and index.')
+    parser.add_argument('companies', nargs='+', help='company database names')
+    args = parser.parse_args()
+
+    for company_name in args.companies:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor()
+        try:
+            install_completion_column(cursor)
+            conn.commit()
+            print(f"{company_name}: completion_mask installed")
+        finally:
+            cursor.close()
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
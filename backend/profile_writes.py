@@ -0,0 +1,94 @@
+import json
+import threading
+
+# Request keys the profile write routes accept, and the profiles column each
+# one is stored in. Column names in the upsert below only ever come from here.
+PROFILE_FIELDS = {
+    'mobileNumber': 'mobile_number',
+    'department': 'department',
+    'projectSummary': 'project_summary',
+    'workExperience': 'work_experience',
+    'skills': 'skills',
+    'education': 'education',
+}
+# Fields written by PUT /api/profile (the profile form)
+PROFILE_FORM_FIELDS = ('mobileNumber', 'department', 'projectSummary', 'workExperience')
+JSON_COLUMNS = {'skills': list, 'education': dict}
+
+
+# A unique index on exactly (employee_id). A composite one does not stop two
+# rows for the same employee.
+PROFILE_UNIQUE_KEY_QUERY = """
+    SELECT index_name FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'profiles' AND non_unique = 0
+    GROUP BY index_name
+    HAVING COUNT(*) = 1 AND MAX(column_name) = 'employee_id'
+"""
+
+# Tenants whose profiles table has been seen to carry the key
+_keyed_tenants = set()
+_keyed_lock = threading.Lock()
+
+
+class ProfileWriteError(ValueError):
+    pass
+
+
+class ProfileSchemaError(Exception):
+    pass
+
+
+def profile_values(data, fields=None, partial=False, dumps=json.dumps):
+    # Maps a request body to {column: value}. With partial=True only the keys
+    # present in the body are written (PATCH); otherwise every field in
+    # fields is, with missing ones stored as NULL (PUT). JSON columns are
+    # encoded with dumps.
+    if not isinstance(data, dict):
+        raise ProfileWriteError("Request body must be a JSON object")
+    fields = fields or tuple(PROFILE_FIELDS)
+    if partial:
+        unknown = [key for key in data if key not in PROFILE_FIELDS]
+        if unknown:
+            raise ProfileWriteError(f"Unknown fields: {', '.join(unknown)}")
+        fields = [key for key in PROFILE_FIELDS if key in data]
+        if not fields:
+            raise ProfileWriteError("No fields to update")
+    values = {}
+    for key in fields:
+        column = PROFILE_FIELDS[key]
+        value = data.get(key)
+        if column in JSON_COLUMNS and value is not None:
+            if not isinstance(value, JSON_COLUMNS[column]):
+                raise ProfileWriteError(f"{key} must be a JSON {JSON_COLUMNS[column].__name__}")
+            value = dumps(value)
+        values[column] = value
+    return values
+
+
+def check_unique_key(cursor, tenant):
+    # Without the key, ON DUPLICATE KEY UPDATE never fires and every write
+    # adds another profiles row, so refuse to write instead. Checked on first
+    # use per tenant; a failed check is not remembered, so writes resume as
+    # soon as the migration has run.
+    if tenant in _keyed_tenants:
+        return
+    cursor.execute(PROFILE_UNIQUE_KEY_QUERY)
+    if not cursor.fetchall():
+        raise ProfileSchemaError(
+            f"profiles in '{tenant}' has no unique key on employee_id; run `python schema.py migrate "
+            f"{tenant}` (and resolve any duplicate profiles it reports) before writing profiles")
+    with _keyed_lock:
+        _keyed_tenants.add(tenant)
+
+
+def upsert_profile(cursor, tenant, employee_id, values):
+    # One round trip whether or not the employee has a profiles row yet:
+    # relies on the unique key on profiles.employee_id (schema.py migrate),
+    # which also makes concurrent first writes safe.
+    check_unique_key(cursor, tenant)
+    columns = list(values)
+    cursor.execute(f"""
+        INSERT INTO profiles (employee_id, {', '.join(columns)})
+        VALUES (%s, {', '.join(['%s'] * len(columns))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{column} = VALUES({column})' for column in columns)}
+    """, (employee_id, *values.values()))
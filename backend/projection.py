@@ -0,0 +1,74 @@
+from cache import TTLCache
+
+
+class ProjectionError(ValueError):
+    pass
+
+
+class Projection:
+    # Explicit column list for one endpoint. The selectable columns are read
+    # from information_schema per tenant (cached) so the SELECT never names a
+    # column a tenant's schema lacks; `exclude` columns are never returned,
+    # `optional` ones only when asked for by name in ?fields=. When two tables
+    # share a column name the last table listed wins, as it did with
+    # `SELECT e.*, p.*` through a dict cursor (dict(zip(names, row))); the
+    # key keeps its first position.
+    def __init__(self, tables, exclude=(), optional=(), json_columns=(), ttl=300.0):
+        self.tables = tables
+        self.exclude = set(exclude)
+        self.optional = set(optional)
+        self.json_columns = tuple(json_columns)
+        self._columns = TTLCache(maxsize=1024, ttl=ttl)
+
+    def columns_query(self):
+        names = [table for table, _ in self.tables]
+        return f"""
+            SELECT table_name AS table_name, column_name AS column_name
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name IN ({', '.join(['%s'] * len(names))})
+            ORDER BY ordinal_position
+        """, names
+
+    def cached_columns(self, company_name):
+        return self._columns.get(company_name)
+
+    def store_columns(self, company_name, rows):
+        found = {}
+        for row in rows:
+            found.setdefault(row['table_name'], []).append(row['column_name'])
+        columns = {}
+        for table, alias in self.tables:
+            for column in found.get(table, []):
+                if column not in self.exclude:
+                    columns[column] = f"{alias}.`{column}`"
+        self._columns.set(company_name, columns)
+        return columns
+
+    def columns(self, cursor, company_name):
+        # cached_columns/columns_query/store_columns let an async cursor
+        # (asgi.py) fill the same cache.
+        columns = self.cached_columns(company_name)
+        if columns is None:
+            cursor.execute(*self.columns_query())
+            columns = self.store_columns(company_name, cursor.fetchall())
+        return columns
+
+    def resolve(self, columns, fields=None):
+        if not fields:
+            return [c for c in columns if c not in self.optional]
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            raise ProjectionError(f"Unknown fields: {', '.join(unknown)}")
+        return list(dict.fromkeys(fields))
+
+    def build_select(self, columns, fields=None):
+        return ', '.join(columns[f] for f in self.resolve(columns, fields))
+
+    def select_list(self, cursor, company_name, fields=None):
+        return self.build_select(self.columns(cursor, company_name), fields)
+
+
+def parse_fields(value):
+    if not value:
+        return None
+    return [f.strip() for f in value.split(',') if f.strip()]
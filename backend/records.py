@@ -0,0 +1,250 @@
+import argparse
+import hashlib
+import json
+from datetime import datetime
+
+# Child tables replacing the achievements / certificates / leave_requests /
+# termination_request JSON blobs on profiles. Each add, edit or delete is a
+# single-row statement on an indexed key instead of a read-modify-write of
+# the whole blob. Dates the client sends as free text (achievement date and
+# quarter, last working date) stay strings so responses are unchanged.
+RECORD_TABLES = {
+    't_achievements': """
+        CREATE TABLE IF NOT EXISTS t_achievements (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(64) NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            date VARCHAR(32),
+            quarter VARCHAR(32),
+            KEY idx_achievements_employee (employee_id, id)
+        )
+    """,
+    't_certificates': """
+        CREATE TABLE IF NOT EXISTS t_certificates (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(64) NOT NULL,
+            filename VARCHAR(512) NOT NULL,
+            upload_date DATETIME(6) NOT NULL,
+            blob_sha256 CHAR(64) NULL,
+            KEY idx_certificates_employee (employee_id, id)
+        )
+    """,
+    't_leave_requests': """
+        CREATE TABLE IF NOT EXISTS t_leave_requests (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(64) NOT NULL,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            days INT AS (DATEDIFF(end_date, start_date) + 1) STORED,
+            leave_type VARCHAR(64) NOT NULL,
+            reason TEXT,
+            status VARCHAR(32) NOT NULL DEFAULT 'Pending',
+            request_date DATETIME(6) NOT NULL,
+            KEY idx_leave_requests_employee (employee_id, id),
+            KEY idx_leave_requests_status (status, employee_id)
+        )
+    """,
+    't_termination_requests': """
+        CREATE TABLE IF NOT EXISTS t_termination_requests (
+            employee_id VARCHAR(64) PRIMARY KEY,
+            reason TEXT,
+            reason_category VARCHAR(255),
+            last_working_date VARCHAR(32),
+            notice_period VARCHAR(64),
+            handover_notes TEXT,
+            status VARCHAR(32) NOT NULL DEFAULT 'Pending',
+            request_date DATETIME(6) NOT NULL,
+            KEY idx_termination_requests_status (status)
+        )
+    """,
+}
+
+
+def achievement_to_dict(row):
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'date': row['date'],
+        'quarter': row['quarter']
+    }
+
+
+def certificate_to_dict(row):
+    return {
+        'id': row['id'],
+        'filename': row['filename'],
+        'upload_date': row['upload_date'].isoformat()
+    }
+
+
+def leave_request_to_dict(row):
+    return {
+        "startDate": row['start_date'].isoformat(),
+        "endDate": row['end_date'].isoformat(),
+        "leaveType": row['leave_type'],
+        "reason": row['reason'],
+        "status": row['status'],
+        "requestDate": row['request_date'].isoformat()
+    }
+
+
+def _parse_timestamp(value):
+    if not value:
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+# Which profiles blobs have been copied, and as what content: a blob is only
+# re-read when it has changed since (old code still writing during the
+# switchover), so items deleted through the new routes are not brought back.
+BACKFILL_LOG_DDL = """
+    CREATE TABLE IF NOT EXISTS t_record_backfill (
+        employee_id VARCHAR(64) NOT NULL,
+        source VARCHAR(32) NOT NULL,
+        digest CHAR(40) NOT NULL,
+        PRIMARY KEY (employee_id, source)
+    )
+"""
+
+# profiles column -> child table
+BACKFILL_SOURCES = {
+    'achievements': 't_achievements',
+    'certificates': 't_certificates',
+    'leave_requests': 't_leave_requests',
+    'termination_request': 't_termination_requests',
+}
+
+# One legacy item per statement, skipped when the employee already has a row
+# with the same natural key (written by the new routes, or by an earlier run).
+BACKFILL_STATEMENTS = {
+    't_achievements': """
+        INSERT INTO t_achievements (employee_id, title, description, date, quarter)
+        SELECT %(employee_id)s, %(title)s, %(description)s, %(date)s, %(quarter)s FROM DUAL
+        WHERE NOT EXISTS (
+            SELECT 1 FROM t_achievements
+            WHERE employee_id = %(employee_id)s AND title <=> %(title)s AND description <=> %(description)s
+            AND date <=> %(date)s AND quarter <=> %(quarter)s
+        )
+    """,
+    't_certificates': """
+        INSERT INTO t_certificates (employee_id, filename, upload_date)
+        SELECT %(employee_id)s, %(filename)s, %(upload_date)s FROM DUAL
+        WHERE NOT EXISTS (
+            SELECT 1 FROM t_certificates WHERE employee_id = %(employee_id)s AND filename = %(filename)s
+        )
+    """,
+    't_leave_requests': """
+        INSERT INTO t_leave_requests (employee_id, start_date, end_date, leave_type, reason, status, request_date)
+        SELECT %(employee_id)s, %(start_date)s, %(end_date)s, %(leave_type)s, %(reason)s, %(status)s,
+               %(request_date)s FROM DUAL
+        WHERE NOT EXISTS (
+            SELECT 1 FROM t_leave_requests
+            WHERE employee_id = %(employee_id)s AND start_date = %(start_date)s AND end_date = %(end_date)s
+            AND leave_type = %(leave_type)s AND reason <=> %(reason)s
+        )
+    """,
+    # employee_id is the primary key: a request made through the new route wins
+    't_termination_requests': """
+        INSERT IGNORE INTO t_termination_requests (employee_id, reason, reason_category, last_working_date,
+                                                   notice_period, handover_notes, status, request_date)
+        VALUES (%(employee_id)s, %(reason)s, %(reason_category)s, %(last_working_date)s, %(notice_period)s,
+                %(handover_notes)s, %(status)s, %(request_date)s)
+    """,
+}
+
+
+def install_record_tables(cursor):
+    for ddl in RECORD_TABLES.values():
+        cursor.execute(ddl)
+    cursor.execute(BACKFILL_LOG_DDL)
+
+
+def _legacy_items(source, employee_id, blob):
+    items = json.loads(blob)
+    if source == 'achievements':
+        return [{'employee_id': employee_id, 'title': a.get('title', ''), 'description': a.get('description'),
+                 'date': a.get('date'), 'quarter': a.get('quarter')} for a in items]
+    if source == 'certificates':
+        return [{'employee_id': employee_id, 'filename': c['filename'],
+                 'upload_date': _parse_timestamp(c.get('upload_date'))} for c in items]
+    if source == 'leave_requests':
+        return [{'employee_id': employee_id, 'start_date': r['startDate'], 'end_date': r['endDate'],
+                 'leave_type': r['leaveType'], 'reason': r.get('reason'), 'status': r.get('status', 'Pending'),
+                 'request_date': _parse_timestamp(r.get('requestDate'))} for r in items]
+    return [{'employee_id': employee_id, 'reason': items.get('reason'),
+             'reason_category': items.get('reason_category'), 'last_working_date': items.get('last_working_date'),
+             'notice_period': items.get('notice_period'), 'handover_notes': items.get('handover_notes'),
+             'status': items.get('status', 'Pending'), 'request_date': _parse_timestamp(items.get('request_date'))}]
+
+
+def backfill_records(cursor, batch_size=500):
+    # Copies the profiles JSON blobs into the child tables, item by item. Safe
+    # to re-run at any point of the switchover: unchanged blobs are skipped,
+    # and items already present (by natural key) are never inserted twice.
+    # Rows get fresh ids; the old per-employee ids in the blobs were not
+    # unique anyway.
+    cursor.execute("SELECT employee_id, source, digest FROM t_record_backfill")
+    copied = {(str(employee_id), source): digest for employee_id, source, digest in cursor.fetchall()}
+    cursor.execute(f"SELECT employee_id, {', '.join(BACKFILL_SOURCES)} FROM profiles")
+    profiles = cursor.fetchall()
+
+    rows = {table: [] for table in RECORD_TABLES}
+    log = []
+    for employee_id, *blobs in profiles:
+        for source, blob in zip(BACKFILL_SOURCES, blobs):
+            if not blob:
+                continue
+            digest = hashlib.sha1(blob.encode() if isinstance(blob, str) else blob).hexdigest()
+            if copied.get((str(employee_id), source)) == digest:
+                continue
+            rows[BACKFILL_SOURCES[source]].extend(_legacy_items(source, employee_id, blob))
+            log.append((employee_id, source, digest))
+
+    counts = {}
+    for table, table_rows in rows.items():
+        inserted = 0
+        for start in range(0, len(table_rows), batch_size):
+            cursor.executemany(BACKFILL_STATEMENTS[table], table_rows[start:start + batch_size])
+            inserted += max(cursor.rowcount, 0)
+        counts[table] = inserted
+    for start in range(0, len(log), batch_size):
+        cursor.executemany("""
+            INSERT INTO t_record_backfill (employee_id, source, digest) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE digest = VALUES(digest)
+        """, log[start:start + batch_size])
+    return counts
+
+
+def main():
+    from app1 import get_db_connection
+
+    parser = argparse.ArgumentParser(description='Maintain the achievement/certificate/leave/termination tables.')
+    parser.add_argument('command', choices=['install', 'backfill'],
+                        help='install: create tables, then backfill; backfill: copy profiles JSON blobs only')
+    parser.add_argument('companies', nargs='+', help='company database names')
+    args = parser.parse_args()
+
+    for company_name in args.companies:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor()
+        try:
+            if args.command == 'install':
+                install_record_tables(cursor)
+            counts = backfill_records(cursor)
+            conn.commit()
+            print(f"{company_name}: " + ", ".join(f"{table}={n}" for table, n in counts.items()))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import argparse
+import sys
+
+from auth import install_password_column
+from blob_store import install_blob_columns
+from invites import install_invite_index, rebuild_invite_index
+from profile_completion import install_completion_column
+from records import install_record_tables
+
+# Indexes the routes depend on, as (table, name, columns, unique). An index is
+# only added when no existing one (primary key included) already starts with
+# the same columns, or for a unique one, is unique on exactly those columns,
+# so databases that were set up by hand are left alone.
+REQUIRED_INDEXES = (
+    ('t_employee_data', 'uq_employee_data_employee', ('employee_id',), True),
+    ('t_employee_data', 'idx_employee_data_email', ('email',), False),
+    ('t_employee_data', 'idx_employee_data_manager', ('manager_email',), False),
+    ('profiles', 'uq_profiles_employee', ('employee_id',), True),
+    ('t_jobs', 'idx_jobs_company', ('comp_id', 'job_id'), False),
+    ('t_promote', 'uq_promote_job', ('job_id',), True),
+    ('t_promote', 'idx_promote_created', ('created_at',), False),
+)
+
+# Access types in EXPLAIN output that read a whole table or index
+FULL_SCAN_TYPES = ('ALL', 'index')
+
+
+def _table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return bool(cursor.fetchone()[0])
+
+
+def _index_prefixes(cursor, table):
+    # {index name: (columns in order, unique)}
+    cursor.execute("""
+        SELECT index_name, column_name, non_unique
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for name, column, non_unique in cursor.fetchall():
+        columns, _ = indexes.get(name, ((), None))
+        indexes[name] = (columns + (column.lower(),), not non_unique)
+    return indexes
+
+
+def _duplicates(cursor, table, columns):
+    cursor.execute(f"""
+        SELECT {', '.join(columns)}, COUNT(*) FROM {table}
+        GROUP BY {', '.join(columns)} HAVING COUNT(*) > 1 LIMIT 5
+    """)
+    return cursor.fetchall()
+
+
+def ensure_indexes(cursor, log=print):
+    for table, name, columns, unique in REQUIRED_INDEXES:
+        if not _table_exists(cursor, table):
+            log(f"  {table}: missing table, skipped {name}")
+            continue
+        existing = _index_prefixes(cursor, table)
+        if unique:
+            # Only a unique index on exactly these columns enforces them; a
+            # wider one such as (employee_id, id) allows repeats.
+            covered = [index for index, (cols, is_unique) in existing.items() if is_unique and cols == columns]
+        else:
+            covered = [index for index, (cols, _) in existing.items() if cols[:len(columns)] == columns]
+        if covered:
+            continue
+        if unique:
+            duplicates = _duplicates(cursor, table, columns)
+            if duplicates:
+                # Never delete data here; the rows need a human decision.
+                log(f"  {table}: {name} not created, duplicate {', '.join(columns)}: "
+                    + ', '.join(str(row[0]) for row in duplicates))
+                continue
+        kind = 'UNIQUE KEY' if unique else 'KEY'
+        cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)})")
+        log(f"  {table}: added {name}")
+
+
+def migrate(cursor, log=print):
+    # Brings one tenant database up to date: the side tables and columns each
+    # feature module owns, then the indexes above. Every step checks before
+    # changing anything, so it is safe to run repeatedly.
+    install_password_column(cursor)
+    install_record_tables(cursor)
+    install_blob_columns(cursor)
+    fresh_invites = not _table_exists(cursor, 't_promote_invites')
+    install_invite_index(cursor)
+    if fresh_invites:
+        log(f"  t_promote_invites: indexed {rebuild_invite_index(cursor)} invites")
+    install_completion_column(cursor)
+    ensure_indexes(cursor, log)
+
+
+def route_queries():
+    # (route, statement, params) for the hot read paths. Params are built from
+    # a sample employee so EXPLAIN sees realistic values.
+    from app1 import COMPANY_JOBS_QUERY, INVITE_COUNT_QUERY, PROFILE_ROW_QUERY
+    from invites import (
+        CANDIDATE_INVITES_QUERY, RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY, RECENT_INVITE_NOTIFICATIONS_QUERY,
+    )
+    from notification_stream import DIGEST_QUERY
+    from profile_completion import COMPLETE_MASK, INCOMPLETE_PROFILES_QUERY, PROFILE_COMPLETION_QUERY
+    from team_review import PENDING_LEAVE_QUERY, PENDING_TERMINATION_QUERY
+
+    return (
+        ('login', "SELECT * FROM t_employee_data WHERE email = %s", lambda s: (s['email'],)),
+        ('profile', PROFILE_ROW_QUERY.format(columns='e.employee_id'), lambda s: (s['employee_id'],)),
+        ('company-jobs', COMPANY_JOBS_QUERY.format(columns='j.job_id'), lambda s: ()),
+        ('candidate-applications', CANDIDATE_INVITES_QUERY, lambda s: (s['email'],)),
+        ('notifications', RECENT_INVITE_NOTIFICATIONS_QUERY, lambda s: (s['employee_id'],)),
+        ('notifications (token)', RECENT_INVITE_NOTIFICATIONS_BY_EMAIL_QUERY, lambda s: (s['email'],)),
+        ('notifications (completion)', PROFILE_COMPLETION_QUERY, lambda s: (s['employee_id'],)),
+        ('notifications stream', DIGEST_QUERY.format(placeholders='%s'), lambda s: (s['employee_id'],)),
+        ('dashboard invite_count', INVITE_COUNT_QUERY, lambda s: (s['email'],)),
+        ('leave-requests', """
+            SELECT start_date, end_date, leave_type, reason, status, request_date
+            FROM t_leave_requests WHERE employee_id = %s ORDER BY id
+        """, lambda s: (s['employee_id'],)),
+        ('achievements', """
+            SELECT id, title, description, date, quarter
+            FROM t_achievements WHERE employee_id = %s ORDER BY id
+        """, lambda s: (s['employee_id'],)),
+        ('manager leave-requests', PENDING_LEAVE_QUERY, lambda s: (s['manager_email'], 0, 50)),
+        ('manager termination-requests', PENDING_TERMINATION_QUERY, lambda s: (s['manager_email'], '', 50)),
+        ('incomplete-profiles', INCOMPLETE_PROFILES_QUERY,
+         lambda s: {'complete': COMPLETE_MASK, 'mask': -1, 'employee_id': '', 'limit': 100}),
+    )
+
+
+def explain_routes(cursor, min_rows=100):
+    # Returns (route, problem) pairs: table scans over more than min_rows
+    # estimated rows, or statements that fail outright.
+    cursor.execute("SELECT employee_id, email, manager_email FROM t_employee_data LIMIT 1")
+    sample = cursor.fetchone()
+    if not sample:
+        return [('*', 't_employee_data is empty, nothing to explain')]
+    problems = []
+    for route, statement, params in route_queries():
+        try:
+            cursor.execute("EXPLAIN " + statement, params(sample))
+            plan = cursor.fetchall()
+        except Exception as e:
+            problems.append((route, f"EXPLAIN failed: {e}"))
+            continue
+        for step in plan:
+            if step['type'] in FULL_SCAN_TYPES and (step['rows'] or 0) > min_rows:
+                scan = 'full table scan' if step['type'] == 'ALL' else 'full index scan'
+                problems.append((route, f"{scan} on {step['table']} (~{step['rows']} rows, "
+                                        f"possible keys: {step['possible_keys'] or 'none'})"))
+    return problems
+
+
+def tenant_names(db_pool, directory):
+    # Every tenant the directory knows; without a directory, every database
+    # on the default server that has a t_employee_data table.
+    if hasattr(directory.source, 'names'):
+        return directory.source.names()
+    conn = db_pool.get_connection('information_schema')
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT table_schema FROM information_schema.tables
+            WHERE table_name = 't_employee_data' ORDER BY table_schema
+        """)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    from app1 import db_pool, get_db_connection, tenant_directory
+
+    parser = argparse.ArgumentParser(description='Create/migrate tenant schemas and check route query plans.')
+    parser.add_argument('command', choices=['migrate', 'check'],
+                        help='migrate: add missing tables, columns and indexes; '
+                             'check: EXPLAIN each route query and flag full scans')
+    parser.add_argument('companies', nargs='*', help='company names (default: every tenant)')
+    parser.add_argument('--min-rows', type=int, default=100,
+                        help='check: ignore scans of tables estimated below this many rows')
+    args = parser.parse_args()
+
+    companies = args.companies or tenant_names(db_pool, tenant_directory)
+    flagged = 0
+    for company_name in companies:
+        conn = get_db_connection(company_name)
+        cursor = conn.cursor(dictionary=args.command == 'check')
+        try:
+            print(f"{company_name}:")
+            if args.command == 'migrate':
+                migrate(cursor)
+                conn.commit()
+            else:
+                problems = explain_routes(cursor, args.min_rows)
+                for route, problem in problems:
+                    print(f"  {route}: {problem}")
+                flagged += len(problems)
+                if not problems:
+                    print("  all route queries use indexes")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    if flagged:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+# Production entry point: gunicorn with pre-forked worker processes, each
+# running a pool of threads. Configured entirely from the environment:
+#
+#   BIND / PORT                     listen address (default 0.0.0.0:5000)
+#   WEB_CONCURRENCY                 worker processes (default 2 * CPUs + 1)
+#   GUNICORN_THREADS                threads per worker (default 4)
+#   GUNICORN_PRELOAD                import the app once before forking (default true)
+#   GUNICORN_MAX_REQUESTS           recycle a worker after this many requests (default 2000, 0 = never)
+#   GUNICORN_MAX_REQUESTS_JITTER    random spread so workers do not recycle together (default 200)
+#   GUNICORN_TIMEOUT                seconds before a silent worker is killed (default 60)
+#   GUNICORN_GRACEFUL_TIMEOUT       seconds in-flight requests get on reload/shutdown (default 30)
+#   GUNICORN_KEEPALIVE              keep-alive seconds (default 5)
+#   GUNICORN_PIDFILE                pid file, for `kill -HUP $(cat ...)` reloads
+#   SERVE_MODE                      wsgi (app1.py, default) or asgi (asgi.py on uvicorn workers)
+#   NOTIFICATION_STREAMS_PER_WORKER wsgi: open notification streams per worker (default 2)
+#
+# Every open tab holds a notification stream (Header.js). Under gthread each
+# stream pins one of the GUNICORN_THREADS threads for as long as the tab is
+# open, so wsgi mode caps them per worker and further tabs poll instead; keep
+# GUNICORN_THREADS above the cap. To stream to every tab, run a second server
+# with SERVE_MODE=asgi, where streams wait on the event loop without a thread,
+# and have the proxy send /api/notifications/*/*/stream to it, or serve the
+# whole app in asgi mode.
+#
+# `kill -HUP <master>` starts fresh workers and retires the old ones after
+# they finish their requests. With preload on, HUP reuses the code loaded in
+# the master; to roll out new code send USR2 (start a new master), then
+# WINCH and QUIT to the old one.
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def post_fork(server, worker):
+    # Sockets, threads and locks inherited from the master are not usable in
+    # the child; give each worker its own.
+    from app1 import authenticator, db_pool, mail_queue, notification_hub
+
+    db_pool.close_all()
+    notification_hub.reset()
+    authenticator.reset()
+    mail_queue.start()
+
+
+def build_options():
+    asgi = os.environ.get('SERVE_MODE', 'wsgi') == 'asgi'
+    threads = env_int('GUNICORN_THREADS', 4)
+    if asgi:
+        worker_class = 'uvicorn.workers.UvicornWorker'
+    else:
+        worker_class = 'gthread' if threads > 1 else 'sync'
+        streams = env_int('NOTIFICATION_STREAMS_PER_WORKER', 2)
+        if streams >= threads:
+            raise SystemExit(f"NOTIFICATION_STREAMS_PER_WORKER ({streams}) must be below "
+                             f"GUNICORN_THREADS ({threads}), or open tabs can take every thread")
+    return {
+        'bind': os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}"),
+        'workers': env_int('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1),
+        'threads': threads,
+        'worker_class': worker_class,
+        'preload_app': env_bool('GUNICORN_PRELOAD', True),
+        'max_requests': env_int('GUNICORN_MAX_REQUESTS', 2000),
+        'max_requests_jitter': env_int('GUNICORN_MAX_REQUESTS_JITTER', 200),
+        'timeout': env_int('GUNICORN_TIMEOUT', 60),
+        'graceful_timeout': env_int('GUNICORN_GRACEFUL_TIMEOUT', 30),
+        'keepalive': env_int('GUNICORN_KEEPALIVE', 5),
+        'pidfile': os.environ.get('GUNICORN_PIDFILE'),
+        'accesslog': os.environ.get('GUNICORN_ACCESSLOG', '-'),
+        'post_fork': post_fork,
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        if os.environ.get('SERVE_MODE', 'wsgi') == 'asgi':
+            from asgi import application
+            return application
+        from app1 import app
+        return app
+
+
+def main():
+    Server(build_options()).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+from leave_booking import balance_paths
+
+# Manager-side views over t_leave_requests and t_termination_requests. A
+# manager's team is every employee whose t_employee_data.manager_email is the
+# manager's email; all filtering, paging and totals happen in SQL.
+
+PENDING_LEAVE_QUERY = """
+    SELECT r.id, r.employee_id, e.first_name, e.last_name, r.start_date, r.end_date, r.days,
+           r.leave_type, r.reason, r.request_date
+    FROM t_leave_requests r
+    JOIN t_employee_data e ON e.employee_id = r.employee_id
+    WHERE e.manager_email = %s AND r.status = 'Pending' AND r.id > %s
+    ORDER BY r.id
+    LIMIT %s
+"""
+
+PENDING_LEAVE_SUMMARY_QUERY = """
+    SELECT r.leave_type, COUNT(*) AS requests, COUNT(DISTINCT r.employee_id) AS employees,
+           SUM(r.days) AS days
+    FROM t_leave_requests r
+    JOIN t_employee_data e ON e.employee_id = r.employee_id
+    WHERE e.manager_email = %s AND r.status = 'Pending'
+    GROUP BY r.leave_type
+    ORDER BY r.leave_type
+"""
+
+PENDING_TERMINATION_QUERY = """
+    SELECT t.employee_id, e.first_name, e.last_name, t.reason, t.reason_category, t.last_working_date,
+           t.notice_period, t.handover_notes, t.request_date
+    FROM t_termination_requests t
+    JOIN t_employee_data e ON e.employee_id = t.employee_id
+    WHERE e.manager_email = %s AND t.status = 'Pending' AND t.employee_id > %s
+    ORDER BY t.employee_id
+    LIMIT %s
+"""
+
+# Booking debits the balance up front, so rejecting hands the days back: one
+# UPDATE per leave type, each crediting every affected employee with the sum
+# of their rejected days of that type.
+RESTORE_BALANCE_QUERY = """
+    UPDATE t_employee_data e
+    JOIN (
+        SELECT employee_id, SUM(days) AS days
+        FROM t_leave_requests
+        WHERE id IN ({placeholders}) AND leave_type = %s
+        GROUP BY employee_id
+    ) r ON r.employee_id = e.employee_id
+    SET e.leave_balance = JSON_SET(e.leave_balance,
+                                   %s, JSON_EXTRACT(e.leave_balance, %s) - r.days,
+                                   %s, JSON_EXTRACT(e.leave_balance, %s) + r.days)
+"""
+
+
+class ReviewError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _value(row, column, index):
+    return row[column] if isinstance(row, dict) else row[index]
+
+
+def pending_leave(cursor, manager_email, after=0, limit=50):
+    cursor.execute(PENDING_LEAVE_QUERY, (manager_email, after or 0, limit + 1))
+    rows = cursor.fetchall()
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    cursor.execute(PENDING_LEAVE_SUMMARY_QUERY, (manager_email,))
+    summary = [dict(row, days=int(row['days'] or 0)) for row in cursor.fetchall()]
+    return rows[:limit], next_cursor, summary
+
+
+def pending_terminations(cursor, manager_email, after='', limit=50):
+    cursor.execute(PENDING_TERMINATION_QUERY, (manager_email, after or '', limit + 1))
+    rows = cursor.fetchall()
+    next_cursor = rows[limit - 1]['employee_id'] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def review_leave(conn, cursor, manager_email, request_ids, approve):
+    # One transaction for the whole batch. Only pending requests from the
+    # manager's own team are touched; the rest are reported as skipped.
+    if not request_ids:
+        raise ReviewError("No request ids given", 400)
+    try:
+        cursor.execute(f"""
+            SELECT r.id, r.employee_id, r.leave_type
+            FROM t_leave_requests r
+            JOIN t_employee_data e ON e.employee_id = r.employee_id
+            WHERE r.id IN ({_placeholders(request_ids)}) AND r.status = 'Pending' AND e.manager_email = %s
+            FOR UPDATE
+        """, (*request_ids, manager_email))
+        rows = cursor.fetchall()
+        ids = [_value(row, 'id', 0) for row in rows]
+        employees = sorted({str(_value(row, 'employee_id', 1)) for row in rows})
+        if ids and not approve:
+            for leave_type in sorted({_value(row, 'leave_type', 2) for row in rows}):
+                used_path, remaining_path = balance_paths(leave_type)
+                cursor.execute(RESTORE_BALANCE_QUERY.format(placeholders=_placeholders(ids)),
+                               (*ids, leave_type, used_path, used_path, remaining_path, remaining_path))
+        if ids:
+            cursor.execute(f"UPDATE t_leave_requests SET status = %s WHERE id IN ({_placeholders(ids)})",
+                           ('Approved' if approve else 'Rejected', *ids))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    reviewed = set(ids)
+    return {
+        'reviewed': ids,
+        'skipped': [i for i in request_ids if i not in reviewed],
+        'employees': employees,
+    }
+
+
+def review_terminations(conn, cursor, manager_email, employee_ids, approve):
+    if not employee_ids:
+        raise ReviewError("No employee ids given", 400)
+    try:
+        cursor.execute(f"""
+            SELECT t.employee_id
+            FROM t_termination_requests t
+            JOIN t_employee_data e ON e.employee_id = t.employee_id
+            WHERE t.employee_id IN ({_placeholders(employee_ids)}) AND t.status = 'Pending'
+            AND e.manager_email = %s
+            FOR UPDATE
+        """, (*employee_ids, manager_email))
+        ids = [str(_value(row, 'employee_id', 0)) for row in cursor.fetchall()]
+        if ids:
+            cursor.execute(f"""
+                UPDATE t_termination_requests SET status = %s WHERE employee_id IN ({_placeholders(ids)})
+            """, ('Approved' if approve else 'Rejected', *ids))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    reviewed = set(ids)
+    return {
+        'reviewed': ids,
+        'skipped': [i for i in employee_ids if i not in reviewed],
+        'employees': ids,
+    }
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+from cache import TTLCache
+
+# Where a company's data lives. host/port None means the default MySQL server
+# from app1's connection settings.
+Tenant = namedtuple('Tenant', 'company_name host port database shard')
+
+# Company names become database names; anything else is rejected up front.
+TENANT_NAME_RE = re.compile(r'^[A-Za-z0-9_$-]{1,64}$')
+
+
+class UnknownTenant(Exception):
+    def __init__(self, company_name):
+        super().__init__(f"Unknown company '{company_name}'")
+        self.company_name = company_name
+
+
+class PassthroughSource:
+    # No directory configured: every well-formed name is a database of the
+    # same name on the default server (the original behaviour).
+    def lookup(self, company_name):
+        return Tenant(company_name, None, None, company_name, 'default')
+
+
+class FileSource:
+    # JSON file, re-read when its mtime changes:
+    #   {"shards":  {"default": {}, "big": {"host": "db2", "port": 3306}},
+    #    "tenants": {"acme": {"shard": "big"}, "globex": {"database": "globex_prod"}}}
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._tenants = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path) as f:
+                config = json.load(f)
+            shards = config.get('shards', {})
+            tenants = {}
+            for company_name, entry in config.get('tenants', {}).items():
+                shard = entry.get('shard', 'default')
+                server = shards.get(shard, {})
+                tenants[company_name] = Tenant(company_name, server.get('host'), server.get('port'),
+                                               entry.get('database', company_name), shard)
+            self._tenants = tenants
+            self._mtime = mtime
+
+    def lookup(self, company_name):
+        self._load()
+        return self._tenants.get(company_name)
+
+    def names(self):
+        self._load()
+        return sorted(self._tenants)
+
+
+DIRECTORY_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS tenant_directory (
+        company_name VARCHAR(64) PRIMARY KEY,
+        db_name VARCHAR(64) NOT NULL,
+        db_host VARCHAR(255) NULL,
+        db_port INT NULL,
+        shard VARCHAR(64) NOT NULL DEFAULT 'default',
+        active TINYINT(1) NOT NULL DEFAULT 1
+    )
+"""
+
+
+class MasterDBSource:
+    # tenant_directory table in a master database, one indexed lookup per
+    # cache miss. get_connection(database) must not go through the
+    # directory itself (app1 passes the raw pool).
+    def __init__(self, get_connection, database):
+        self.get_connection = get_connection
+        self.database = database
+
+    def lookup(self, company_name):
+        conn = self.get_connection(self.database)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT company_name, db_host, db_port, db_name, shard
+                FROM tenant_directory
+                WHERE company_name = %s AND active = 1
+            """, (company_name,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if not row:
+            return None
+        return Tenant(row['company_name'], row['db_host'], row['db_port'], row['db_name'], row['shard'])
+
+    def names(self):
+        conn = self.get_connection(self.database)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT company_name FROM tenant_directory WHERE active = 1 ORDER BY company_name")
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+
+class TenantDirectory:
+    # Resolves company names through a source and caches the answer:
+    # known tenants for ttl seconds, unknown ones for negative_ttl, so a
+    # stream of requests for a bad name costs no database round trips.
+    def __init__(self, source, ttl=300.0, negative_ttl=30.0, maxsize=10000):
+        self.source = source
+        self._known = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._unknown = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+
+    def cached(self, company_name):
+        # Cache-only lookup for async callers; None means "ask resolve()".
+        if not TENANT_NAME_RE.match(company_name or '') or self._unknown.get(company_name):
+            raise UnknownTenant(company_name)
+        return self._known.get(company_name)
+
+    def resolve(self, company_name):
+        tenant = self.cached(company_name)
+        if tenant is None:
+            tenant = self.source.lookup(company_name)
+            if tenant is None:
+                self._unknown.set(company_name, True)
+                raise UnknownTenant(company_name)
+            self._known.set(company_name, tenant)
+        return tenant
+
+    def invalidate(self, company_name):
+        self._known.delete(company_name)
+        self._unknown.delete(company_name)
+
+    def stats(self):
+        return {
+            'source': type(self.source).__name__,
+            'known': self._known.stats(),
+            'unknown': self._unknown.stats(),
+        }
+
+
+def build_directory(get_connection, ttl=300.0, negative_ttl=30.0):
+    # TENANT_DIRECTORY_FILE wins over TENANT_DIRECTORY_DB; with neither set
+    # company names map straight to databases.
+    if os.environ.get('TENANT_DIRECTORY_FILE'):
+        source = FileSource(os.environ['TENANT_DIRECTORY_FILE'])
+    elif os.environ.get('TENANT_DIRECTORY_DB'):
+        source = MasterDBSource(get_connection, os.environ['TENANT_DIRECTORY_DB'])
+    else:
+        source = PassthroughSource()
+    return TenantDirectory(source, ttl=ttl, negative_ttl=negative_ttl)
+
+
+def main():
+    from app1 import db_pool
+
+    parser = argparse.ArgumentParser(description='Maintain the tenant_directory table in the master database.')
+    parser.add_argument('--master', default=os.environ.get('TENANT_DIRECTORY_DB'),
+                        help='master database name (default: TENANT_DIRECTORY_DB)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('install', help='create the tenant_directory table')
+    add = sub.add_parser('add', help='register or move a company')
+    add.add_argument('company')
+    add.add_argument('--database', help='database name (default: the company name)')
+    add.add_argument('--host')
+    add.add_argument('--port', type=int)
+    add.add_argument('--shard', default='default')
+    remove = sub.add_parser('disable', help='stop serving a company')
+    remove.add_argument('company')
+    sub.add_parser('list', help='print the directory')
+    args = parser.parse_args()
+    if not args.master:
+        parser.error('--master or TENANT_DIRECTORY_DB is required')
+
+    conn = db_pool.get_connection(args.master)
+    cursor = conn.cursor()
+    try:
+        if args.command == 'install':
+            cursor.execute(DIRECTORY_TABLE_DDL)
+        elif args.command == 'add':
+            if not TENANT_NAME_RE.match(args.company):
+                parser.error(f"invalid company name '{args.company}'")
+            cursor.execute("""
+                INSERT INTO tenant_directory (company_name, db_name, db_host, db_port, shard, active)
+                VALUES (%s, %s, %s, %s, %s, 1)
+                ON DUPLICATE KEY UPDATE db_name = VALUES(db_name), db_host = VALUES(db_host),
+                                        db_port = VALUES(db_port), shard = VALUES(shard), active = 1
+            """, (args.company, args.database or args.company, args.host, args.port, args.shard))
+        elif args.command == 'disable':
+            cursor.execute("UPDATE tenant_directory SET active = 0 WHERE company_name = %s", (args.company,))
+        elif args.command == 'list':
+            cursor.execute("""
+                SELECT company_name, db_name, db_host, db_port, shard, active
+                FROM tenant_directory ORDER BY shard, company_name
+            """)
+            for row in cursor.fetchall():
+                print("\t".join('' if v is None else str(v) for v in row))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
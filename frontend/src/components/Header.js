@@ -11,6 +11,7 @@ import {
   DropdownMenuTrigger,
 } from "./ui/dropdown-menu"
 import { SidebarTrigger } from './ui/sidebar'
+import { authHeaders, withToken } from '../lib/utils'
 
 const Header = () => {
   const navigate = useNavigate()
@@ -20,29 +21,52 @@ const Header = () => {
   const [unreadNotifications, setUnreadNotifications] = useState([]);
 
   useEffect(() => {
-    const fetchNotifications = async () => {
-      const employeeId = localStorage.getItem('employeeId');
-      const companyName = localStorage.getItem('companyName');
-      if (employeeId && companyName) {
-        try {
-          const response = await fetch(`http://localhost:5000/api/notifications/${companyName}/${employeeId}`);
-          if (response.ok) {
-            const data = await response.json();
-            const lastReadTimestamp = localStorage.getItem('lastReadNotificationTimestamp') || '0';
-            const unread = data.filter(notification => new Date(notification.timestamp) > new Date(lastReadTimestamp));
-            setNotifications(data);
-            setUnreadNotifications(unread);
-          }
-        } catch (error) {
-          console.error('Error fetching notifications:', error);
+    const employeeId = localStorage.getItem('employeeId');
+    const companyName = localStorage.getItem('companyName');
+    if (!employeeId || !companyName) return;
+
+    const applyNotifications = (data) => {
+      const lastReadTimestamp = localStorage.getItem('lastReadNotificationTimestamp') || '0';
+      const unread = data.filter(notification => new Date(notification.timestamp) > new Date(lastReadTimestamp));
+      setNotifications(data);
+      setUnreadNotifications(unread);
+    };
+
+    // The server pushes the full feed on connect and whenever it changes
+    const source = new EventSource(withToken(`http://localhost:5000/api/notifications/${companyName}/${employeeId}/stream`));
+
+    source.addEventListener('snapshot', (event) => {
+      applyNotifications(JSON.parse(event.data));
+    });
+
+    // EventSource gives up on an HTTP error (e.g. 503 when the server has no
+    // stream slots left); keep the header current by polling instead.
+    let pollTimer = null;
+    const poll = async () => {
+      try {
+        const response = await fetch(`http://localhost:5000/api/notifications/${companyName}/${employeeId}`, {
+          headers: authHeaders(),
+        });
+        if (response.ok) {
+          applyNotifications(await response.json());
         }
+      } catch (error) {
+        console.error('Error fetching notifications:', error);
       }
     };
 
-    fetchNotifications();
-    const interval = setInterval(fetchNotifications, 60000); // Fetch every minute
+    source.onerror = (error) => {
+      console.error('Notification stream error:', error);
+      if (source.readyState === EventSource.CLOSED && !pollTimer) {
+        poll();
+        pollTimer = setInterval(poll, 60000);
+      }
+    };
 
-    return () => clearInterval(interval);
+    return () => {
+      source.close();
+      clearInterval(pollTimer);
+    };
   }, []);
 
   useEffect(() => {
@@ -58,6 +82,7 @@ const Header = () => {
 
   const handleLogout = () => {
     localStorage.removeItem('userId')
+    localStorage.removeItem('sessionToken')
     navigate('/')
   }
 
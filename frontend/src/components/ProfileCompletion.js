@@ -3,9 +3,10 @@ import { Card, CardHeader, CardTitle, CardContent } from './ui/card';
 import { Progress } from './ui/progress';
 import { cn } from '../lib/utils';
 
-const ProfileCompletion = ({ tasks }) => {
-  const completedTasks = tasks.filter(task => task.completed);
-  const completionPercentage = (completedTasks.length / tasks.length) * 100;
+// percentage comes from the server's stored completion state; it is only
+// worked out from the tasks when the caller has not got one yet
+const ProfileCompletion = ({ tasks, percentage = null }) => {
+  const completionPercentage = percentage ?? (tasks.filter(task => task.completed).length / tasks.length) * 100;
 
   return (
     <Card>
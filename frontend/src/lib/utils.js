@@ -5,3 +5,18 @@ export function cn(...inputs) {
   return twMerge(clsx(inputs))
 }
 
+
+// Session token from login, sent so the API can identify the employee
+// without a database lookup
+export function authHeaders(headers = {}) {
+  const token = localStorage.getItem('sessionToken')
+  return token ? { ...headers, Authorization: `Bearer ${token}` } : headers
+}
+
+// For requests that cannot set headers (EventSource, links opened in a new
+// tab): the same token as a query parameter
+export function withToken(url) {
+  const token = localStorage.getItem('sessionToken')
+  if (!token) return url
+  return `${url}${url.includes('?') ? '&' : '?'}token=${encodeURIComponent(token)}`
+}
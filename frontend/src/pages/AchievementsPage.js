@@ -5,6 +5,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card'
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
+import { authHeaders, withToken } from '../lib/utils';
 import { Button } from '../atoms/Button';
 import { Input } from '../atoms/Input';
 import { Modal, ModalContent, ModalHeader, ModalTitle, ModalDescription, ModalFooter } from '../molecules/Modal';
@@ -41,7 +42,7 @@ const AchievementsPage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/achievements/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/achievements/${companyName}/${employeeId}`, { headers: authHeaders() });
       if (!response.ok) {
         throw new Error('Failed to fetch achievements data');
       }
@@ -74,9 +75,9 @@ const AchievementsPage = () => {
 
       const response = await fetch(url, {
         method: method,
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify(newAchievement),
       });
 
@@ -101,6 +102,7 @@ const AchievementsPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/achievements/${companyName}/${employeeId}/${achievementId}`, {
         method: 'DELETE',
+        headers: authHeaders(),
       });
 
       if (response.ok) {
@@ -115,7 +117,7 @@ const AchievementsPage = () => {
     const employeeId = localStorage.getItem('employeeId');
     const companyName = localStorage.getItem('companyName');
     const url = `http://localhost:5000/api/certificates/${companyName}/${employeeId}/${certificateId}`;
-    window.open(url, '_blank');
+    window.open(withToken(url), '_blank');
   };
 
   const handleCertificateUpload = async () => {
@@ -129,6 +131,7 @@ const AchievementsPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/certificates/${companyName}/${employeeId}`, {
         method: 'POST',
+        headers: authHeaders(),
         body: formData,
       });
 
@@ -148,6 +151,7 @@ const AchievementsPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/certificates/${companyName}/${employeeId}/${certificateId}`, {
         method: 'DELETE',
+        headers: authHeaders(),
       });
 
       if (response.ok) {
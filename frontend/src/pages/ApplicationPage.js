@@ -6,6 +6,7 @@ import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
 import { Button } from '../atoms/Button';
+import { authHeaders } from '../lib/utils';
 
 const ApplicationsPage = () => {
   const navigate = useNavigate();
@@ -28,7 +29,9 @@ const ApplicationsPage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/candidate-applications/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/candidate-applications/${companyName}/${employeeId}`, {
+        headers: authHeaders(),
+      });
       if (!response.ok) {
         throw new Error('Failed to fetch applications');
       }
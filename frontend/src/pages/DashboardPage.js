@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { Upload, Plus, Briefcase, GraduationCap, Clock, Award, FileText, ChevronRight, Building2, Phone, FileSpreadsheet, Menu, X, Trash2, Bell } from 'lucide-react';
 
 import { Button } from '../atoms/Button';
+import { authHeaders } from '../lib/utils';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle, CardFooter } from '../components/ui/card';
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import { Progress } from '../components/ui/progress';
@@ -41,13 +42,14 @@ const DashboardPage = () => {
     resumePath: null,
   });
   const [notifications, setNotifications] = useState([]);
+  const [completionPercentage, setCompletionPercentage] = useState(null);
 
   useEffect(() => {
-    fetchProfile();
-    fetchNotifications();
+    fetchDashboard();
   }, []);
 
-  const fetchProfile = async () => {
+  // Profile, completion and notifications arrive in one request.
+  const fetchDashboard = async (fields = 'profile,completion,notifications') => {
     const employeeId = localStorage.getItem('employeeId');
     const companyName = localStorage.getItem('companyName');
     if (!employeeId || !companyName) {
@@ -57,11 +59,14 @@ const DashboardPage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/dashboard/${companyName}/${employeeId}?fields=${fields}`, {
+        headers: authHeaders(),
+      });
       if (!response.ok) {
         throw new Error('Failed to fetch profile data');
       }
-      const data = await response.json();
+      const dashboard = await response.json();
+      const data = dashboard.profile;
       setProfile(data);
       setProfileData({
         mobileNumber: data.mobile_number || '',
@@ -72,7 +77,10 @@ const DashboardPage = () => {
         education: data.education || {},
         resumePath: data.resume_path || null,
       });
-      updateTaskCompletion(data);
+      updateTaskCompletion(dashboard.completion);
+      if (dashboard.notifications) {
+        setNotifications(dashboard.notifications.slice(0, 5)); // Display only the 5 most recent notifications
+      }
     } catch (err) {
       setError(err.message);
       console.error('Error fetching profile:', err);
@@ -81,13 +89,14 @@ const DashboardPage = () => {
     }
   };
 
-  const updateTaskCompletion = (data) => {
+  const updateTaskCompletion = (completion) => {
     const updatedTasks = [...tasks];
-    if (data.mobile_number) updatedTasks[0].completed = true;
-    if (data.department) updatedTasks[1].completed = true;
-    if (data.project_summary) updatedTasks[2].completed = true;
-    if (data.work_experience) updatedTasks[3].completed = true;
+    if (completion.tasks.mobile_number) updatedTasks[0].completed = true;
+    if (completion.tasks.department) updatedTasks[1].completed = true;
+    if (completion.tasks.project_summary) updatedTasks[2].completed = true;
+    if (completion.tasks.work_experience) updatedTasks[3].completed = true;
     setTasks(updatedTasks);
+    setCompletionPercentage(completion.percentage);
   };
 
   const handleResumeUpload = (event) => {
@@ -105,6 +114,7 @@ const DashboardPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/upload-resume/${companyName}/${employeeId}`, {
         method: 'POST',
+        headers: authHeaders(),
         body: formData,
       });
 
@@ -112,7 +122,7 @@ const DashboardPage = () => {
         const data = await response.json();
         setIsResumeModalOpen(false);
         setProfileData(prev => ({ ...prev, resumePath: data.filename }));
-        fetchProfile();
+        fetchDashboard();
       }
     } catch (error) {
       console.error('Error uploading resume:', error);
@@ -125,11 +135,12 @@ const DashboardPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/delete-resume/${companyName}/${employeeId}`, {
         method: 'DELETE',
+        headers: authHeaders(),
       });
 
       if (response.ok) {
         setProfileData(prev => ({ ...prev, resumePath: null }));
-        fetchProfile();
+        fetchDashboard();
       }
     } catch (error) {
       console.error('Error deleting resume:', error);
@@ -149,15 +160,15 @@ const DashboardPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`, {
         method: 'PUT',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify(profileData),
       });
 
       if (response.ok) {
         setIsProfileModalOpen(false);
-        fetchProfile();
+        fetchDashboard();
       }
     } catch (error) {
       console.error('Error updating profile:', error);
@@ -170,9 +181,9 @@ const DashboardPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}/education`, {
         method: 'PUT',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify(educationData),
       });
 
@@ -185,7 +196,7 @@ const DashboardPage = () => {
         ...prev,
         education: updatedData.education
       }));
-      fetchProfile();
+      fetchDashboard();
     } catch (err) {
       console.error('Error updating education:', err);
       throw err;
@@ -198,9 +209,9 @@ const DashboardPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}/skills`, {
         method: 'PUT',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify({ skills }),
       });
 
@@ -213,33 +224,13 @@ const DashboardPage = () => {
         ...prev,
         skills: updatedData.skills
       }));
-      fetchProfile();
+      fetchDashboard();
     } catch (err) {
       console.error('Error updating skills:', err);
       throw err;
     }
   };
 
-  const fetchNotifications = async () => {
-    const employeeId = localStorage.getItem('employeeId');
-    const companyName = localStorage.getItem('companyName');
-    if (!employeeId || !companyName) {
-      navigate('/login');
-      return;
-    }
-
-    try {
-      const response = await fetch(`http://localhost:5000/api/notifications/${companyName}/${employeeId}`);
-      if (!response.ok) {
-        throw new Error('Failed to fetch notifications');
-      }
-      const data = await response.json();
-      setNotifications(data.slice(0, 5)); // Display only the 5 most recent notifications
-    } catch (err) {
-      console.error('Error fetching notifications:', err);
-    }
-  };
-
   if (isLoading) {
     return <div>Loading...</div>;
   }
@@ -326,7 +317,7 @@ const DashboardPage = () => {
                 </CardContent>
               </Card>
 
-              <ProfileCompletion tasks={tasks} />
+              <ProfileCompletion tasks={tasks} percentage={completionPercentage} />
 
               <Card>
                 <CardHeader>
@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
+import { authHeaders } from '../lib/utils';
 import EducationCard from '../components/EducationCard';
 import { Card, CardHeader, CardTitle, CardContent } from '../components/ui/card';
 import { Button } from '../atoms/Button';
@@ -28,7 +29,7 @@ const EducationPage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`, { headers: authHeaders() });
       if (!response.ok) {
         throw new Error('Failed to fetch education data');
       }
@@ -53,9 +54,9 @@ const EducationPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}/education`, {
         method: 'PUT',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify(educationData),
       });
 
@@ -5,6 +5,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card'
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
+import { authHeaders } from '../lib/utils';
 import { Button } from '../atoms/Button';
 import { Input } from '../atoms/Input';
 
@@ -23,14 +24,24 @@ const JobSearchPage = () => {
     experience: ''
   });
   const [selectedJob, setSelectedJob] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
-    fetchJobs();
-  }, []);
+    // Debounce keystrokes so the server only sees the settled query
+    const timeout = setTimeout(() => fetchJobs(), 250);
+    return () => clearTimeout(timeout);
+  }, [searchQuery, filters]);
 
-  useEffect(() => {
-    filterJobs();
-  }, [searchQuery, filters, jobs]);
+  const buildSearchUrl = (companyName, cursor) => {
+    const params = new URLSearchParams({ limit: '20' });
+    if (searchQuery) params.set('q', searchQuery);
+    if (filters.location) params.set('location', filters.location);
+    if (filters.jobType) params.set('mode', filters.jobType);
+    if (filters.experience) params.set('experience', filters.experience);
+    if (cursor !== null && cursor !== undefined) params.set('cursor', cursor);
+    return `http://localhost:5000/api/company-jobs/${companyName}/search?${params.toString()}`;
+  };
 
   const fetchJobs = async () => {
     const companyName = localStorage.getItem('companyName');
@@ -41,12 +52,13 @@ const JobSearchPage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/company-jobs/${companyName}`);
+      const response = await fetch(buildSearchUrl(companyName, null), { headers: authHeaders() });
       if (!response.ok) throw new Error('Failed to fetch jobs');
       const data = await response.json();
-      setJobs(data);
-      setFilteredJobs(data);
-      if (data.length > 0) setSelectedJob(data[0]);
+      setJobs(data.jobs);
+      setFilteredJobs(data.jobs);
+      setNextCursor(data.next_cursor);
+      setSelectedJob(data.jobs.length > 0 ? data.jobs[0] : null);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -54,35 +66,24 @@ const JobSearchPage = () => {
     }
   };
 
-  const filterJobs = () => {
-    let filtered = [...jobs];
-    
-    if (searchQuery) {
-      filtered = filtered.filter(job => 
-        job.job_title?.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        job.job_desc?.toLowerCase().includes(searchQuery.toLowerCase())
-      );
-    }
-
-    if (filters.location) {
-      filtered = filtered.filter(job => 
-        job.location?.toLowerCase().includes(filters.location.toLowerCase())
-      );
-    }
-
-    if (filters.jobType) {
-      filtered = filtered.filter(job => 
-        job.mode?.toLowerCase().includes(filters.jobType.toLowerCase())
-      );
-    }
+  const loadMoreJobs = async () => {
+    const companyName = localStorage.getItem('companyName');
+    if (!companyName || nextCursor === null) return;
 
-    if (filters.experience) {
-      filtered = filtered.filter(job => 
-        job.job_yrs_of_exp?.toString() === filters.experience
-      );
+    try {
+      setIsLoadingMore(true);
+      const response = await fetch(buildSearchUrl(companyName, nextCursor), { headers: authHeaders() });
+      if (!response.ok) throw new Error('Failed to fetch jobs');
+      const data = await response.json();
+      const combined = [...jobs, ...data.jobs];
+      setJobs(combined);
+      setFilteredJobs(combined);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setIsLoadingMore(false);
     }
-
-    setFilteredJobs(filtered);
   };
 
   const handleFilterChange = (e) => {
@@ -362,6 +363,11 @@ const JobSearchPage = () => {
                         isSelected={selectedJob?.job_id === job.job_id}
                       />
                     ))}
+                    {nextCursor !== null && (
+                      <Button onClick={loadMoreJobs} disabled={isLoadingMore} className="w-full">
+                        {isLoadingMore ? 'Loading...' : 'Load more jobs'}
+                      </Button>
+                    )}
                     {filteredJobs.length === 0 && (
                       <Card className="p-8 text-center noborder">
                         <Briefcase className="w-12 h-12 mx-auto text-gray-400 noborder" />
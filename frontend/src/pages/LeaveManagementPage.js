@@ -15,6 +15,7 @@ import {
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
+import { authHeaders } from '../lib/utils';
 
 const LeaveManagementPage = () => {
   const navigate = useNavigate();
@@ -49,7 +50,7 @@ const LeaveManagementPage = () => {
     }
 
     try {
-      const response = await fetch(`http://localhost:5000/api/leave-requests/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/leave-requests/${companyName}/${employeeId}`, { headers: authHeaders() });
       if (response.ok) {
         const data = await response.json();
         setLeaveRequests(data);
@@ -65,7 +66,7 @@ const LeaveManagementPage = () => {
     const employeeId = localStorage.getItem('employeeId');
     const companyName = localStorage.getItem('companyName');
     try {
-      const response = await fetch(`http://localhost:5000/api/leave-balance/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/leave-balance/${companyName}/${employeeId}`, { headers: authHeaders() });
       if (response.ok) {
         const data = await response.json();
         setLeaveBalance(data);
@@ -143,9 +144,9 @@ const LeaveManagementPage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/leave-requests/${companyName}/${employeeId}`, {
         method: 'POST',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify(newLeaveRequest),
       });
 
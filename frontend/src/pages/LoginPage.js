@@ -30,6 +30,7 @@ const LoginPage = () => {
       const data = await response.json()
 
       if (response.ok) {
+        localStorage.setItem('sessionToken', data.token)
         localStorage.setItem('employeeId', data.employeeId)
         localStorage.setItem('companyName', data.companyName)
         localStorage.setItem('userInfo', JSON.stringify({
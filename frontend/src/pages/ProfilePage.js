@@ -7,6 +7,7 @@ import { Input } from '../atoms/Input'
 import { Label } from '../atoms/Label'
 import { User, Mail, Phone, Building2, FileText, Briefcase, MapPin } from 'lucide-react'
 import Header from '../components/Header'
+import { authHeaders } from '../lib/utils'
 import Sidebar from '../components/Sidebar'
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar'
 
@@ -50,7 +51,7 @@ const ProfilePage = () => {
 
     try {
       setLoading(true)
-      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`)
+      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`, { headers: authHeaders() })
       if (!response.ok) {
         throw new Error('Failed to fetch profile data')
       }
@@ -91,9 +92,9 @@ const ProfilePage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`, {
         method: 'PUT',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify(profileData),
       })
 
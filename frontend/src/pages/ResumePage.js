@@ -6,6 +6,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card'
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
+import { authHeaders, withToken } from '../lib/utils';
 import { Modal, ModalContent, ModalHeader, ModalTitle, ModalDescription, ModalFooter } from '../molecules/Modal';
 import { Input } from '../atoms/Input';
 
@@ -31,7 +32,7 @@ const ResumePage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/profile/${companyName}/${employeeId}`, { headers: authHeaders() });
       if (!response.ok) {
         throw new Error('Failed to fetch profile data');
       }
@@ -60,6 +61,7 @@ const ResumePage = () => {
     try {
       const response = await fetch(`http://localhost:5000/api/upload-resume/${companyName}/${employeeId}`, {
         method: 'POST',
+        headers: authHeaders(),
         body: formData,
       });
 
@@ -77,7 +79,7 @@ const ResumePage = () => {
     if (resumePath) {
       const employeeId = localStorage.getItem('employeeId');
       const companyName = localStorage.getItem('companyName');
-      window.open(`http://localhost:5000/api/view-resume/${companyName}/${employeeId}`, '_blank');
+      window.open(withToken(`http://localhost:5000/api/view-resume/${companyName}/${employeeId}`), '_blank');
     }
   };
 
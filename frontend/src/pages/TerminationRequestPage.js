@@ -7,6 +7,7 @@ import { Input } from '../atoms/Input';
 import { SidebarProvider, SidebarInset } from '../components/ui/sidebar';
 import Sidebar from '../components/Sidebar';
 import Header from '../components/Header';
+import { authHeaders } from '../lib/utils';
 import { AlertCircle, Loader2, Info, Calendar, Clock, AlertTriangle } from 'lucide-react';
 import {
   Dialog,
@@ -44,7 +45,7 @@ const TerminationRequestPage = () => {
 
     try {
       setIsLoading(true);
-      const response = await fetch(`http://localhost:5000/api/termination-request/${companyName}/${employeeId}`);
+      const response = await fetch(`http://localhost:5000/api/termination-request/${companyName}/${employeeId}`, { headers: authHeaders() });
       if (response.ok) {
         const data = await response.json();
         setExistingRequest(data);
@@ -73,9 +74,9 @@ const TerminationRequestPage = () => {
       setIsLoading(true);
       const response = await fetch(`http://localhost:5000/api/termination-request/${companyName}/${employeeId}`, {
         method: 'POST',
-        headers: {
+        headers: authHeaders({
           'Content-Type': 'application/json',
-        },
+        }),
         body: JSON.stringify({ 
           reason,
           reasonCategory,